@@ -0,0 +1,49 @@
+"""
+Account authentication for Match Simulator App
+Password hashing, sign-up and login lookups shared by the public pages and
+the maintenance scripts
+"""
+
+import hashlib
+import sqlite3
+from database import get_connection, execute_write
+
+def hash_password(password):
+    return hashlib.sha256(password.encode()).hexdigest()
+
+def verify_password(password, password_hash):
+    return hash_password(password) == password_hash
+
+def create_user(username, password, role, email=None):
+    try:
+        password_hash = hash_password(password)
+        execute_write('''
+            INSERT INTO users (username, password_hash, role, email)
+            VALUES (?, ?, ?, ?)
+        ''', (username, password_hash, role, email))
+        return True
+    except sqlite3.IntegrityError:
+        return False
+
+def authenticate_user(username, password):
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute('''
+        SELECT id, username, role, status, club_name, cash
+        FROM users 
+        WHERE username = ? AND password_hash = ?
+    ''', (username, hash_password(password)))
+    
+    user = cursor.fetchone()
+    
+    if user:
+        return {
+            'id': user[0],
+            'username': user[1],
+            'role': user[2],
+            'status': user[3],
+            'club_name': user[4],
+            'cash': user[5]
+        }
+    return None
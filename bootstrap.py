@@ -0,0 +1,95 @@
+"""
+One-time startup for Match Simulator App
+Migrations and the first player import run once per process behind a lock,
+and each completed bootstrap is logged with the schema version and the
+player CSV checksum. Streamlit reruns only check an in-process flag
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from database import get_connection, run_write
+from migrate_database import run_migrations
+from csv_cache import CSV_PATH, current_checksum
+
+# UPDATE ... FROM needs SQLite 3.33 and RETURNING needs 3.35; cash postings,
+# transfer approvals and the player sync use both
+MIN_SQLITE_VERSION = (3, 35, 0)
+
+_bootstrap_lock = threading.Lock()
+_bootstrap_state = None
+
+def check_sqlite_version():
+    """Fail with a clear message when Python's bundled SQLite is too old"""
+    if sqlite3.sqlite_version_info < MIN_SQLITE_VERSION:
+        required = '.'.join(str(part) for part in MIN_SQLITE_VERSION)
+        raise RuntimeError(f"SQLite {required} or newer is required, but Python is using SQLite "
+                           f"{sqlite3.sqlite_version}. Upgrade Python or its SQLite library.")
+
+def count_csv_players(conn):
+    return conn.execute("SELECT COUNT(*) FROM players WHERE is_custom = FALSE").fetchone()[0]
+
+def seed_players(csv_path=CSV_PATH):
+    """Import the CSV players if none are loaded yet; returns True if it imported"""
+    if count_csv_players(get_connection()) or not os.path.exists(csv_path):
+        return False
+    from csv_ingest import ingest_players  # pandas and pyarrow load only when seeding
+    ingest_players(csv_path=csv_path, replace=False, verbose=False)
+    return True
+
+def data_checksum(csv_path=CSV_PATH):
+    """SHA-256 of the player CSV, read from the cache metadata when it is current"""
+    if not os.path.exists(csv_path):
+        return None
+    checksum = current_checksum(csv_path)
+    if checksum is None:
+        from csv_ingest import csv_checksum  # Refreshes the cache for a changed CSV
+        checksum = csv_checksum(csv_path)
+    return checksum
+
+def record_bootstrap(conn, state):
+    """Log a completed bootstrap (writer thread)"""
+    conn.execute('''
+        INSERT INTO bootstrap_log (schema_version, data_checksum, player_count, players_imported)
+        VALUES (?, ?, ?, ?)
+    ''', (state['schema_version'], state['data_checksum'], state['player_count'], state['players_imported']))
+
+def bootstrap(csv_path=CSV_PATH):
+    """Prepare the database once per process and return what was done
+
+    Concurrent first sessions wait on the lock; every later call returns
+    the recorded state without touching the database.
+    """
+    global _bootstrap_state
+    if _bootstrap_state is not None:
+        return _bootstrap_state
+
+    with _bootstrap_lock:
+        if _bootstrap_state is None:
+            check_sqlite_version()
+            started = time.perf_counter()
+            schema_version = run_migrations()
+            players_imported = seed_players(csv_path)
+            from ledger import write_checkpoints
+            write_checkpoints()  # Keeps ledger reconciliation to the entries since the last start
+
+            state = {
+                'schema_version': schema_version,
+                'data_checksum': data_checksum(csv_path),
+                'player_count': count_csv_players(get_connection()),
+                'players_imported': players_imported,
+            }
+            run_write(record_bootstrap, state)
+            state['seconds'] = time.perf_counter() - started
+            _bootstrap_state = state
+
+    return _bootstrap_state
+
+if __name__ == "__main__":
+    print("🚀 Bootstrapping Match Simulator database...")
+    state = bootstrap()
+    print(f"✅ Schema version {state['schema_version']}, {state['player_count']} CSV players "
+          f"({'imported now' if state['players_imported'] else 'already loaded'}) in {state['seconds']:.2f}s")
+    if state['data_checksum']:
+        print(f"🔒 Player CSV checksum: {state['data_checksum'][:16]}")
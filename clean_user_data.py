@@ -4,17 +4,21 @@ This script removes all user-generated data while preserving player data and dat
 Use this to reset the system for fresh testing or production deployment.
 """
 
-import sqlite3
 import os
+from database import DB_PATH, get_connection, run_write
+from migrate_database import run_migrations
+from image_store import delete_image
 
 def clean_all_data():
     """Remove ALL data including users, admin data, and transfer logs for fresh start"""
     
-    if not os.path.exists('match_simulator.db'):
+    if not os.path.exists(DB_PATH):
         print("❌ Database not found!")
         return
     
-    conn = sqlite3.connect('match_simulator.db')
+    # The wipe deletes from ledger and inventory tables added by migrations
+    run_migrations()
+    conn = get_connection()
     cursor = conn.cursor()
     
     try:
@@ -22,7 +26,7 @@ def clean_all_data():
         print("⚠️  This will remove ALL data except player database structure")
         
         # Get all table counts before cleanup
-        tables_to_check = ['users', 'transfer_bids', 'user_squads', 'user_items']
+        tables_to_check = ['users', 'transfer_bids', 'squad_uploads', 'user_inventory']
         counts = {}
         
         for table in tables_to_check:
@@ -49,34 +53,49 @@ def clean_all_data():
         
         print("\n🗑️  Performing complete data wipe...")
         
-        # Delete ALL data in correct order (respecting foreign keys)
-        
-        # 1. Delete user items
-        cursor.execute("DELETE FROM user_items")
-        print("✅ Deleted all user items")
-        
-        # 2. Delete user squads
-        cursor.execute("DELETE FROM user_squads")
-        print("✅ Deleted all user squads")
-        
-        # 3. Delete ALL transfer bids (including logs)
-        cursor.execute("DELETE FROM transfer_bids")
-        print("✅ Deleted all transfer bids and logs")
-        
-        # 4. Delete ALL users (including admin accounts)
-        cursor.execute("DELETE FROM users")
-        print("✅ Deleted all users (including admin accounts)")
-        
-        # 5. Reset player data to original state
-        print("🔄 Resetting player data to original state...")
-        # This will reload fresh player data from CSV
-        
-        # 6. Reset any sequences/auto-increment counters
-        cursor.execute("DELETE FROM sqlite_sequence WHERE name IN ('users', 'transfer_bids', 'user_squads', 'user_items')")
-        print("✅ Reset ID sequences")
+        def wipe_all_data(conn):
+            # Delete ALL data in correct order (respecting foreign keys)
+
+            # 1. Delete user items and their grant log
+            conn.execute("DELETE FROM item_grants")
+            conn.execute("DELETE FROM user_inventory")
+            print("✅ Deleted all user items")
+
+            # 2. Delete user squads, keeping their image hashes to remove the files
+            image_hashes = [row[0] for row in conn.execute(
+                "SELECT DISTINCT image_hash FROM squad_uploads WHERE image_hash IS NOT NULL"
+            )]
+            conn.execute("DELETE FROM squad_uploads")
+            print("✅ Deleted all user squads")
+
+            # 3. Delete ALL transfer bids (including logs)
+            conn.execute("DELETE FROM transfer_bids")
+            print("✅ Deleted all transfer bids and logs")
+
+            # 4. Delete settlement records and the cash ledger (ids restart below)
+            conn.execute("DELETE FROM transfer_settlements")
+            conn.execute("DELETE FROM ledger_checkpoints")
+            conn.execute("DELETE FROM cash_ledger")
+            print("✅ Deleted all settlement records and cash ledger entries")
+
+            # 5. Delete ALL users (including admin accounts)
+            conn.execute("DELETE FROM users")
+            print("✅ Deleted all users (including admin accounts)")
+
+            # 6. Reset player data to original state
+            print("🔄 Resetting player data to original state...")
+            # This will reload fresh player data from CSV
+
+            # 7. Reset any sequences/auto-increment counters
+            conn.execute("DELETE FROM sqlite_sequence WHERE name IN ('users', 'transfer_bids', 'squad_uploads', 'user_inventory', 'item_grants', 'cash_ledger', 'ledger_checkpoints')")
+            print("✅ Reset ID sequences")
+            return image_hashes
         
-        # Commit all changes
-        conn.commit()
+        # Commit all changes, then remove the squad images nothing references any more
+        image_hashes = run_write(wipe_all_data)
+        for image_hash in image_hashes:
+            delete_image(image_hash)
+        print(f"✅ Deleted {len(image_hashes)} squad image files")
         
         # Verify cleanup
         final_counts = {}
@@ -108,11 +127,7 @@ def clean_all_data():
         
     except Exception as e:
         print(f"❌ Error during cleanup: {e}")
-        conn.rollback()
         print("🔄 Changes have been rolled back.")
-    
-    finally:
-        conn.close()
 
 def reset_player_clubs():
     """Optional: Reset all player clubs to original CSV state"""
@@ -126,8 +141,9 @@ def reset_player_clubs():
         return
     
     # This would require reloading from CSV
-    print("💡 To reset player clubs, run: python improved_csv_loader.py")
+    print("💡 To reset player clubs, run: python load_csv_data.py")
     print("   This will reload all player data from the original CSV file.")
+    print("   (improved_csv_loader.py only syncs changes and keeps current clubs)")
 
 if __name__ == "__main__":
     print("🧹 Match Simulator App - COMPLETE DATA CLEANUP")
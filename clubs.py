@@ -0,0 +1,151 @@
+"""
+Club aggregates for Match Simulator App
+club_stats holds one row per club with squad size, rating, value and wage
+totals. Triggers on players keep it current through inserts, deletes, stat
+edits and transfers, so squad metrics are a primary-key lookup instead of
+an aggregate over the players table. The club directory (the sorted club
+names behind every club dropdown) is cached per process and rebuilt only
+when the clubs version counter moves
+"""
+
+import pandas as pd
+import streamlit as st
+from database import get_connection
+
+def add_club_player_sql(row):
+    """Upsert adding one player (the `new` or `old` trigger row) to its club"""
+    return f'''
+        INSERT INTO club_stats (club_name, player_count, rating_sum, rated_count, total_value, total_wages)
+        VALUES ({row}.club_name, 1, IFNULL({row}.overall_rating, 0), {row}.overall_rating IS NOT NULL,
+                IFNULL({row}.value_eur, 0), IFNULL({row}.wage_eur, 0))
+        ON CONFLICT (club_name) DO UPDATE SET
+            player_count = player_count + 1,
+            rating_sum = rating_sum + excluded.rating_sum,
+            rated_count = rated_count + excluded.rated_count,
+            total_value = total_value + excluded.total_value,
+            total_wages = total_wages + excluded.total_wages;
+    '''
+
+def remove_club_player_sql(row):
+    """Statements removing one player (the `old` trigger row) from its club"""
+    return f'''
+        UPDATE club_stats SET
+            player_count = player_count - 1,
+            rating_sum = rating_sum - IFNULL({row}.overall_rating, 0),
+            rated_count = rated_count - ({row}.overall_rating IS NOT NULL),
+            total_value = total_value - IFNULL({row}.value_eur, 0),
+            total_wages = total_wages - IFNULL({row}.wage_eur, 0)
+        WHERE club_name = {row}.club_name;
+        DELETE FROM club_stats WHERE club_name = {row}.club_name AND player_count <= 0;
+    '''
+
+def create_club_stats(conn):
+    """Create club_stats, its maintenance triggers and fill it from players"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS club_stats (
+            club_name TEXT PRIMARY KEY,
+            player_count INTEGER NOT NULL DEFAULT 0,
+            rating_sum INTEGER NOT NULL DEFAULT 0,
+            rated_count INTEGER NOT NULL DEFAULT 0,
+            total_value REAL NOT NULL DEFAULT 0,
+            total_wages REAL NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    ''')
+
+    # Players without a club are not counted anywhere
+    has_club = "{row}.club_name IS NOT NULL AND {row}.club_name != ''"
+
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS club_stats_insert AFTER INSERT ON players
+        WHEN {has_club.format(row='new')} BEGIN
+            {add_club_player_sql('new')}
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS club_stats_delete AFTER DELETE ON players
+        WHEN {has_club.format(row='old')} BEGIN
+            {remove_club_player_sql('old')}
+        END
+    ''')
+    # An update (transfer or stat edit) moves the old row out and the new row in
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS club_stats_update_old
+        AFTER UPDATE OF club_name, overall_rating, value_eur, wage_eur ON players
+        WHEN {has_club.format(row='old')} BEGIN
+            {remove_club_player_sql('old')}
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS club_stats_update_new
+        AFTER UPDATE OF club_name, overall_rating, value_eur, wage_eur ON players
+        WHEN {has_club.format(row='new')} BEGIN
+            {add_club_player_sql('new')}
+        END
+    ''')
+
+    rebuild_club_stats(conn)
+
+def rebuild_club_stats(conn):
+    """Recompute every club's totals from players (writer thread)"""
+    conn.execute("DELETE FROM club_stats")
+    conn.execute('''
+        INSERT INTO club_stats (club_name, player_count, rating_sum, rated_count, total_value, total_wages)
+        SELECT club_name, COUNT(*), IFNULL(SUM(overall_rating), 0), COUNT(overall_rating),
+               IFNULL(SUM(value_eur), 0), IFNULL(SUM(wage_eur), 0)
+        FROM players
+        WHERE club_name IS NOT NULL AND club_name != ''
+        GROUP BY club_name
+    ''')
+
+def get_club_stats(conn, club_name):
+    """Return a club's squad metrics, or None if the club has no players"""
+    stats_df = pd.read_sql_query('''
+        SELECT player_count,
+               CASE WHEN rated_count > 0 THEN rating_sum * 1.0 / rated_count END AS avg_rating,
+               total_value,
+               total_wages
+        FROM club_stats
+        WHERE club_name = ?
+    ''', conn, params=(club_name,))
+
+    if stats_df.empty:
+        return None
+    return stats_df.iloc[0]
+
+def create_club_directory_version(conn):
+    """Add the table_versions counter bumped whenever a club appears or disappears"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS table_versions (
+            table_name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    conn.execute("INSERT OR IGNORE INTO table_versions (table_name, version) VALUES ('clubs', 0)")
+
+    # club_stats gains or loses a row exactly when the set of clubs changes
+    for event in ('INSERT', 'DELETE'):
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS clubs_version_{event.lower()} AFTER {event} ON club_stats BEGIN
+                UPDATE table_versions SET version = version + 1 WHERE table_name = 'clubs';
+            END
+        ''')
+
+def get_table_version(conn, table_name):
+    """Current value of a table version counter (0 if it was never bumped)"""
+    row = conn.execute(
+        "SELECT version FROM table_versions WHERE table_name = ?", (table_name,)
+    ).fetchone()
+    return row[0] if row else 0
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def load_club_directory(version):
+    """Sorted club names as of a clubs version (cached per version)"""
+    clubs_df = pd.read_sql_query('''
+        SELECT club_name FROM club_stats ORDER BY club_name
+    ''', get_connection())
+    return clubs_df['club_name'].tolist()
+
+def get_club_names(conn=None):
+    """All club names for dropdowns, rebuilt only after the club list changes"""
+    conn = conn or get_connection()
+    return load_club_directory(get_table_version(conn, 'clubs'))
@@ -0,0 +1,57 @@
+"""
+Player CSV cache metadata for Match Simulator App
+Locates the Parquet cache next to the CSV and reads or writes the metadata
+file that records which CSV contents it was built from. Kept free of pandas
+and pyarrow so startup can read the CSV checksum without loading them
+"""
+
+import hashlib
+import json
+import os
+
+CSV_PATH = 'player-data-full.csv'
+
+# Bump when the cached columns or dtypes change so old caches are rebuilt
+CACHE_FORMAT = 1
+
+def cache_paths(csv_path):
+    """Parquet cache and its metadata file for a CSV"""
+    base = os.path.splitext(csv_path)[0]
+    return base + '.parquet', base + '.parquet.json'
+
+def file_sha256(path):
+    """SHA-256 of a file, read in 1 MB blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def read_cache_meta(meta_path):
+    """The cache metadata, or None if it is missing or unreadable"""
+    try:
+        with open(meta_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def write_cache_meta(meta_path, stat, sha256):
+    """Record which CSV contents the cache was built from"""
+    with open(meta_path, 'w') as f:
+        json.dump({
+            'format': CACHE_FORMAT,
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'sha256': sha256,
+        }, f)
+
+def current_checksum(csv_path=CSV_PATH):
+    """The CSV's SHA-256 from the cache metadata if the CSV is unchanged since, else None"""
+    parquet_path, meta_path = cache_paths(csv_path)
+    meta = read_cache_meta(meta_path)
+    if not meta or meta.get('format') != CACHE_FORMAT or not os.path.exists(parquet_path):
+        return None
+    stat = os.stat(csv_path)
+    if (meta.get('size'), meta.get('mtime_ns')) != (stat.st_size, stat.st_mtime_ns):
+        return None
+    return meta.get('sha256')
@@ -0,0 +1,527 @@
+"""
+Columnar CSV ingestion for Match Simulator App
+Maps and cleans player-data-full.csv with vectorized pandas operations on
+the calling thread, stages each parsed batch in an on-disk staging table
+through its own short writer job, and moves the staged rows into players
+with set-based SQL in a single writer-thread transaction. Secondary indexes
+and sync triggers on players are dropped for the load and rebuilt once
+afterwards, instead of being updated row by row. Files are streamed in
+chunks of only the used columns and staged rows go to the database file,
+so only a couple of chunks are held in memory at a time. The used columns
+are kept in a Parquet cache next to the CSV, revalidated by size, mtime and
+SHA-256, so the CSV text is parsed once per change instead of once per
+process
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+import numpy as np
+import pandas as pd
+from database import run_write, get_write_queue
+from csv_cache import CSV_PATH, CACHE_FORMAT, cache_paths, file_sha256, read_cache_meta, write_cache_meta
+from migrate_database import run_migrations
+from player_search import rebuild_search_index
+from positions import sync_player_positions
+from clubs import rebuild_club_stats
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Without pyarrow the CSV is parsed every time
+    pq = None
+
+# Database column -> CSV columns to try, first non-blank value wins
+COLUMN_CANDIDATES = {
+    'player_id': ['player_id', 'sofifa_id', 'id'],
+    'player_name': ['short_name', 'long_name', 'player_name', 'name'],
+    'positions': ['player_positions', 'position', 'positions'],
+    'club_name': ['club_name', 'team_name', 'club'],
+    'age': ['age'],
+    'nationality': ['nationality_name', 'nationality', 'nation'],
+    'overall_rating': ['overall', 'overall_rating', 'rating'],
+    'potential': ['potential', 'potential_rating'],
+    'value_eur': ['value_eur', 'market_value', 'value'],
+    'wage_eur': ['wage_eur', 'wage', 'salary'],
+}
+
+TEXT_COLUMNS = ['player_id', 'player_name', 'positions', 'club_name', 'nationality']
+INTEGER_COLUMNS = ['age', 'overall_rating', 'potential']
+MONEY_COLUMNS = ['value_eur', 'wage_eur']
+
+PLAYER_COLUMNS = list(COLUMN_CANDIDATES)
+
+# Columns the game changes after import (transfers); a sync never overwrites them
+GAME_OWNED_COLUMNS = ['club_name']
+# CSV attributes fingerprinted and refreshed by a delta sync
+SYNC_COLUMNS = [column for column in PLAYER_COLUMNS[1:] if column not in GAME_OWNED_COLUMNS]
+# Columns written for each CSV row, ending with the fingerprint
+LOAD_COLUMNS = PLAYER_COLUMNS + ['source_hash']
+
+# Only these CSV columns are read; the full dataset has ~100 more
+CSV_DTYPES = {
+    candidate: 'float64' if column in INTEGER_COLUMNS else 'string'
+    for column, candidates in COLUMN_CANDIDATES.items()
+    for candidate in candidates
+}
+
+# Rows parsed and inserted per step when streaming a CSV file
+STREAM_CHUNKSIZE = 50_000
+
+# Staging table parsed CSV rows are written to before loading or diffing.
+# It lives in the main database file, not in TEMP: the connections keep
+# temp_store in memory, which would hold the whole CSV in RAM until the load
+STAGE_PLAYERS_SQL = '''
+    CREATE TABLE csv_players (
+        player_id TEXT PRIMARY KEY,
+        player_name TEXT,
+        positions TEXT,
+        club_name TEXT,
+        age INTEGER,
+        nationality TEXT,
+        overall_rating INTEGER,
+        potential INTEGER,
+        value_eur REAL,
+        wage_eur REAL,
+        source_hash INTEGER
+    )
+'''
+
+STAGE_PLAYER_SQL = f'''
+    INSERT OR IGNORE INTO csv_players ({', '.join(LOAD_COLUMNS)})
+    VALUES ({', '.join('?' for _ in LOAD_COLUMNS)})
+'''
+
+# Ingests and syncs share the writer connection's staging table, one at a time
+_stage_lock = threading.Lock()
+
+# Money suffixes and their multipliers, e.g. '€2.5M' -> 2,500,000
+MONEY_SUFFIXES = {'K': 1_000, 'M': 1_000_000, 'B': 1_000_000_000}
+MONEY_PATTERN = r'^([+-]?(?:\d+\.?\d*|\.\d+)(?:E[+-]?\d+)?)([KMB]?)$'
+
+def parse_money(series):
+    """
+    Parse a whole column of money like '€185M', '€2.5K' or '1,250' to euros
+
+    Returns (values, failed): nullable Int64 euros, and a boolean mask of
+    non-blank entries that could not be parsed.
+    """
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        numbers = series.astype('float64')
+        values = np.round(numbers.where(np.isfinite(numbers))).astype('Int64')
+        return values, pd.Series(False, index=series.index)
+
+    # Money columns repeat a few hundred distinct strings, so parse each once
+    codes, uniques = pd.factorize(series)
+    text = pd.Series(uniques, dtype=object).astype('string').str.upper()
+    # Drop currency symbols, thousands separators and spaces
+    text = text.str.replace(r'[€$£¥,\s]', '', regex=True)
+
+    parts = text.str.extract(MONEY_PATTERN)
+    numbers = pd.to_numeric(parts[0], errors='coerce').astype('float64').to_numpy()
+    suffixes = parts[1].fillna('').to_numpy(dtype=str)
+    multipliers = np.select(
+        [suffixes == suffix for suffix in MONEY_SUFFIXES],
+        list(MONEY_SUFFIXES.values()),
+        default=1,
+    )
+    amounts = numbers * multipliers
+    amounts[~np.isfinite(amounts)] = np.nan
+    blank = text.isna() | text.isin(['', 'NAN', 'NONE'])
+
+    # Round, not truncate (4.1 * 1000 is 4099.999...), then map back to rows;
+    # code -1 marks missing values and picks the appended NaN
+    amounts = np.append(np.round(amounts), np.nan)
+    unparsed = np.append((np.isnan(amounts[:-1]) & ~blank.to_numpy(dtype=bool)), False)
+    values = pd.Series(amounts[codes], index=series.index).astype('Int64')
+    failed = pd.Series(unparsed[codes], index=series.index)
+    return values, failed
+
+def clean_value(value_str):
+    """
+    Clean value strings like '€185M', '€50K', '€2.5M' to numerical values in euros
+    """
+    values, _ = parse_money(pd.Series([value_str], dtype=object))
+    return None if pd.isna(values.iloc[0]) else int(values.iloc[0])
+
+def parse_player_csv(csv_path=CSV_PATH, chunksize=None):
+    """Parse the player CSV columns we use; with chunksize, an iterator of chunks"""
+    return pd.read_csv(
+        csv_path,
+        encoding='utf-8',
+        usecols=lambda column: column in CSV_DTYPES,
+        dtype=CSV_DTYPES,
+        chunksize=chunksize,
+    )
+
+def build_player_cache(csv_path, parquet_path):
+    """Convert the CSV to Parquet chunk by chunk, replacing the cache atomically"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(parquet_path)), suffix='.tmp')
+    os.close(fd)
+    writer = None
+    try:
+        for chunk in parse_player_csv(csv_path, chunksize=STREAM_CHUNKSIZE):
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(tmp_path, table.schema)
+            writer.write_table(table)
+        if writer is None:  # Header-only CSV
+            pq.write_table(pa.Table.from_pandas(parse_player_csv(csv_path), preserve_index=False), tmp_path)
+        else:
+            writer.close()
+        os.replace(tmp_path, parquet_path)
+    except Exception:
+        if writer is not None:
+            writer.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def player_cache(csv_path=CSV_PATH):
+    """Return the Parquet cache path for a CSV, rebuilding it if the CSV changed
+
+    A matching size and mtime is trusted; otherwise the SHA-256 decides, so
+    a touched but identical file keeps its cache. Returns None without pyarrow.
+    """
+    if pq is None:
+        return None
+
+    parquet_path, meta_path = cache_paths(csv_path)
+    stat = os.stat(csv_path)
+    meta = read_cache_meta(meta_path)
+
+    if meta and meta.get('format') == CACHE_FORMAT and os.path.exists(parquet_path):
+        if (meta['size'], meta['mtime_ns']) == (stat.st_size, stat.st_mtime_ns):
+            return parquet_path
+        sha256 = file_sha256(csv_path)
+        if sha256 == meta['sha256']:
+            write_cache_meta(meta_path, stat, sha256)
+            return parquet_path
+    else:
+        sha256 = file_sha256(csv_path)
+
+    build_player_cache(csv_path, parquet_path)
+    write_cache_meta(meta_path, stat, sha256)
+    return parquet_path
+
+def csv_checksum(csv_path=CSV_PATH):
+    """SHA-256 of the CSV, taken from the cache metadata when the cache is current"""
+    if player_cache(csv_path) is None:
+        return file_sha256(csv_path)
+    return read_cache_meta(cache_paths(csv_path)[1])['sha256']
+
+def read_parquet_chunks(parquet_path, chunksize):
+    """Yield DataFrame chunks from Parquet, numbered on like read_csv chunks"""
+    offset = 0
+    for batch in pq.ParquetFile(parquet_path).iter_batches(batch_size=chunksize):
+        chunk = batch.to_pandas()
+        chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+        offset += len(chunk)
+        yield chunk
+
+def read_player_csv(csv_path=CSV_PATH, chunksize=None):
+    """Read the player CSV columns we use, through the Parquet cache when available
+
+    With chunksize, returns an iterator of chunks.
+    """
+    parquet_path = player_cache(csv_path)
+    if parquet_path is None:
+        return parse_player_csv(csv_path, chunksize)
+    if chunksize is None:
+        return pd.read_parquet(parquet_path)
+    return read_parquet_chunks(parquet_path, chunksize)
+
+def coalesce_columns(df, candidates, convert):
+    """First usable value across candidate columns, converted column-at-a-time"""
+    result = None
+    for column in candidates:
+        if column not in df.columns:
+            continue
+        values = convert(df[column])
+        result = values if result is None else result.fillna(values)
+    if result is None:
+        return pd.Series(pd.NA, index=df.index, dtype=object)
+    return result
+
+def to_text(series):
+    if pd.api.types.is_float_dtype(series) and (series.dropna() % 1 == 0).all():
+        # IDs read as floats because of blanks: 158023.0 -> '158023'
+        series = series.astype('Int64')
+    text = series.astype('string').str.strip()
+    return text.mask(text.isin(['', 'nan']))
+
+def to_integer(series):
+    numbers = pd.to_numeric(series, errors='coerce').astype('float64')
+    numbers = numbers.where(np.isfinite(numbers))
+    return np.trunc(numbers).astype('Int64')
+
+def to_money(series):
+    values, _ = parse_money(series)
+    return values
+
+def map_player_columns(df):
+    """Build the players-table frame from raw CSV columns, skipping unnamed rows"""
+    players = pd.DataFrame(index=df.index)
+
+    for column in TEXT_COLUMNS:
+        players[column] = coalesce_columns(df, COLUMN_CANDIDATES[column], to_text)
+    for column in INTEGER_COLUMNS:
+        players[column] = coalesce_columns(df, COLUMN_CANDIDATES[column], to_integer)
+    for column in MONEY_COLUMNS:
+        players[column] = coalesce_columns(df, COLUMN_CANDIDATES[column], to_money)
+
+    fallback_ids = pd.Series('player_' + df.index.astype(str), index=df.index)
+    players['player_id'] = players['player_id'].fillna(fallback_ids)
+    players = players[players['player_name'].notna() & (players['player_name'] != 'Unknown')]
+    players['source_hash'] = fingerprint(players)
+    return players[LOAD_COLUMNS]
+
+def fingerprint(players):
+    """64-bit content hash of each row's synced attributes, signed for SQLite"""
+    hashes = pd.util.hash_pandas_object(players[SYNC_COLUMNS], index=False)
+    return pd.Series(hashes.to_numpy().view('int64'), index=players.index)
+
+def to_rows(players):
+    """Player frame as a list of tuples with None for missing values"""
+    columns = [
+        players[column].astype(object).where(players[column].notna(), None).tolist()
+        for column in LOAD_COLUMNS
+    ]
+    return list(zip(*columns))
+
+def drop_players_indexes(conn):
+    """Drop secondary indexes and triggers on players, returning their SQL"""
+    saved = conn.execute('''
+        SELECT type, name, sql FROM sqlite_master
+        WHERE tbl_name = 'players' AND type IN ('index', 'trigger') AND sql IS NOT NULL
+    ''').fetchall()
+    for object_type, name, _ in saved:
+        conn.execute(f'DROP {object_type.upper()} IF EXISTS "{name}"')
+    return [sql for _, _, sql in saved]
+
+def player_frames(df=None, csv_path=CSV_PATH, chunksize=STREAM_CHUNKSIZE):
+    """Raw frames to load: the given DataFrame, CSV chunks or the whole CSV"""
+    if df is not None:
+        yield df
+    elif chunksize:
+        yield from read_player_csv(csv_path, chunksize=chunksize)
+    else:
+        yield read_player_csv(csv_path)
+
+def iter_player_batches(frames, stats):
+    """Map raw CSV frames to insert rows one frame at a time, tallying stats"""
+    frames = iter(frames)
+    while True:
+        started = time.perf_counter()
+        df = next(frames, None)
+        if df is None:
+            return
+        rows = to_rows(map_player_columns(df))
+        stats['csv_rows'] += len(df)
+        stats['mapped_rows'] += len(rows)
+        stats['parse_seconds'] += time.perf_counter() - started
+        yield rows
+
+def create_player_stage(conn):
+    """Start an empty staging table on the write connection (writer thread)"""
+    conn.execute("DROP TABLE IF EXISTS csv_players")
+    conn.execute(STAGE_PLAYERS_SQL)
+
+def stage_player_rows(conn, rows):
+    """Append one parsed batch to the staging table (writer thread)"""
+    conn.executemany(STAGE_PLAYER_SQL, rows)
+
+def drop_player_stage(conn):
+    conn.execute("DROP TABLE IF EXISTS csv_players")
+
+def stage_players(frames, stats):
+    """Parse frames on this thread and stage each batch in its own writer job
+
+    The next batch is parsed while the previous one is being written, so the
+    writer never waits on pandas and at most two batches are held in memory.
+    """
+    write_queue = get_write_queue()
+    write_queue.run(create_player_stage)
+    pending = None
+    for rows in iter_player_batches(frames, stats):
+        if pending is not None:
+            pending.result()
+        pending = write_queue.submit(stage_player_rows, rows)
+    if pending is not None:
+        pending.result()
+
+def load_staged_players(conn, replace=True):
+    """Move the staged rows into players in the current write transaction (writer thread)
+
+    Returns the number of rows inserted.
+    """
+    saved_sql = drop_players_indexes(conn)
+
+    if replace:
+        conn.execute("DELETE FROM players WHERE is_custom = FALSE")
+    inserted = conn.execute(f'''
+        INSERT OR IGNORE INTO players ({', '.join(LOAD_COLUMNS)}, is_custom)
+        SELECT {', '.join(LOAD_COLUMNS)}, FALSE FROM csv_players
+        ORDER BY rowid
+    ''').rowcount
+
+    # Recreate indexes/triggers, then rebuild what they would have maintained
+    for sql in saved_sql:
+        conn.execute(sql)
+    rebuild_search_index(conn)
+    rebuild_club_stats(conn)
+    sync_player_positions(conn)
+    conn.execute("ANALYZE players")
+
+    conn.execute("DROP TABLE csv_players")
+    return inserted
+
+def ingest_players(df=None, csv_path=CSV_PATH, replace=True, verbose=True, chunksize=STREAM_CHUNKSIZE):
+    """Load players from the CSV (or an already-read DataFrame) into the database
+
+    The file is parsed chunksize rows at a time and staged on disk as it
+    goes, so memory use is bounded by the chunk size rather than the file;
+    the players table changes in one transaction at the end. Pass
+    chunksize=None to read it whole. With replace=True existing non-custom
+    players are removed first. Returns a report dict with row
+    counts, timings and rows per second.
+    """
+    run_migrations()
+    started = time.perf_counter()
+
+    stats = {'csv_rows': 0, 'mapped_rows': 0, 'parse_seconds': 0.0}
+    frames = player_frames(df, csv_path, chunksize)
+    with _stage_lock:
+        try:
+            stage_players(frames, stats)
+            inserted = run_write(load_staged_players, replace)
+        except BaseException:
+            run_write(drop_player_stage)
+            raise
+    elapsed = time.perf_counter() - started
+
+    report = {
+        **stats,
+        'inserted': inserted,
+        'skipped': stats['csv_rows'] - inserted,
+        'load_seconds': elapsed - stats['parse_seconds'],
+        'total_seconds': elapsed,
+        'rows_per_second': stats['mapped_rows'] / elapsed if elapsed > 0 else 0,
+    }
+
+    if verbose:
+        print(f"⚡ Ingested {inserted}/{stats['csv_rows']} players in {elapsed:.2f}s "
+              f"({report['rows_per_second']:,.0f} rows/sec; parse {report['parse_seconds']:.2f}s, "
+              f"load {report['load_seconds']:.2f}s)")
+
+    return report
+
+def sync_player_rows(conn):
+    """Apply a delta sync of the staged CSV rows in the current write transaction (writer thread)
+
+    Staged rows are matched to players by player_id (sofifa_id). Only rows
+    whose fingerprint changed are compared, only rows whose synced
+    attributes differ are updated, and GAME_OWNED_COLUMNS are only ever set
+    for new players. Returns the diff counts.
+    """
+    current = ', '.join(f'players.{column}' for column in SYNC_COLUMNS)
+    staged = ', '.join(f'csv.{column}' for column in SYNC_COLUMNS)
+    matched = '''
+        csv.player_id = players.player_id
+        AND players.is_custom = FALSE
+        AND players.source_hash IS NOT csv.source_hash
+    '''
+
+    # Which attributes are about to change, counted per column
+    column_counts = conn.execute(f'''
+        SELECT {', '.join(f'IFNULL(SUM(players.{column} IS NOT csv.{column}), 0)' for column in SYNC_COLUMNS)}
+        FROM players JOIN csv_players AS csv ON {matched}
+    ''').fetchone()
+    changed_ids = [row[0] for row in conn.execute(f'''
+        SELECT players.id FROM players JOIN csv_players AS csv ON {matched}
+        WHERE ({current}) IS NOT ({staged})
+    ''')]
+    matched_count = conn.execute('''
+        SELECT COUNT(*) FROM players JOIN csv_players AS csv
+        ON csv.player_id = players.player_id AND players.is_custom = FALSE
+    ''').fetchone()[0]
+
+    conn.execute(f'''
+        UPDATE players SET ({', '.join(SYNC_COLUMNS)}) = ({staged}), source_hash = csv.source_hash
+        FROM csv_players AS csv
+        WHERE {matched} AND ({current}) IS NOT ({staged})
+    ''')
+    # Rows loaded before fingerprints existed: same content, record the hash only
+    fingerprinted = conn.execute(f'''
+        UPDATE players SET source_hash = csv.source_hash
+        FROM csv_players AS csv
+        WHERE {matched}
+    ''').rowcount
+
+    last_id = conn.execute("SELECT IFNULL(MAX(id), 0) FROM players").fetchone()[0]
+    conn.execute(f'''
+        INSERT INTO players ({', '.join(LOAD_COLUMNS)}, is_custom)
+        SELECT {', '.join(LOAD_COLUMNS)}, FALSE FROM csv_players AS csv
+        WHERE NOT EXISTS (SELECT 1 FROM players WHERE players.player_id = csv.player_id)
+    ''')
+    new_ids = [row[0] for row in conn.execute("SELECT id FROM players WHERE id > ?", (last_id,))]
+
+    missing = conn.execute('''
+        SELECT COUNT(*) FROM players
+        WHERE is_custom = FALSE
+        AND NOT EXISTS (SELECT 1 FROM csv_players AS csv WHERE csv.player_id = players.player_id)
+    ''').fetchone()[0]
+
+    sync_player_positions(conn, changed_ids + new_ids)
+    conn.execute("DROP TABLE csv_players")
+
+    return {
+        'new': len(new_ids),
+        'changed': len(changed_ids),
+        'unchanged': matched_count - len(changed_ids),
+        'fingerprinted': fingerprinted,
+        'missing': missing,
+        'changed_columns': {
+            column: count for column, count in zip(SYNC_COLUMNS, column_counts) if count
+        },
+    }
+
+def sync_players(df=None, csv_path=CSV_PATH, verbose=True, chunksize=STREAM_CHUNKSIZE):
+    """Delta-sync players from the CSV (or an already-read DataFrame)
+
+    New players are inserted and changed ones refreshed in place; club
+    assignments made in the game are kept and players missing from the CSV
+    are left alone. Returns a diff report.
+    """
+    run_migrations()
+    started = time.perf_counter()
+
+    stats = {'csv_rows': 0, 'mapped_rows': 0, 'parse_seconds': 0.0}
+    frames = player_frames(df, csv_path, chunksize)
+    with _stage_lock:
+        try:
+            stage_players(frames, stats)
+            diff = run_write(sync_player_rows)
+        except BaseException:
+            run_write(drop_player_stage)
+            raise
+    report = {**stats, **diff, 'total_seconds': time.perf_counter() - started}
+
+    if verbose:
+        print(f"🔁 Synced {stats['csv_rows']} CSV rows in {report['total_seconds']:.2f}s: "
+              f"{diff['new']} new, {diff['changed']} changed, {diff['unchanged']} unchanged, "
+              f"{diff['missing']} not in CSV")
+        for column, count in diff['changed_columns'].items():
+            print(f"   📝 {column}: {count} changed")
+
+    return report
+
+if __name__ == "__main__":
+    if '--sync' in sys.argv:
+        print("🚀 Starting player CSV delta sync")
+        sync_players()
+    else:
+        print("🚀 Starting player CSV ingestion")
+        ingest_players()
@@ -0,0 +1,240 @@
+"""
+Database Connection Manager for Match Simulator App
+This module hands out shared SQLite connections so pages and scripts stop
+opening a fresh connection on every Streamlit rerun, and funnels every write
+through a single writer thread so concurrent sessions never fight over the
+database lock
+"""
+
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+import streamlit as st
+
+DB_PATH = 'match_simulator.db'
+
+# Size of the per-connection prepared statement cache (sqlite3 default is 128)
+STATEMENT_CACHE_SIZE = 256
+
+# How long a connection waits on a lock held by another process (e.g. a
+# loader script) before raising "database is locked"
+BUSY_TIMEOUT_MS = 5000
+
+# 'wal' lets readers run alongside the writer; 'rollback' is SQLite's
+# default journal and is kept for filesystems that cannot share memory maps
+STORAGE_MODE = 'wal'
+
+STORAGE_PRAGMAS = {
+    'wal': [
+        "PRAGMA journal_mode = WAL",
+        "PRAGMA synchronous = NORMAL",
+        "PRAGMA cache_size = -16000",
+        "PRAGMA mmap_size = 268435456",
+        "PRAGMA temp_store = MEMORY",
+    ],
+    'rollback': [
+        "PRAGMA journal_mode = DELETE",
+        "PRAGMA synchronous = FULL",
+        "PRAGMA cache_size = -16000",
+        "PRAGMA temp_store = MEMORY",
+    ],
+}
+
+# Most write jobs the writer thread commits together in one transaction
+MAX_WRITE_BATCH = 64
+
+def configure_connection(conn, storage_mode=STORAGE_MODE):
+    """Apply the busy timeout and storage-mode PRAGMAs to a connection"""
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    for pragma in STORAGE_PRAGMAS[storage_mode]:
+        conn.execute(pragma)
+    return conn
+
+class ConnectionManager:
+    """Process-wide pool of SQLite connections, one owned by each live thread
+
+    Streamlit runs every rerun on a short-lived script thread, so connections
+    left behind by finished threads are recycled instead of being closed. That
+    keeps the page cache, parsed schema and prepared statements warm across
+    reruns and sessions.
+    """
+
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._owned = {}
+        self._idle = []
+
+    def _open(self):
+        conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE
+        )
+        return configure_connection(conn)
+
+    def _reclaim_dead_threads(self):
+        for ident, (thread, conn) in list(self._owned.items()):
+            if not thread.is_alive():
+                del self._owned[ident]
+                if conn.in_transaction:
+                    conn.rollback()
+                self._idle.append(conn)
+
+    def get_connection(self):
+        """Return the connection owned by the calling thread"""
+        current = threading.current_thread()
+        with self._lock:
+            owner = self._owned.get(current.ident)
+            if owner and owner[0] is current:
+                return owner[1]
+            self._reclaim_dead_threads()
+            conn = self._idle.pop() if self._idle else self._open()
+            self._owned[current.ident] = (current, conn)
+            return conn
+
+    def close_all(self):
+        """Close every connection held by the manager"""
+        with self._lock:
+            for _, conn in self._owned.values():
+                conn.close()
+            for conn in self._idle:
+                conn.close()
+            self._owned.clear()
+            self._idle.clear()
+
+@st.cache_resource
+def get_connection_manager():
+    """Shared connection manager, created once per process"""
+    return ConnectionManager(DB_PATH)
+
+def get_connection():
+    """Get the calling thread's shared database connection
+
+    Callers must not close the returned connection.
+    """
+    return get_connection_manager().get_connection()
+
+class WriteQueue:
+    """Background thread that owns the only write connection in the process
+
+    Jobs are callables taking the write connection. The writer drains up to
+    MAX_WRITE_BATCH queued jobs, runs each inside its own savepoint and
+    commits them together, so a burst of writes from many sessions costs one
+    fsync instead of one per job. A failing job is rolled back on its own and
+    its exception is raised in the thread that submitted it.
+
+    Jobs must not call commit() or rollback() themselves.
+    """
+
+    def __init__(self, db_path=DB_PATH, max_batch=MAX_WRITE_BATCH):
+        self.db_path = db_path
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._conn = None
+        self._startup_error = None
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='db-writer', daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._startup_error is not None:
+            raise self._startup_error
+
+    def submit(self, fn, *args, **kwargs):
+        """Queue a write job and return a Future for its result"""
+        future = Future()
+        if not self._thread.is_alive():
+            future.set_exception(RuntimeError("database writer thread is not running"))
+            return future
+        self._queue.put((fn, args, kwargs, future))
+        return future
+
+    def run(self, fn, *args, **kwargs):
+        """Run a write job and wait for it to be committed"""
+        if threading.current_thread() is self._thread:
+            # Nested call from inside another job: already in the transaction
+            return fn(self._conn, *args, **kwargs)
+        return self.submit(fn, *args, **kwargs).result()
+
+    def _run(self):
+        # A database that cannot be opened ends the thread; __init__ re-raises the error
+        try:
+            self._conn = sqlite3.connect(
+                self.db_path,
+                isolation_level=None,
+                cached_statements=STATEMENT_CACHE_SIZE
+            )
+            configure_connection(self._conn)
+        except Exception as e:
+            self._startup_error = e
+            if self._conn is not None:
+                self._conn.close()
+            return
+        finally:
+            self._ready.set()
+
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._apply(batch)
+
+    def _apply(self, batch):
+        conn = self._conn
+        outcomes = []
+
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for fn, args, kwargs, future in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                conn.execute("SAVEPOINT write_job")
+                try:
+                    result = fn(conn, *args, **kwargs)
+                    conn.execute("RELEASE write_job")
+                    outcomes.append((future, result, None))
+                except BaseException as e:
+                    conn.execute("ROLLBACK TO write_job")
+                    conn.execute("RELEASE write_job")
+                    outcomes.append((future, None, e))
+            conn.execute("COMMIT")
+        except Exception as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            for fn, args, kwargs, future in batch:
+                if not future.done():
+                    if not future.running():
+                        future.set_running_or_notify_cancel()
+                    future.set_exception(e)
+            return
+
+        for future, result, error in outcomes:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+@st.cache_resource
+def get_write_queue():
+    """Shared writer thread, created once per process"""
+    return WriteQueue(DB_PATH)
+
+def run_write(fn, *args, **kwargs):
+    """Run fn(conn, *args, **kwargs) on the writer thread and return its result"""
+    return get_write_queue().run(fn, *args, **kwargs)
+
+def execute_write(query, params=()):
+    """Execute a single write statement and return the number of rows changed"""
+    return run_write(lambda conn: conn.execute(query, params).rowcount)
+
+def executemany_write(query, seq_of_params):
+    """Execute one write statement for every parameter set in a single job"""
+    return run_write(lambda conn: conn.executemany(query, seq_of_params).rowcount)
+
+def insert_and_get_id(query, params=()):
+    """Execute an INSERT and return the new row id"""
+    return run_write(lambda conn: conn.execute(query, params).lastrowid)
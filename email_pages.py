@@ -0,0 +1,398 @@
+import streamlit as st
+import pandas as pd
+from database import get_connection, execute_write
+
+# Email functionality
+def send_email_to_users(subject, message, admin_email, admin_password, recipient_option="All Users", smtp_server="smtp.gmail.com", smtp_port=587):
+    """
+    Send email to users based on recipient option using SMTP
+    """
+    import smtplib
+    from email.mime.text import MIMEText
+    from email.mime.multipart import MIMEMultipart
+    
+    try:
+        # Get user emails based on recipient option
+        conn = get_connection()
+        cursor = conn.cursor()
+        
+        if recipient_option == "All Users":
+            cursor.execute('SELECT email FROM users WHERE email IS NOT NULL AND email != ""')
+        elif recipient_option == "Only Approved Users":
+            cursor.execute('SELECT email FROM users WHERE email IS NOT NULL AND email != "" AND status = "approved"')
+        elif recipient_option == "Only Pending Users":
+            cursor.execute('SELECT email FROM users WHERE email IS NOT NULL AND email != "" AND status = "pending"')
+        elif recipient_option == "Only Admin Users":
+            cursor.execute('SELECT email FROM users WHERE email IS NOT NULL AND email != "" AND role = "admin"')
+        elif recipient_option == "Only Regular Users":
+            cursor.execute('SELECT email FROM users WHERE email IS NOT NULL AND email != "" AND role = "user"')
+        else:
+            cursor.execute('SELECT email FROM users WHERE email IS NOT NULL AND email != ""')
+        
+        user_emails = [row[0] for row in cursor.fetchall()]
+        
+        if not user_emails:
+            return False, f"No user emails found for {recipient_option}"
+        
+        # Create message
+        msg = MIMEMultipart()
+        msg['From'] = admin_email
+        msg['Subject'] = subject
+        
+        # Add message body
+        msg.attach(MIMEText(message, 'plain'))
+        
+        # Connect to SMTP server
+        try:
+            server = smtplib.SMTP(smtp_server, smtp_port, timeout=30)
+            server.starttls()
+            server.login(admin_email, admin_password)
+        except smtplib.SMTPAuthenticationError:
+            return False, "Authentication failed. Please check your email and password."
+        except smtplib.SMTPConnectError:
+            return False, f"Connection failed to {smtp_server}:{smtp_port}. Please check your SMTP settings."
+        except Exception as e:
+            return False, f"SMTP connection error: {str(e)}"
+        
+        # Send email to each user
+        sent_count = 0
+        failed_emails = []
+        for user_email in user_emails:
+            try:
+                msg['To'] = user_email
+                server.send_message(msg)
+                sent_count += 1
+            except Exception as e:
+                failed_emails.append(f"{user_email}: {str(e)}")
+        
+        server.quit()
+        
+        # Show failed emails if any
+        if failed_emails:
+            st.warning(f"Some emails failed to send: {len(failed_emails)} failures")
+            for failure in failed_emails[:5]:  # Show first 5 failures
+                st.error(failure)
+            if len(failed_emails) > 5:
+                st.info(f"... and {len(failed_emails) - 5} more failures")
+        
+        return True, f"Successfully sent email to {sent_count} users ({recipient_option})"
+        
+    except Exception as e:
+        return False, f"Error sending emails: {str(e)}"
+
+def send_test_email(admin_email, admin_password, smtp_server="smtp.gmail.com", smtp_port=587):
+    """
+    Send a test email to verify SMTP configuration
+    """
+    import smtplib
+    from email.mime.text import MIMEText
+    from email.mime.multipart import MIMEMultipart
+    
+    try:
+        # Create test message
+        msg = MIMEMultipart()
+        msg['From'] = admin_email
+        msg['To'] = admin_email  # Send to self as test
+        msg['Subject'] = "Test Email - Match Simulator"
+        
+        test_message = """
+        This is a test email from Match Simulator.
+        
+        If you received this email, your SMTP configuration is working correctly!
+        
+        You can now send emails to all users.
+        
+        Best regards,
+        Match Simulator System
+        """
+        
+        msg.attach(MIMEText(test_message, 'plain'))
+        
+        # Connect to SMTP server
+        try:
+            server = smtplib.SMTP(smtp_server, smtp_port, timeout=30)
+            server.starttls()
+            server.login(admin_email, admin_password)
+        except smtplib.SMTPAuthenticationError:
+            return False, "Authentication failed. Please check your email and password."
+        except smtplib.SMTPConnectError:
+            return False, f"Connection failed to {smtp_server}:{smtp_port}. Please check your SMTP settings."
+        except Exception as e:
+            return False, f"SMTP connection error: {str(e)}"
+        
+        # Send test email
+        server.send_message(msg)
+        server.quit()
+        
+        return True, "Test email sent successfully"
+        
+    except Exception as e:
+        return False, f"Error sending test email: {str(e)}"
+
+def log_email_action(subject, recipients_count, sent_by, recipient_option="All Users"):
+    """
+    Log email actions to database for audit trail
+    """
+    try:
+        execute_write('''
+            INSERT INTO email_history (subject, message, sent_by, recipients_count)
+            VALUES (?, ?, ?, ?)
+        ''', (subject, f"Email sent to {recipient_option}", sent_by, recipients_count))
+    except Exception as e:
+        st.error(f"Failed to log email action: {str(e)}")
+
+def show_send_email():
+    """
+    Admin page for sending emails to all users
+    """
+    st.title("📧 Send Email to All Users")
+    st.markdown("---")
+    
+    # Email configuration form
+    with st.form("email_config_form"):
+        st.subheader("📧 Email Configuration")
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            admin_email = st.text_input("Admin Email Address", 
+                                      help="Your email address (Gmail recommended)")
+            admin_password = st.text_input("Admin Email Password", 
+                                         type="password",
+                                         help="Your email password or app password")
+        
+        with col2:
+            smtp_server = st.text_input("SMTP Server", value="smtp.gmail.com",
+                                      help="SMTP server address (default: Gmail)")
+            smtp_port = st.number_input("SMTP Port", value=587, min_value=1, max_value=65535,
+                                      help="SMTP port (default: 587 for TLS)")
+        
+        st.markdown("---")
+        
+        # Email content form
+        st.subheader("📝 Email Content")
+        
+        # Recipient selection
+        st.subheader("👥 Recipient Selection")
+        recipient_option = st.selectbox("Choose Recipients", 
+                                      ["All Users", "Only Approved Users", "Only Pending Users", "Only Admin Users", "Only Regular Users"])
+        
+        # Email templates
+        template_option = st.selectbox("Choose Email Template", 
+                                     ["Custom Message", "Welcome Message", "Maintenance Notice", "Update Announcement", "Event Reminder"])
+        
+        if template_option == "Welcome Message":
+            subject = st.text_input("Email Subject", value="Welcome to Match Simulator!", placeholder="Welcome Message")
+            message = st.text_area("Email Message", height=200, 
+                                  value="Dear Football Manager,\n\nWelcome to Match Simulator! We're excited to have you join our community.\n\nGet ready to build your dream team and compete with other managers!\n\nBest regards,\nThe Match Simulator Team", 
+                                  placeholder="Enter your message here...")
+        elif template_option == "Maintenance Notice":
+            subject = st.text_input("Email Subject", value="Scheduled Maintenance Notice", placeholder="Maintenance Notice")
+            message = st.text_area("Email Message", height=200, 
+                                  value="Dear Users,\n\nWe will be performing scheduled maintenance on our system.\n\nMaintenance Time: [Insert Date/Time]\nExpected Duration: [Insert Duration]\n\nWe apologize for any inconvenience.\n\nBest regards,\nThe Match Simulator Team", 
+                                  placeholder="Enter your message here...")
+        elif template_option == "Update Announcement":
+            subject = st.text_input("Email Subject", value="New Features Available!", placeholder="Update Announcement")
+            message = st.text_area("Email Message", height=200, 
+                                  value="Dear Users,\n\nWe're excited to announce new features and improvements!\n\nNew Features:\n• [Feature 1]\n• [Feature 2]\n• [Feature 3]\n\nLog in to explore these new features!\n\nBest regards,\nThe Match Simulator Team", 
+                                  placeholder="Enter your message here...")
+        elif template_option == "Event Reminder":
+            subject = st.text_input("Email Subject", value="Upcoming Event Reminder", placeholder="Event Reminder")
+            message = st.text_area("Email Message", height=200, 
+                                  value="Dear Users,\n\nDon't forget about our upcoming event!\n\nEvent: [Event Name]\nDate: [Event Date]\nTime: [Event Time]\n\nWe look forward to seeing you there!\n\nBest regards,\nThe Match Simulator Team", 
+                                  placeholder="Enter your message here...")
+        else:
+            subject = st.text_input("Email Subject", placeholder="Important Announcement")
+            message = st.text_area("Email Message", height=200, 
+                                  placeholder="Enter your message here...")
+        
+        # Preview section
+        if subject and message:
+            st.subheader("📋 Email Preview")
+            st.info(f"**Subject:** {subject}")
+            st.info(f"**Message:**\n{message}")
+            
+            # Show user count for selected recipient group
+            conn = get_connection()
+            cursor = conn.cursor()
+            
+            if recipient_option == "All Users":
+                cursor.execute('SELECT COUNT(*) FROM users WHERE email IS NOT NULL AND email != ""')
+            elif recipient_option == "Only Approved Users":
+                cursor.execute('SELECT COUNT(*) FROM users WHERE email IS NOT NULL AND email != "" AND status = "approved"')
+            elif recipient_option == "Only Pending Users":
+                cursor.execute('SELECT COUNT(*) FROM users WHERE email IS NOT NULL AND email != "" AND status = "pending"')
+            elif recipient_option == "Only Admin Users":
+                cursor.execute('SELECT COUNT(*) FROM users WHERE email IS NOT NULL AND email != "" AND role = "admin"')
+            elif recipient_option == "Only Regular Users":
+                cursor.execute('SELECT COUNT(*) FROM users WHERE email IS NOT NULL AND email != "" AND role = "user"')
+            else:
+                cursor.execute('SELECT COUNT(*) FROM users WHERE email IS NOT NULL AND email != ""')
+            
+            user_count = cursor.fetchone()[0]
+            
+            st.info(f"**Recipients:** {user_count} users with email addresses ({recipient_option})")
+        
+        st.markdown("---")
+        
+        # Send buttons
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            if st.form_submit_button("🧪 Test Email Configuration", type="secondary"):
+                if not all([admin_email, admin_password]):
+                    st.error("Please fill in email and password fields!")
+                else:
+                    with st.spinner("Testing email configuration..."):
+                        success, result = send_test_email(
+                            admin_email, admin_password, smtp_server, smtp_port
+                        )
+                        
+                        if success:
+                            st.success("✅ Test email sent successfully! Your configuration is working.")
+                        else:
+                            st.error(f"❌ Test failed: {result}")
+        
+        with col2:
+            if st.form_submit_button("📤 Send Email to All Users", type="primary"):
+                if not all([admin_email, admin_password, subject, message]):
+                    st.error("Please fill in all required fields!")
+                else:
+                    # Show confirmation dialog
+                    st.warning("⚠️ **Important:** You are about to send an email to ALL users. This action cannot be undone.")
+                    
+                    # Get user count for confirmation based on recipient option
+                    conn = get_connection()
+                    cursor = conn.cursor()
+                    
+                    if recipient_option == "All Users":
+                        cursor.execute('SELECT COUNT(*) FROM users WHERE email IS NOT NULL AND email != ""')
+                    elif recipient_option == "Only Approved Users":
+                        cursor.execute('SELECT COUNT(*) FROM users WHERE email IS NOT NULL AND email != "" AND status = "approved"')
+                    elif recipient_option == "Only Pending Users":
+                        cursor.execute('SELECT COUNT(*) FROM users WHERE email IS NOT NULL AND email != "" AND status = "pending"')
+                    elif recipient_option == "Only Admin Users":
+                        cursor.execute('SELECT COUNT(*) FROM users WHERE email IS NOT NULL AND email != "" AND role = "admin"')
+                    elif recipient_option == "Only Regular Users":
+                        cursor.execute('SELECT COUNT(*) FROM users WHERE email IS NOT NULL AND email != "" AND role = "user"')
+                    else:
+                        cursor.execute('SELECT COUNT(*) FROM users WHERE email IS NOT NULL AND email != ""')
+                    
+                    user_count = cursor.fetchone()[0]
+                    
+                    st.info(f"📧 **Recipients:** {user_count} users will receive this email ({recipient_option})")
+                    
+                    # Confirmation checkbox
+                    confirm_send = st.checkbox("I confirm that I want to send this email to all users")
+                    
+                    if confirm_send:
+                        with st.spinner("Sending emails..."):
+                            success, result = send_email_to_users(
+                                subject, message, admin_email, admin_password, recipient_option, smtp_server, smtp_port
+                            )
+                            
+                            if success:
+                                st.success(result)
+                                st.balloons()
+                                
+                                # Log the email action
+                                log_email_action(subject, user_count, admin_email, recipient_option)
+                            else:
+                                st.error(result)
+                    else:
+                        st.info("Please confirm to send the email")
+    
+    # Instructions section
+    st.markdown("---")
+    st.subheader("📚 Setup Instructions")
+    
+    with st.expander("🔐 Gmail Setup (Recommended)"):
+        st.markdown("""
+        **For Gmail users:**
+        1. Enable 2-Factor Authentication on your Google account
+        2. Generate an App Password:
+           - Go to Google Account settings
+           - Security → 2-Step Verification → App passwords
+           - Generate password for 'Mail'
+        3. Use your Gmail address and the generated app password above
+        
+        **Note:** Regular Gmail passwords won't work due to security restrictions.
+        """)
+    
+    with st.expander("📧 Other Email Providers"):
+        st.markdown("""
+        **For other email providers:**
+        - **Outlook/Hotmail:** Use smtp-mail.outlook.com, port 587
+        - **Yahoo:** Use smtp.mail.yahoo.com, port 587
+        - **Custom SMTP:** Contact your email provider for SMTP settings
+        
+        **Security:** Use your email password or app-specific password
+        """)
+    
+    # Email history (optional - you can implement this later)
+    st.markdown("---")
+    st.subheader("📊 Email Statistics")
+    
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    # Get user email statistics
+    cursor.execute('''
+        SELECT 
+            COUNT(*) as total_users,
+            COUNT(CASE WHEN email IS NOT NULL AND email != '' THEN 1 END) as users_with_email,
+            COUNT(CASE WHEN email IS NULL OR email = '' THEN 1 END) as users_without_email
+        FROM users
+    ''')
+    
+    stats = cursor.fetchone()
+    
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.metric("Total Users", stats[0])
+    
+    with col2:
+        st.metric("Users with Email", stats[1])
+    
+    with col3:
+        st.metric("Users without Email", stats[2])
+    
+    if stats[2] > 0:
+        st.warning(f"⚠️ {stats[2]} users don't have email addresses. They won't receive emails.")
+    
+    # Email history section
+    st.markdown("---")
+    st.subheader("📜 Email History")
+    
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    # Get email history
+    cursor.execute('''
+        SELECT subject, message, sent_by, recipients_count, sent_at
+        FROM email_history
+        ORDER BY sent_at DESC
+        LIMIT 10
+    ''')
+    
+    email_history = cursor.fetchall()
+    
+    if email_history:
+        # Create a DataFrame for better display
+        history_df = pd.DataFrame(email_history, columns=['Subject', 'Recipient Group', 'Sent By', 'Recipients', 'Sent At'])
+        history_df['Sent At'] = pd.to_datetime(history_df['Sent At']).dt.strftime('%Y-%m-%d %H:%M')
+        
+        # Display with expandable details
+        for _, row in history_df.iterrows():
+            with st.expander(f"📧 {row['Subject']} - {row['Sent At']}"):
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    st.write(f"**Sent By:** {row['Sent By']}")
+                with col2:
+                    st.write(f"**Recipients:** {row['Recipients']} users")
+                with col3:
+                    st.write(f"**Sent At:** {row['Sent At']}")
+                st.write(f"**Recipient Group:** {row['Recipient Group']}")
+    else:
+        st.info("No emails have been sent yet.")
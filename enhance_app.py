@@ -3,84 +3,22 @@ Enhancement script for Match Simulator App
 This script improves CSV loading and adds final polish
 """
 
-import pandas as pd
-import sqlite3
-import os
+from database import get_connection, run_write
+from positions import sync_player_positions
+from csv_ingest import ingest_players
 
 def improve_csv_loading():
     """Improve CSV loading with better error handling and data processing"""
     print("🔄 Improving CSV data loading...")
     
     try:
-        # Load CSV with specific encoding and error handling
-        df = pd.read_csv('player-data-full.csv', encoding='utf-8', low_memory=False)
-        print(f"✅ Successfully loaded CSV with {len(df)} rows")
+        # Map, clean and bulk-load the CSV in one transaction
+        report = ingest_players()
+        print(f"✅ Successfully inserted {report['inserted']} players into database")
         
-        # Display column information
-        print(f"📊 CSV columns: {list(df.columns)}")
-        
-        # Connect to database
-        conn = sqlite3.connect('match_simulator.db')
+        conn = get_connection()
         cursor = conn.cursor()
         
-        # Clear existing non-custom players
-        cursor.execute("DELETE FROM players WHERE is_custom = FALSE")
-        
-        # Process and insert player data in batches
-        batch_size = 1000
-        successful_inserts = 0
-        
-        for i in range(0, len(df), batch_size):
-            batch = df.iloc[i:i+batch_size]
-            
-            for _, row in batch.iterrows():
-                try:
-                    # Map CSV columns to database fields
-                    player_data = {
-                        'player_id': str(row.get('sofifa_id', row.get('id', f'player_{i}'))),
-                        'player_name': str(row.get('short_name', row.get('long_name', row.get('player_name', 'Unknown')))),
-                        'positions': str(row.get('player_positions', row.get('position', ''))),
-                        'club_name': str(row.get('club_name', '')),
-                        'age': int(row.get('age', 0)) if pd.notna(row.get('age')) else None,
-                        'nationality': str(row.get('nationality_name', row.get('nationality', ''))),
-                        'overall_rating': int(row.get('overall', 0)) if pd.notna(row.get('overall')) else None,
-                        'potential': int(row.get('potential', 0)) if pd.notna(row.get('potential')) else None,
-                        'value_eur': float(row.get('value_eur', 0)) if pd.notna(row.get('value_eur')) else None,
-                        'wage_eur': float(row.get('wage_eur', 0)) if pd.notna(row.get('wage_eur')) else None
-                    }
-                    
-                    # Skip if essential data is missing
-                    if not player_data['player_name'] or player_data['player_name'] == 'Unknown':
-                        continue
-                    
-                    cursor.execute('''
-                        INSERT OR IGNORE INTO players 
-                        (player_id, player_name, positions, club_name, age, nationality, 
-                         overall_rating, potential, value_eur, wage_eur, is_custom)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, FALSE)
-                    ''', (
-                        player_data['player_id'],
-                        player_data['player_name'],
-                        player_data['positions'],
-                        player_data['club_name'],
-                        player_data['age'],
-                        player_data['nationality'],
-                        player_data['overall_rating'],
-                        player_data['potential'],
-                        player_data['value_eur'],
-                        player_data['wage_eur']
-                    ))
-                    successful_inserts += 1
-                    
-                except Exception as e:
-                    continue
-            
-            # Commit batch
-            conn.commit()
-            print(f"📦 Processed batch {i//batch_size + 1}, total inserted: {successful_inserts}")
-        
-        print(f"✅ Successfully inserted {successful_inserts} players into database")
-        
         # Verify data
         cursor.execute("SELECT COUNT(*) FROM players WHERE is_custom = FALSE")
         total_players = cursor.fetchone()[0]
@@ -90,8 +28,6 @@ def improve_csv_loading():
         
         print(f"📊 Database now contains {total_players} players from {total_clubs} clubs")
         
-        conn.close()
-        
     except Exception as e:
         print(f"❌ Error loading CSV: {e}")
 
@@ -99,9 +35,6 @@ def add_sample_data():
     """Add some sample data for testing"""
     print("🎯 Adding sample data for testing...")
     
-    conn = sqlite3.connect('match_simulator.db')
-    cursor = conn.cursor()
-    
     # Sample clubs and players
     sample_players = [
         ("MESSI001", "Lionel Messi", "RW,CF", "Inter Miami", 36, "Argentina", 93, 93, 50000000, 1000000),
@@ -116,19 +49,22 @@ def add_sample_data():
         ("LEWANDOWSKI001", "Robert Lewandowski", "ST", "Barcelona", 35, "Poland", 89, 89, 45000000, 450000)
     ]
     
-    for player in sample_players:
-        try:
-            cursor.execute('''
+    def insert_sample_players(conn):
+        new_ids = []
+        for player in sample_players:
+            # Ignored duplicates return no row, so only new players are synced
+            new_ids += [row[0] for row in conn.execute('''
                 INSERT OR IGNORE INTO players 
                 (player_id, player_name, positions, club_name, age, nationality, 
                  overall_rating, potential, value_eur, wage_eur, is_custom)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, FALSE)
-            ''', player)
-        except:
-            continue
+                RETURNING id
+            ''', player)]
+        sync_player_positions(conn, new_ids)
+        return len(new_ids)
     
-    conn.commit()
-    conn.close()
+    added = run_write(insert_sample_players)
+    print(f"➕ {added} new sample players")
     
     print("✅ Sample data added successfully")
 
@@ -146,7 +82,7 @@ echo "🚀 Deploying Match Simulator App..."
 pip install -r requirements.txt
 
 # Initialize database
-python -c "from app import init_database, initialize_players_from_csv; init_database(); initialize_players_from_csv()"
+python bootstrap.py
 
 # Run enhancements
 python enhance_app.py
@@ -168,7 +104,7 @@ REM Install dependencies
 pip install -r requirements.txt
 
 REM Initialize database
-python -c "from app import init_database, initialize_players_from_csv; init_database(); initialize_players_from_csv()"
+python bootstrap.py
 
 REM Run enhancements
 python enhance_app.py
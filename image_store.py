@@ -0,0 +1,187 @@
+"""
+Content-addressed image store for Match Simulator App
+Uploaded images live on disk under image_store/, named by the SHA-256 of
+their bytes, and SQLite keeps only the hash. Identical uploads share one
+file, and page queries no longer pull image BLOBs through the page cache.
+Downscaled renditions (thumbnails and previews) are rendered once by a
+background worker and cached next to the originals
+"""
+
+import hashlib
+import io
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import streamlit as st
+
+IMAGE_STORE_DIR = 'image_store'
+RENDITIONS_DIR = os.path.join(IMAGE_STORE_DIR, 'renditions')
+
+# Longest edge in pixels: thumbnails fill review grids at their own size,
+# previews are roughly 2x the width they are shown at
+RENDITION_SIZES = {
+    'thumb': 200,
+    'preview': 800,
+}
+
+RENDITION_QUALITY = 80
+
+@lru_cache(maxsize=None)
+def rendition_format():
+    """(Pillow format, file extension) used for renditions
+
+    WebP is smaller at the same quality; fall back to JPEG on Pillow builds
+    without it. Pillow is imported here, not at module load, so pages that
+    never show an image don't pay for it.
+    """
+    from PIL import features
+    return ('WEBP', '.webp') if features.check('webp') else ('JPEG', '.jpg')
+
+def image_path(image_hash):
+    """Path of a stored image, sharded by the first two hex digits"""
+    return os.path.join(IMAGE_STORE_DIR, image_hash[:2], image_hash)
+
+def write_atomic(path, data):
+    """Write to a temp file and rename so readers never see half a file"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def store_image(image_bytes):
+    """Write image bytes to the store (once per distinct content) and return the hash"""
+    image_hash = hashlib.sha256(image_bytes).hexdigest()
+    path = image_path(image_hash)
+
+    if not os.path.exists(path):
+        write_atomic(path, image_bytes)
+
+    return image_hash
+
+def has_image(image_hash):
+    """True if the store holds an image for this hash"""
+    return bool(image_hash) and os.path.exists(image_path(image_hash))
+
+def read_image(image_hash):
+    """Return the stored bytes for a hash, or None if missing"""
+    if not has_image(image_hash):
+        return None
+    with open(image_path(image_hash), 'rb') as f:
+        return f.read()
+
+def move_squad_images_to_store(conn):
+    """Add image_hash to squad_uploads and move existing BLOBs into the store"""
+    columns = [column[1] for column in conn.execute("PRAGMA table_info(squad_uploads)")]
+    if 'image_hash' not in columns:
+        conn.execute("ALTER TABLE squad_uploads ADD COLUMN image_hash TEXT")
+        conn.execute("ALTER TABLE squad_uploads ADD COLUMN image_size INTEGER")
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_squad_uploads_user_uploaded
+        ON squad_uploads (user_id, uploaded_at)
+    ''')
+
+    # One row at a time so a large table never sits in memory at once
+    upload_ids = [row[0] for row in conn.execute(
+        "SELECT id FROM squad_uploads WHERE image_data IS NOT NULL"
+    ).fetchall()]
+    for upload_id in upload_ids:
+        image_data = conn.execute(
+            "SELECT image_data FROM squad_uploads WHERE id = ?", (upload_id,)
+        ).fetchone()[0]
+        conn.execute('''
+            UPDATE squad_uploads
+            SET image_hash = ?, image_size = ?, image_data = NULL
+            WHERE id = ?
+        ''', (store_image(bytes(image_data)), len(image_data), upload_id))
+
+def rendition_path(image_hash, rendition):
+    """Path of a cached rendition of a stored image; a new size gets a new directory"""
+    directory = f"{rendition}_{RENDITION_SIZES[rendition]}"
+    return os.path.join(RENDITIONS_DIR, directory, image_hash[:2], image_hash + rendition_format()[1])
+
+def render_rendition(image_hash, rendition):
+    """Downscale a stored image into a rendition file (no-op if it exists)"""
+    path = rendition_path(image_hash, rendition)
+    if os.path.exists(path):
+        return path
+
+    from PIL import Image, ImageOps
+
+    size = RENDITION_SIZES[rendition]
+    image_format = rendition_format()[0]
+    with Image.open(image_path(image_hash)) as image:
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((size, size))
+        if image.mode not in ('RGB', 'RGBA') or image_format == 'JPEG':
+            image = image.convert('RGBA' if image_format == 'WEBP' else 'RGB')
+        buffer = io.BytesIO()
+        image.save(buffer, image_format, quality=RENDITION_QUALITY)
+
+    write_atomic(path, buffer.getvalue())
+    return path
+
+def render_all_renditions(image_hash):
+    """Render every rendition size for a stored image"""
+    for rendition in RENDITION_SIZES:
+        render_rendition(image_hash, rendition)
+
+def delete_image(image_hash):
+    """Remove a stored image and its renditions; only for hashes no upload references"""
+    paths = [image_path(image_hash)] + [rendition_path(image_hash, rendition) for rendition in RENDITION_SIZES]
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+class RenditionWorker:
+    """Background thread rendering thumbnails and previews off the page thread
+
+    Each image is queued at most once while its renditions are pending.
+    """
+
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='renditions')
+        self._lock = threading.Lock()
+        self._pending = set()
+
+    def schedule(self, image_hash):
+        """Queue rendering for an image unless it is already queued"""
+        with self._lock:
+            if image_hash in self._pending:
+                return
+            self._pending.add(image_hash)
+        self._executor.submit(self._render, image_hash)
+
+    def _render(self, image_hash):
+        try:
+            render_all_renditions(image_hash)
+        except Exception as e:
+            print(f"⚠️ Could not render renditions for {image_hash[:12]}: {e}")
+        finally:
+            with self._lock:
+                self._pending.discard(image_hash)
+
+@st.cache_resource
+def get_rendition_worker():
+    """Shared rendition worker, created once per process"""
+    return RenditionWorker()
+
+def schedule_renditions(image_hash):
+    """Render an image's thumbnail and preview in the background"""
+    if has_image(image_hash):
+        get_rendition_worker().schedule(image_hash)
+
+def get_rendition(image_hash, rendition):
+    """Return a rendition path if it is ready; otherwise queue it and return None"""
+    path = rendition_path(image_hash, rendition)
+    if os.path.exists(path):
+        return path
+    schedule_renditions(image_hash)
+    return None
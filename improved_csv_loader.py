@@ -1,46 +1,12 @@
 """
 Improved CSV Data Loader with Value Cleaning for Match Simulator App
 This script properly cleans and loads player values from formats like €185M, €50K, etc.
+Re-running it delta-syncs changed players and keeps clubs changed by transfers
 """
 
 import pandas as pd
-import sqlite3
-import numpy as np
-import re
-from datetime import datetime
-
-def clean_value(value_str):
-    """
-    Clean value strings like '€185M', '€50K', '€2.5M' to numerical values in euros
-    """
-    if pd.isna(value_str) or value_str == '' or value_str is None:
-        return None
-    
-    # Convert to string and clean
-    value_str = str(value_str).strip()
-    
-    # Remove currency symbols and spaces
-    value_str = re.sub(r'[€$£¥]', '', value_str)
-    value_str = value_str.replace(',', '').replace(' ', '')
-    
-    # Handle different suffixes
-    multiplier = 1
-    if value_str.upper().endswith('M'):
-        multiplier = 1000000  # Million
-        value_str = value_str[:-1]
-    elif value_str.upper().endswith('K'):
-        multiplier = 1000     # Thousand
-        value_str = value_str[:-1]
-    elif value_str.upper().endswith('B'):
-        multiplier = 1000000000  # Billion
-        value_str = value_str[:-1]
-    
-    try:
-        # Convert to float and apply multiplier
-        numeric_value = float(value_str) * multiplier
-        return int(numeric_value)  # Return as integer euros
-    except (ValueError, TypeError):
-        return None
+from database import get_connection
+from csv_ingest import CSV_PATH, STREAM_CHUNKSIZE, sync_players, read_player_csv, clean_value, parse_money
 
 def clean_wage(wage_str):
     """
@@ -53,155 +19,33 @@ def load_csv_data_improved():
     print("🔄 Loading player data from CSV with value cleaning...")
     
     try:
-        # Read CSV with proper settings
-        df = pd.read_csv('player-data-full.csv', low_memory=False)
-        print(f"✅ Successfully loaded CSV with {len(df)} rows and {len(df.columns)} columns")
-        
-        # Display available columns
-        print(f"📊 Available columns: {list(df.columns)}")
-        
-        # Show sample values before cleaning
-        if 'value' in df.columns:
-            print(f"💰 Sample values before cleaning: {df['value'].dropna().head(5).tolist()}")
-        
-        # Connect to database
-        conn = sqlite3.connect('match_simulator.db')
-        cursor = conn.cursor()
+        # Show sample values before cleaning, from the first chunk only
+        sample = next(iter(read_player_csv(chunksize=STREAM_CHUNKSIZE)), None)
+        if sample is not None and 'value' in sample.columns:
+            print(f"💰 Sample values before cleaning: {sample['value'].dropna().head(5).tolist()}")
+            _, failed = parse_money(sample['value'])
+            print(f"⚠️ Values that could not be parsed in the first {len(sample)} rows: {int(failed.sum())}")
         
-        # Clear existing non-custom players
-        print("🗑️ Clearing existing non-custom players...")
-        cursor.execute("DELETE FROM players WHERE is_custom = FALSE")
-        conn.commit()
-        
-        # Process data in batches
-        batch_size = 1000
-        successful_inserts = 0
-        failed_inserts = 0
-        value_cleaning_stats = {'cleaned': 0, 'failed': 0}
-        
-        print(f"📦 Processing data in batches of {batch_size}...")
-        
-        for i in range(0, len(df), batch_size):
-            batch = df.iloc[i:i+batch_size]
-            batch_success = 0
-            
-            for idx, row in batch.iterrows():
-                try:
-                    # Extract player data with improved value cleaning
-                    player_data = extract_player_data_improved(row, idx, value_cleaning_stats)
-                    
-                    # Skip if essential data is missing
-                    if not player_data['player_name'] or player_data['player_name'] in ['Unknown', 'nan', '']:
-                        continue
-                    
-                    # Insert into database
-                    cursor.execute('''
-                        INSERT OR IGNORE INTO players 
-                        (player_id, player_name, positions, club_name, age, nationality, 
-                         overall_rating, potential, value_eur, wage_eur, is_custom)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, FALSE)
-                    ''', (
-                        player_data['player_id'],
-                        player_data['player_name'],
-                        player_data['positions'],
-                        player_data['club_name'],
-                        player_data['age'],
-                        player_data['nationality'],
-                        player_data['overall_rating'],
-                        player_data['potential'],
-                        player_data['value_eur'],
-                        player_data['wage_eur']
-                    ))
-                    
-                    batch_success += 1
-                    successful_inserts += 1
-                    
-                except Exception as e:
-                    failed_inserts += 1
-                    if failed_inserts < 10:  # Show first 10 errors
-                        print(f"⚠️ Error processing row {idx}: {str(e)[:100]}")
-                    continue
-            
-            # Commit batch
-            conn.commit()
-            print(f"✅ Batch {i//batch_size + 1}: {batch_success}/{len(batch)} players inserted")
+        # Stream the CSV in chunks, cleaning values and syncing only new or changed players
+        report = sync_players(csv_path=CSV_PATH)
+        print(f"✅ Successfully streamed {report['csv_rows']} CSV rows")
         
         print(f"\n📊 Final Results:")
-        print(f"✅ Successfully inserted: {successful_inserts} players")
-        print(f"❌ Failed insertions: {failed_inserts} players")
-        print(f"💰 Value cleaning: {value_cleaning_stats['cleaned']} cleaned, {value_cleaning_stats['failed']} failed")
+        print(f"✅ New players: {report['new']}")
+        print(f"🔁 Updated players: {report['changed']}")
+        print(f"⏭️ Unchanged players: {report['unchanged']}")
+        
+        conn = get_connection()
         
         # Verify data with value statistics
         verify_data_with_values(conn)
         
-        conn.close()
         return True
         
     except Exception as e:
         print(f"❌ Error loading CSV: {e}")
         return False
 
-def extract_player_data_improved(row, idx, value_stats):
-    """Extract player data from CSV row with improved value cleaning"""
-    
-    # Helper function to safely get value
-    def safe_get(row, keys, default=None):
-        for key in keys:
-            if key in row and pd.notna(row[key]) and str(row[key]).strip() != '':
-                return str(row[key]).strip()
-        return default
-    
-    def safe_get_int(row, keys, default=None):
-        for key in keys:
-            if key in row and pd.notna(row[key]):
-                try:
-                    return int(float(row[key]))
-                except:
-                    continue
-        return default
-    
-    # Extract basic player data
-    player_id = safe_get(row, ['player_id', 'sofifa_id', 'id'], f'player_{idx}')
-    player_name = safe_get(row, ['short_name', 'long_name', 'player_name', 'name'], 'Unknown')
-    positions = safe_get(row, ['player_positions', 'position', 'positions'], '')
-    club_name = safe_get(row, ['club_name', 'team_name', 'club'], '')
-    age = safe_get_int(row, ['age'], None)
-    nationality = safe_get(row, ['nationality_name', 'nationality', 'nation'], '')
-    overall_rating = safe_get_int(row, ['overall', 'overall_rating', 'rating'], None)
-    potential = safe_get_int(row, ['potential', 'potential_rating'], None)
-    
-    # Extract and clean value
-    value_eur = None
-    raw_value = safe_get(row, ['value', 'market_value', 'value_eur'], None)
-    if raw_value:
-        cleaned_value = clean_value(raw_value)
-        if cleaned_value is not None:
-            value_eur = cleaned_value
-            value_stats['cleaned'] += 1
-        else:
-            value_stats['failed'] += 1
-    
-    # Extract and clean wage
-    wage_eur = None
-    raw_wage = safe_get(row, ['wage', 'salary', 'wage_eur'], None)
-    if raw_wage:
-        cleaned_wage = clean_wage(raw_wage)
-        if cleaned_wage is not None:
-            wage_eur = cleaned_wage
-    
-    return {
-        'player_id': player_id,
-        'player_name': player_name,
-        'positions': positions,
-        'club_name': club_name,
-        'age': age,
-        'nationality': nationality,
-        'overall_rating': overall_rating,
-        'potential': potential,
-        'value_eur': value_eur,
-        'wage_eur': wage_eur
-    }
-
 def verify_data_with_values(conn):
     """Verify that data was loaded correctly with value statistics"""
     print("\n🔍 Verifying data loading with values...")
@@ -0,0 +1,92 @@
+"""
+Aggregated inventory for Match Simulator App
+user_inventory holds one row per (user_id, item_name) with the running
+quantity, so a grant is an upsert instead of another row and giving an item
+to every user is a single INSERT ... SELECT. Each grant is logged once in
+item_grants: one row per recipient, or one row for a give-to-all
+"""
+
+from database import run_write
+
+UPSERT_ITEM_SQL = '''
+    ON CONFLICT (user_id, item_name) DO UPDATE SET
+        quantity = quantity + excluded.quantity,
+        received_at = CURRENT_TIMESTAMP
+'''
+
+def aggregate_user_inventory(conn):
+    """Collapse user_inventory to one row per user and item, keeping the rows as grant history"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS item_grants (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            item_name TEXT NOT NULL,
+            quantity INTEGER NOT NULL,
+            recipients INTEGER NOT NULL DEFAULT 1,
+            granted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+    conn.execute('''
+        INSERT INTO item_grants (user_id, item_name, quantity, granted_at)
+        SELECT user_id, item_name, IFNULL(quantity, 1), received_at
+        FROM user_inventory
+        WHERE user_id IS NOT NULL AND IFNULL(item_name, '') != ''
+        ORDER BY id
+    ''')
+
+    conn.execute('''
+        CREATE TABLE user_inventory_aggregated (
+            user_id INTEGER NOT NULL,
+            item_name TEXT NOT NULL,
+            quantity INTEGER NOT NULL DEFAULT 0,
+            received_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_id, item_name),
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        INSERT INTO user_inventory_aggregated (user_id, item_name, quantity, received_at)
+        SELECT user_id, item_name, SUM(IFNULL(quantity, 1)), MAX(received_at)
+        FROM user_inventory
+        WHERE user_id IS NOT NULL AND IFNULL(item_name, '') != ''
+        GROUP BY user_id, item_name
+    ''')
+    conn.execute("DROP TABLE user_inventory")
+    conn.execute("ALTER TABLE user_inventory_aggregated RENAME TO user_inventory")
+
+def add_items(conn, user_ids, item_name, quantity):
+    """Add quantity of an item to each user (writer thread); returns the number of users"""
+    rows = [(int(user_id), item_name, int(quantity)) for user_id in user_ids]
+    conn.executemany(f'''
+        INSERT INTO user_inventory (user_id, item_name, quantity)
+        VALUES (?, ?, ?)
+        {UPSERT_ITEM_SQL}
+    ''', rows)
+    conn.executemany('''
+        INSERT INTO item_grants (user_id, item_name, quantity)
+        VALUES (?, ?, ?)
+    ''', rows)
+    return len(rows)
+
+def add_items_to_all(conn, item_name, quantity):
+    """Add quantity of an item to every approved user (writer thread); returns the number of users"""
+    recipients = conn.execute(f'''
+        INSERT INTO user_inventory (user_id, item_name, quantity)
+        SELECT id, ?, ? FROM users
+        WHERE status = 'approved' AND role = 'user'
+        {UPSERT_ITEM_SQL}
+    ''', (item_name, int(quantity))).rowcount
+    conn.execute('''
+        INSERT INTO item_grants (item_name, quantity, recipients)
+        VALUES (?, ?, ?)
+    ''', (item_name, int(quantity), recipients))
+    return recipients
+
+def give_items(user_ids, item_name, quantity):
+    """Give an item to the given users in one transaction"""
+    return run_write(add_items, list(user_ids), item_name, quantity)
+
+def give_items_to_all(item_name, quantity):
+    """Give an item to every approved user in one transaction"""
+    return run_write(add_items_to_all, item_name, quantity)
@@ -0,0 +1,271 @@
+"""
+Cash ledger for Match Simulator App
+Every change to users.cash is posted as a double-entry transaction: the
+user entries and a balancing treasury entry sum to zero, and each user entry
+carries the balance it left behind. A user's history or point-in-time
+balance is one range scan on (user_id, ...), and periodic checkpoints let
+reconciliation against users.cash sum only the entries since the last one
+"""
+
+import json
+import numbers
+from database import run_write
+
+TREASURY = 'treasury'
+
+# Entry kinds
+OPENING = 'opening'
+STARTING_CASH = 'starting_cash'
+GRANT = 'grant'
+ADJUSTMENT = 'adjustment'
+TRANSFER = 'transfer'
+
+# Cash is REAL, so balances within half a cent count as equal
+TOLERANCE = 0.005
+
+# Entries allowed to pile up after the last checkpoint before post_cash writes one
+CHECKPOINT_EVERY = 1000
+
+def create_cash_ledger(conn):
+    """Add the append-only cash ledger and open it with the current balances"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS cash_ledger (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            txn_id INTEGER NOT NULL,
+            user_id INTEGER,
+            account TEXT NOT NULL DEFAULT 'cash',
+            amount REAL NOT NULL,
+            balance_after REAL,
+            kind TEXT NOT NULL,
+            reference TEXT,
+            memo TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_cash_ledger_user
+        ON cash_ledger (user_id, id)
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_cash_ledger_user_time
+        ON cash_ledger (user_id, created_at)
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_cash_ledger_txn
+        ON cash_ledger (txn_id)
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS cash_ledger_append_only
+        BEFORE UPDATE ON cash_ledger BEGIN
+            SELECT RAISE(ABORT, 'cash_ledger is append-only');
+        END
+    ''')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS ledger_checkpoints (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            entry_id INTEGER NOT NULL,
+            balance REAL NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_ledger_checkpoints_user
+        ON ledger_checkpoints (user_id, entry_id)
+    ''')
+
+    # Existing balances become one opening transaction against the treasury
+    if conn.execute("SELECT COUNT(*) FROM cash_ledger").fetchone()[0] == 0:
+        conn.execute('''
+            INSERT INTO cash_ledger (txn_id, user_id, amount, balance_after, kind, memo)
+            SELECT 1, id, cash, cash, ?, 'Opening balance'
+            FROM users WHERE IFNULL(cash, 0) != 0
+            ORDER BY id
+        ''', (OPENING,))
+        conn.execute('''
+            INSERT INTO cash_ledger (txn_id, account, amount, kind, memo)
+            SELECT txn_id, ?, -SUM(amount), ?, 'Opening balance'
+            FROM cash_ledger WHERE txn_id = 1 GROUP BY txn_id
+        ''', (TREASURY, OPENING))
+
+def index_checkpoint_entries(conn):
+    """Index checkpoints by entry so the latest checkpointed entry is one seek"""
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_ledger_checkpoints_entry
+        ON ledger_checkpoints (entry_id)
+    ''')
+
+def next_txn_id(conn):
+    return conn.execute("SELECT IFNULL(MAX(txn_id), 0) + 1 FROM cash_ledger").fetchone()[0]
+
+def post_cash(conn, kind, amounts, reference=None, memo=None):
+    """Move cash for (user_id, amount) pairs as one ledger transaction (writer thread)
+
+    One UPDATE ... FROM applies every amount and one INSERT ... SELECT writes
+    the entries, however many users are paid; amounts for the same user are
+    added up. Whatever does not net to zero is booked against the treasury.
+    Users that no longer exist are skipped, and a checkpoint is written once
+    CHECKPOINT_EVERY entries have built up since the last one.
+    Returns {user_id: new balance} for the users whose cash changed.
+    """
+    payload = json.dumps([[int(user_id), float(amount)] for user_id, amount in amounts if amount])
+    payouts = '''
+        SELECT json_extract(value, '$[0]') AS user_id, SUM(json_extract(value, '$[1]')) AS amount
+        FROM json_each(?)
+        GROUP BY 1
+        HAVING SUM(json_extract(value, '$[1]')) != 0
+    '''
+
+    balances = dict(conn.execute(f'''
+        UPDATE users SET cash = IFNULL(users.cash, 0) + p.amount
+        FROM ({payouts}) p
+        WHERE users.id = p.user_id
+        RETURNING users.id, users.cash
+    ''', (payload,)).fetchall())
+    if not balances:
+        return balances
+
+    txn_id = next_txn_id(conn)
+    conn.execute(f'''
+        INSERT INTO cash_ledger (txn_id, user_id, amount, balance_after, kind, reference, memo)
+        SELECT ?, u.id, p.amount, u.cash, ?, ?, ?
+        FROM ({payouts}) p
+        JOIN users u ON u.id = p.user_id
+        ORDER BY u.id
+    ''', (txn_id, kind, reference, memo, payload))
+    conn.execute('''
+        INSERT INTO cash_ledger (txn_id, account, amount, kind, reference, memo)
+        SELECT txn_id, ?, -SUM(amount), ?, ?, ?
+        FROM cash_ledger WHERE txn_id = ?
+        GROUP BY txn_id
+        HAVING ABS(SUM(amount)) > ?
+    ''', (TREASURY, kind, reference, memo, txn_id, TOLERANCE))
+    checkpoint_if_due(conn)
+    return balances
+
+def set_cash(conn, user_id, balance, kind=ADJUSTMENT, reference=None, memo=None):
+    """Post whatever change brings a user's cash to the given balance (writer thread)"""
+    row = conn.execute("SELECT IFNULL(cash, 0) FROM users WHERE id = ?", (user_id,)).fetchone()
+    if row is None:
+        return {}
+    return post_cash(conn, kind, [(user_id, balance - row[0])], reference, memo)
+
+def distribute_cash(user_ids, amounts, kind=GRANT, reference=None, memo=None):
+    """Pay many users in one write transaction and return their new balances
+
+    amounts is either one amount for every user or one amount per user id.
+    """
+    user_ids = list(user_ids)
+    if isinstance(amounts, numbers.Real):
+        amounts = [amounts] * len(user_ids)
+    return run_write(post_cash, kind, list(zip(user_ids, amounts)), reference, memo)
+
+def adjust_cash(user_id, amount, kind=ADJUSTMENT, reference=None, memo=None):
+    """Add (or with a negative amount remove) cash for one user"""
+    return run_write(post_cash, kind, [(int(user_id), amount)], reference, memo)
+
+def set_user_cash(user_id, balance, kind=ADJUSTMENT, reference=None, memo=None):
+    """Set one user's cash to an exact balance"""
+    return run_write(set_cash, int(user_id), balance, kind, reference, memo)
+
+def balance_history(conn, user_id, limit=50):
+    """A user's latest ledger entries, newest first"""
+    return conn.execute('''
+        SELECT id, txn_id, amount, balance_after, kind, reference, memo, created_at
+        FROM cash_ledger
+        WHERE user_id = ?
+        ORDER BY id DESC
+        LIMIT ?
+    ''', (user_id, limit)).fetchall()
+
+def balance_at(conn, user_id, when):
+    """A user's cash as of a timestamp ('YYYY-MM-DD HH:MM:SS', UTC)"""
+    row = conn.execute('''
+        SELECT balance_after FROM cash_ledger
+        WHERE user_id = ? AND created_at <= ?
+        ORDER BY created_at DESC, id DESC
+        LIMIT 1
+    ''', (user_id, when)).fetchone()
+    return row[0] if row else 0
+
+def checkpoint_ledger(conn):
+    """Checkpoint the balance of every user with entries since the last checkpoint run (writer thread)
+
+    Only entries after the previous run are read. Returns the number of
+    checkpoints written.
+    """
+    return conn.execute('''
+        INSERT INTO ledger_checkpoints (user_id, entry_id, balance)
+        SELECT e.user_id, e.entry_id, IFNULL((
+            SELECT balance FROM ledger_checkpoints
+            WHERE user_id = e.user_id ORDER BY entry_id DESC LIMIT 1
+        ), 0) + e.amount
+        FROM (
+            SELECT user_id, MAX(id) AS entry_id, SUM(amount) AS amount
+            FROM cash_ledger
+            WHERE id > (SELECT IFNULL(MAX(entry_id), 0) FROM ledger_checkpoints)
+              AND user_id IS NOT NULL
+            GROUP BY user_id
+        ) e
+    ''').rowcount
+
+def checkpoint_if_due(conn):
+    """Checkpoint once CHECKPOINT_EVERY entries follow the last checkpoint (writer thread)"""
+    backlog = conn.execute('''
+        SELECT IFNULL((SELECT MAX(id) FROM cash_ledger), 0)
+             - IFNULL((SELECT MAX(entry_id) FROM ledger_checkpoints), 0)
+    ''').fetchone()[0]
+    return checkpoint_ledger(conn) if backlog >= CHECKPOINT_EVERY else 0
+
+def write_checkpoints():
+    """Checkpoint the ledger now; bootstrap does it at startup and post_cash when due"""
+    return run_write(checkpoint_ledger)
+
+def reconcile_ledger(conn):
+    """Users whose cash differs from their ledger balance
+
+    The ledger balance is the last checkpoint plus the entries after it, so
+    this reads one checkpoint and a short entry range per user.
+    Returns (user_id, username, cash, ledger_balance) rows.
+    """
+    return conn.execute('''
+        SELECT id, username, cash, ledger_balance FROM (
+            SELECT u.id, u.username, IFNULL(u.cash, 0) AS cash,
+                   IFNULL(c.balance, 0) + IFNULL((
+                       SELECT SUM(e.amount) FROM cash_ledger e
+                       WHERE e.user_id = u.id AND e.id > IFNULL(c.entry_id, 0)
+                   ), 0) AS ledger_balance
+            FROM users u
+            LEFT JOIN ledger_checkpoints c ON c.user_id = u.id
+                AND c.entry_id = (SELECT MAX(entry_id) FROM ledger_checkpoints WHERE user_id = u.id)
+        )
+        WHERE ABS(cash - ledger_balance) > ?
+        ORDER BY id
+    ''', (TOLERANCE,)).fetchall()
+
+def unbalanced_transactions(conn):
+    """Transaction ids whose entries do not sum to zero"""
+    return [row[0] for row in conn.execute('''
+        SELECT txn_id FROM cash_ledger
+        GROUP BY txn_id
+        HAVING ABS(SUM(amount)) > ?
+    ''', (TOLERANCE,))]
+
+if __name__ == "__main__":
+    from database import get_connection
+    conn = get_connection()
+    print(f"📒 Wrote {write_checkpoints()} ledger checkpoint(s)")
+    mismatches = reconcile_ledger(conn)
+    if mismatches:
+        print(f"❌ {len(mismatches)} user(s) differ from the ledger:")
+        for user_id, username, cash, ledger_balance in mismatches:
+            print(f"  - {username} (#{user_id}): cash €{cash:,.2f}, ledger €{ledger_balance:,.2f}")
+    else:
+        print("✅ Every user's cash matches the ledger")
+    unbalanced = unbalanced_transactions(conn)
+    if unbalanced:
+        print(f"❌ Unbalanced transactions: {unbalanced}")
+    else:
+        print("✅ Every ledger transaction balances")
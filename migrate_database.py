@@ -1,92 +1,277 @@
 """
-Database migration script to add missing columns for enhanced transfer workflow
+Versioned database migrations for Match Simulator App
+Each migration runs exactly once and is recorded in the schema_version table
 """
 
+import importlib
 import sqlite3
-import os
-
-def migrate_database():
-    """Add missing columns to transfer_bids table"""
-    
-    if not os.path.exists('match_simulator.db'):
-        print("❌ Database not found! Please run the app first to create the database.")
-        return
-    
-    conn = sqlite3.connect('match_simulator.db')
+from database import DB_PATH, get_connection, run_write
+
+def create_base_tables(conn):
+    """Create the original application tables"""
     cursor = conn.cursor()
-    
+
+    # Users table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            role TEXT NOT NULL,
+            email TEXT,
+            club_name TEXT,
+            cash REAL DEFAULT 0,
+            status TEXT DEFAULT 'pending',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Email history table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS email_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            subject TEXT NOT NULL,
+            message TEXT NOT NULL,
+            sent_by TEXT NOT NULL,
+            recipients_count INTEGER NOT NULL,
+            sent_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Players table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS players (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            player_id TEXT UNIQUE,
+            player_name TEXT NOT NULL,
+            positions TEXT,
+            club_name TEXT,
+            age INTEGER,
+            nationality TEXT,
+            overall_rating INTEGER,
+            potential INTEGER,
+            value_eur REAL,
+            wage_eur REAL,
+            is_custom BOOLEAN DEFAULT FALSE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Squad uploads table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS squad_uploads (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            image_data BLOB,
+            description TEXT,
+            status TEXT DEFAULT 'pending',
+            uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            approved_at TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+
+    # Transfer bids table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS transfer_bids (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            player_id TEXT,
+            bid_amount REAL,
+            description TEXT,
+            status TEXT DEFAULT 'pending',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            approved_at TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+
+    # Items/inventory table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS user_inventory (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            item_name TEXT,
+            quantity INTEGER DEFAULT 1,
+            received_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+
+def add_transfer_response_dates(conn):
+    """Add seller/admin response date columns for the enhanced transfer workflow"""
+    columns = [column[1] for column in conn.execute("PRAGMA table_info(transfer_bids)")]
+
+    if 'seller_response_date' not in columns:
+        conn.execute('''
+            ALTER TABLE transfer_bids
+            ADD COLUMN seller_response_date TEXT
+        ''')
+
+    if 'admin_response_date' not in columns:
+        conn.execute('''
+            ALTER TABLE transfer_bids
+            ADD COLUMN admin_response_date TEXT
+        ''')
+
+def add_performance_indexes(conn):
+    """Index the club filters, bid status scans and per-user bid lookups"""
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_players_club_rating
+        ON players (club_name, overall_rating DESC)
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_transfer_bids_status_created
+        ON transfer_bids (status, created_at)
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_transfer_bids_user_created
+        ON transfer_bids (user_id, created_at)
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_transfer_bids_player
+        ON transfer_bids (player_id)
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_users_club
+        ON users (club_name)
+    ''')
+    conn.execute("ANALYZE")
+
+def add_player_source_hash(conn):
+    """Add the CSV content fingerprint used by the delta player sync"""
+    columns = [column[1] for column in conn.execute("PRAGMA table_info(players)")]
+
+    if 'source_hash' not in columns:
+        conn.execute('''
+            ALTER TABLE players
+            ADD COLUMN source_hash INTEGER
+        ''')
+
+def create_bootstrap_log(conn):
+    """Add the log of completed per-process bootstraps"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS bootstrap_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            schema_version INTEGER NOT NULL,
+            data_checksum TEXT,
+            player_count INTEGER,
+            players_imported BOOLEAN DEFAULT FALSE,
+            completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+# (version, description, migration) - append new migrations, never reorder.
+# Feature-module migrations are named 'module.function' and imported only when pending
+MIGRATIONS = [
+    (1, "Create base tables", create_base_tables),
+    (2, "Add transfer response dates", add_transfer_response_dates),
+    (3, "Add performance indexes", add_performance_indexes),
+    (4, "Add full-text player search", 'player_search.create_search_index'),
+    (5, "Add normalized player positions", 'positions.create_position_index'),
+    (6, "Add keyset pagination index", 'pagination.create_seek_index'),
+    (7, "Add trigger-maintained club stats", 'clubs.create_club_stats'),
+    (8, "Add club directory version counter", 'clubs.create_club_directory_version'),
+    (9, "Move squad images to the image store", 'image_store.move_squad_images_to_store'),
+    (10, "Add player CSV fingerprints", add_player_source_hash),
+    (11, "Add bootstrap log", create_bootstrap_log),
+    (12, "Add user row versions", 'user_profiles.create_user_row_versions'),
+    (13, "Add idempotent transfer settlements", 'transfers.create_transfer_settlements'),
+    (14, "Add double-entry cash ledger", 'ledger.create_cash_ledger'),
+    (15, "Aggregate user inventory", 'inventory.aggregate_user_inventory'),
+    (16, "Record the accepting club on transfer bids", 'transfers.add_bid_seller_club'),
+    (17, "Index ledger checkpoints by entry", 'ledger.index_checkpoint_entries'),
+]
+
+def ensure_version_table(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+def get_schema_version(conn=None):
+    """Return the highest applied migration version (0 for a fresh database)"""
+    conn = conn or get_connection()
     try:
-        # Check if columns already exist
-        cursor.execute("PRAGMA table_info(transfer_bids)")
-        columns = [column[1] for column in cursor.fetchall()]
-        
-        print(f"📊 Current transfer_bids columns: {columns}")
-        
-        # Add seller_response_date column if it doesn't exist
-        if 'seller_response_date' not in columns:
-            cursor.execute('''
-                ALTER TABLE transfer_bids 
-                ADD COLUMN seller_response_date TEXT
-            ''')
-            print("✅ Added seller_response_date column")
-        else:
-            print("✅ seller_response_date column already exists")
-        
-        # Add admin_response_date column if it doesn't exist
-        if 'admin_response_date' not in columns:
-            cursor.execute('''
-                ALTER TABLE transfer_bids 
-                ADD COLUMN admin_response_date TEXT
-            ''')
-            print("✅ Added admin_response_date column")
-        else:
-            print("✅ admin_response_date column already exists")
-        
-        # Update status column to handle new statuses if needed
-        cursor.execute("SELECT DISTINCT status FROM transfer_bids")
-        statuses = [row[0] for row in cursor.fetchall()]
-        print(f"📊 Current transfer statuses: {statuses}")
-        
-        conn.commit()
-        print("🎉 Database migration completed successfully!")
-        
-        # Show updated table structure
-        cursor.execute("PRAGMA table_info(transfer_bids)")
-        columns_info = cursor.fetchall()
-        print("\n📋 Updated transfer_bids table structure:")
-        for col in columns_info:
-            print(f"  - {col[1]} ({col[2]})")
-        
-    except Exception as e:
-        print(f"❌ Migration error: {e}")
-        conn.rollback()
-    
+        version = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()[0]
+    except Exception:
+        return 0
+    return version or 0
+
+def resolve_migration(migration):
+    """Import a 'module.function' migration; callables are returned as they are"""
+    if callable(migration):
+        return migration
+    module_name, function_name = migration.rsplit('.', 1)
+    return getattr(importlib.import_module(module_name), function_name)
+
+def apply_migration(conn, version, description, migration):
+    """Apply one migration unless another process already did (writer thread)"""
+    ensure_version_table(conn)
+    if get_schema_version(conn) >= version:
+        return False
+    migration(conn)
+    conn.execute('''
+        INSERT INTO schema_version (version, description)
+        VALUES (?, ?)
+    ''', (version, description))
+    return True
+
+def run_migrations(verbose=False):
+    """Apply all pending migrations in order and return the resulting version"""
+    current = get_schema_version()
+
+    for version, description, migration in MIGRATIONS:
+        if version <= current:
+            continue
+        if run_write(apply_migration, version, description, resolve_migration(migration)) and verbose:
+            print(f"✅ Applied migration {version}: {description}")
+
+    return get_schema_version()
+
+def compact_database():
+    """Rebuild the database file so space freed by migrations goes back to the disk"""
+    conn = sqlite3.connect(DB_PATH, isolation_level=None)
+    try:
+        conn.execute("VACUUM")
     finally:
         conn.close()
 
 def verify_migration():
     """Verify that the migration was successful"""
-    
-    conn = sqlite3.connect('match_simulator.db')
+
+    conn = get_connection()
     cursor = conn.cursor()
-    
+
     try:
         # Test the new columns
         cursor.execute('''
-            SELECT id, status, seller_response_date, admin_response_date 
-            FROM transfer_bids 
+            SELECT id, status, seller_response_date, admin_response_date
+            FROM transfer_bids
             LIMIT 1
         ''')
         print("✅ Migration verification successful - new columns are accessible")
-        
+
+        cursor.execute("SELECT version, description, applied_at FROM schema_version ORDER BY version")
+        print("\n📋 Applied migrations:")
+        for version, description, applied_at in cursor.fetchall():
+            print(f"  - {version}: {description} ({applied_at})")
+
     except Exception as e:
         print(f"❌ Migration verification failed: {e}")
-    
-    finally:
-        conn.close()
 
 if __name__ == "__main__":
     print("🔧 Starting database migration...")
-    migrate_database()
+    print(f"📊 Current schema version: {get_schema_version()}")
+    try:
+        version = run_migrations(verbose=True)
+        print(f"🎉 Database is at schema version {version}")
+        compact_database()
+        print("🗜️ Database file compacted")
+    except Exception as e:
+        print(f"❌ Migration error: {e}")
     verify_migration()
     print("✅ Migration complete!")
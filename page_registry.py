@@ -0,0 +1,101 @@
+"""
+Page registry for Match Simulator App
+Maps each page key to the module and function that render it. A module is
+imported the first time one of its pages is opened, so a welcome or login
+render never loads the admin or transfer pages. Import and render timings
+are kept for the startup report
+"""
+
+import importlib
+import subprocess
+import sys
+import time
+
+# Page key -> (module, function, needs_login)
+PAGES = {
+    'welcome': ('public_pages', 'show_welcome_page', False),
+    'signup': ('public_pages', 'show_signup_page', False),
+    'login': ('public_pages', 'show_login_page', False),
+    'admin_home': ('pages', 'show_admin_home', True),
+    'manage_users': ('pages', 'show_manage_users', True),
+    'distribute_items': ('pages', 'show_distribute_items', True),
+    'manage_transfers': ('pages', 'show_manage_transfers', True),
+    'transfer_logs': ('pages', 'show_transfer_logs', True),
+    'add_players': ('pages', 'show_add_players', True),
+    'user_squads': ('pages', 'show_user_squads', True),
+    'send_email': ('email_pages', 'show_send_email', True),
+    'user_home': ('user_pages', 'show_user_home', True),
+    'search_players': ('user_pages', 'show_search_players', True),
+    'check_squad': ('user_pages', 'show_check_squad', True),
+    'upload_squad': ('user_pages', 'show_upload_squad', True),
+    'transfer_bid': ('user_pages', 'show_transfer_bid', True),
+    'balance_inventory': ('user_pages', 'show_balance_inventory', True),
+}
+
+PROCESS_STARTED = time.perf_counter()
+
+# Per-process timings: startup phases of the first run, then module imports
+_startup = {}
+_module_imports = {}
+
+def get_page_handler(page):
+    """Import the page's module if needed and return its render function"""
+    module_name, function_name, _ = PAGES[page]
+    if module_name not in sys.modules:
+        started = time.perf_counter()
+        importlib.import_module(module_name)
+        _module_imports[module_name] = time.perf_counter() - started
+    return getattr(sys.modules[module_name], function_name)
+
+def render_page(page, authenticated):
+    """Render a page; unknown pages and login-only pages for guests render nothing"""
+    entry = PAGES.get(page)
+    if entry is None or (entry[2] and not authenticated):
+        return False
+    get_page_handler(page)()
+    return True
+
+def record_startup(phase, seconds):
+    """Record a startup phase the first time it runs in this process
+
+    Returns True if this call recorded it.
+    """
+    if phase in _startup:
+        return False
+    _startup[phase] = seconds
+    return True
+
+def startup_report():
+    """Startup phase timings plus the cost of each lazily imported page module"""
+    return {
+        'phases': dict(_startup),
+        'page_imports': dict(_module_imports),
+    }
+
+def print_startup_report():
+    report = startup_report()
+    phases = ', '.join(f"{phase} {seconds * 1000:.0f}ms" for phase, seconds in report['phases'].items())
+    print(f"⏱️ Startup: {phases}")
+    for module_name, seconds in report['page_imports'].items():
+        print(f"   📦 {module_name} imported on first visit in {seconds * 1000:.0f}ms")
+
+def measure_cold_imports(module_names):
+    """Import time of each module in a fresh interpreter, in seconds"""
+    timings = {}
+    for module_name in module_names:
+        result = subprocess.run(
+            [sys.executable, '-c',
+             f"import time; t = time.perf_counter(); import {module_name}; print(time.perf_counter() - t)"],
+            capture_output=True, text=True,
+        )
+        timings[module_name] = float(result.stdout.strip().splitlines()[-1]) if result.returncode == 0 else None
+    return timings
+
+if __name__ == "__main__":
+    print("⏱️ Cold import time per page module (fresh interpreter each)")
+    modules = ['streamlit', 'pandas', 'PIL.Image', 'ui_components'] + sorted({entry[0] for entry in PAGES.values()})
+    for module_name, seconds in measure_cold_imports(modules).items():
+        if seconds is None:
+            print(f"  ❌ {module_name}: import failed")
+        else:
+            print(f"  📦 {module_name}: {seconds * 1000:.0f}ms")
@@ -1,80 +1,21 @@
 import streamlit as st
 import pandas as pd
 import sqlite3
-from datetime import datetime
-import base64
-from PIL import Image
-import io
-from ui_components import display_tab_background, display_enhanced_table, display_player_stats_card
-
-def show_signup_page():
-    st.title("📝 Sign Up")
-    
-    col1, col2, col3 = st.columns([1, 2, 1])
-    
-    with col2:
-        with st.form("signup_form"):
-            st.subheader("Create New Account")
-            
-            username = st.text_input("Username")
-            email = st.text_input("Email")
-            password = st.text_input("Password", type="password")
-            confirm_password = st.text_input("Confirm Password", type="password")
-            role = st.selectbox("Role", ["user", "admin"])
-            
-            # Show admin code input only if admin role is selected
-            admin_code = ""
-            if role == "admin":
-                admin_code = st.text_input("Admin Code", type="password", help="Contact system administrator for the admin code")
-            
-            submitted = st.form_submit_button("Sign Up")
-            
-            if submitted:
-                if not username or not password:
-                    st.error("Username and password are required!")
-                elif password != confirm_password:
-                    st.error("Passwords don't match!")
-                elif role == "admin" and admin_code != "2110":
-                    st.error("Invalid admin code. Please enter the correct admin code.")
-                else:
-                    from app import create_user
-                    if create_user(username, password, role, email):
-                        st.success("Account created successfully! Please login.")
-                        st.session_state.page = 'login'
-                        st.rerun()
-                    else:
-                        st.error("Username already exists!")
-
-def show_login_page():
-    st.title("🔐 Login")
-    
-    col1, col2, col3 = st.columns([1, 2, 1])
-    
-    with col2:
-        with st.form("login_form"):
-            st.subheader("Login to Your Account")
-            
-            username = st.text_input("Username")
-            password = st.text_input("Password", type="password")
-            
-            submitted = st.form_submit_button("Login")
-            
-            if submitted:
-                from app import authenticate_user
-                user = authenticate_user(username, password)
-                if user:
-                    st.session_state.authenticated = True
-                    st.session_state.user = user
-                    st.success(f"Welcome back, {user['username']}!")
-                    st.rerun()
-                else:
-                    st.error("Invalid username or password!")
+from database import get_connection, run_write, execute_write
+from player_search import search_join, SEARCH_RANK, quick_search
+from positions import position_clause, sync_player_positions
+from pagination import player_page, page_number, show_page_controls
+from clubs import get_club_names
+from ledger import post_cash, set_cash, distribute_cash, adjust_cash, set_user_cash, reconcile_ledger, GRANT, STARTING_CASH
+from inventory import give_items, give_items_to_all
+from transfers import settle_transfer, approve_transfers, outcome_summary, reject_transfer, SETTLED, ALREADY_SETTLED, INSUFFICIENT_FUNDS, NO_BUYER_CLUB, PLAYER_NOT_FOUND, PLAYER_CONFLICT
+from ui_components import display_tab_background, display_enhanced_table, display_squad_image
 
 def show_manage_users():
     # Add background image for admin tab
     display_tab_background('admin', 'User Management')
     
-    conn = sqlite3.connect('match_simulator.db')
+    conn = get_connection()
     
     # Get all users
     users_df = pd.read_sql_query('''
@@ -85,7 +26,6 @@ def show_manage_users():
     
     if users_df.empty:
         st.info("No users found.")
-        conn.close()
         return
     
     # Pending users section
@@ -105,15 +45,8 @@ def show_manage_users():
                 with col2:
                     if user['role'] == 'user':
                         # Get available clubs
-                        clubs_df = pd.read_sql_query('''
-                            SELECT DISTINCT club_name 
-                            FROM players 
-                            WHERE club_name IS NOT NULL AND club_name != ''
-                            ORDER BY club_name
-                        ''', conn)
-                        
                         club_name = st.selectbox(f"Assign Club to {user['username']}", 
-                                               clubs_df['club_name'].tolist(), 
+                                               get_club_names(conn), 
                                                key=f"club_{user['id']}")
                         starting_cash = st.number_input(f"Starting Cash for {user['username']}", 
                                                       value=100000000, step=1000000,
@@ -123,29 +56,26 @@ def show_manage_users():
                     with col_a:
                         if st.button("✅ Approve", key=f"approve_{user['id']}"):
                             if user['role'] == 'user':
-                                cursor = conn.cursor()
-                                cursor.execute('''
-                                    UPDATE users 
-                                    SET status = 'approved', club_name = ?, cash = ?
-                                    WHERE id = ?
-                                ''', (club_name, starting_cash, user['id']))
-                                conn.commit()
+                                def approve_with_cash(conn, user_id):
+                                    conn.execute('''
+                                        UPDATE users 
+                                        SET status = 'approved', club_name = ?
+                                        WHERE id = ?
+                                    ''', (club_name, user_id))
+                                    set_cash(conn, user_id, starting_cash, STARTING_CASH)
+                                run_write(approve_with_cash, int(user['id']))
                             else:
-                                cursor = conn.cursor()
-                                cursor.execute('''
+                                execute_write('''
                                     UPDATE users 
                                     SET status = 'approved'
                                     WHERE id = ?
                                 ''', (user['id'],))
-                                conn.commit()
                             st.success(f"User {user['username']} approved!")
                             st.rerun()
                     
                     with col_b:
                         if st.button("❌ Reject", key=f"reject_{user['id']}"):
-                            cursor = conn.cursor()
-                            cursor.execute('DELETE FROM users WHERE id = ?', (user['id'],))
-                            conn.commit()
+                            execute_write('DELETE FROM users WHERE id = ?', (user['id'],))
                             st.success(f"User {user['username']} rejected!")
                             st.rerun()
     else:
@@ -154,13 +84,11 @@ def show_manage_users():
     # All users section with enhanced table
     st.subheader("All Users")
     display_enhanced_table(users_df, "User Database")
-    
-    conn.close()
 
 def show_distribute_items():
     st.title("💰 Distribute Items & Cash")
     
-    conn = sqlite3.connect('match_simulator.db')
+    conn = get_connection()
     
     # Get approved users
     users_df = pd.read_sql_query('''
@@ -172,9 +100,14 @@ def show_distribute_items():
     
     if users_df.empty:
         st.info("No approved users found.")
-        conn.close()
         return
     
+    # Every cash change below is posted to the ledger; flag any drift from it
+    mismatches = reconcile_ledger(conn)
+    if mismatches:
+        with st.expander(f"⚠️ {len(mismatches)} user(s) differ from the cash ledger"):
+            st.dataframe(pd.DataFrame(mismatches, columns=['id', 'username', 'cash', 'ledger_balance']), use_container_width=True)
+    
     tab1, tab2, tab3 = st.tabs(["💰 Distribute Cash", "🎁 Distribute Items", "👤 Manage Individual Users"])
     
     with tab1:
@@ -186,20 +119,14 @@ def show_distribute_items():
             st.markdown("### 📤 To Selected Users")
             with st.form("distribute_cash_selected"):
                 selected_users = st.multiselect("Select Users", 
-                                              users_df['username'].tolist())
+                                              users_df['id'].tolist(),
+                                              format_func=dict(zip(users_df['id'], users_df['username'])).get)
                 cash_amount = st.number_input("Cash Amount (€)", value=1000000, step=100000, key="cash_selected")
                 reason = st.text_input("Reason", key="reason_selected")
                 
                 if st.form_submit_button("Distribute to Selected"):
                     if selected_users and cash_amount > 0:
-                        cursor = conn.cursor()
-                        for username in selected_users:
-                            cursor.execute('''
-                                UPDATE users 
-                                SET cash = cash + ?
-                                WHERE username = ?
-                            ''', (cash_amount, username))
-                        conn.commit()
+                        distribute_cash(selected_users, cash_amount, memo=reason or None)
                         st.success(f"Distributed €{cash_amount:,} to {len(selected_users)} users!")
                         st.rerun()
                     else:
@@ -215,19 +142,45 @@ def show_distribute_items():
                 
                 if st.form_submit_button("Distribute to ALL Users"):
                     if confirm_all and cash_amount_all > 0:
-                        cursor = conn.cursor()
-                        cursor.execute('''
-                            UPDATE users 
-                            SET cash = cash + ?
-                            WHERE status = 'approved' AND role = 'user'
-                        ''', (cash_amount_all,))
-                        conn.commit()
+                        def grant_all(conn):
+                            user_ids = [row[0] for row in conn.execute(
+                                "SELECT id FROM users WHERE status = 'approved' AND role = 'user'"
+                            )]
+                            post_cash(conn, GRANT, [(user_id, cash_amount_all) for user_id in user_ids], None, reason_all or None)
+                        run_write(grant_all)
                         st.success(f"Distributed €{cash_amount_all:,} to ALL {len(users_df)} users!")
                         st.rerun()
                     elif not confirm_all:
                         st.error("Please confirm to distribute to all users.")
                     else:
                         st.error("Please enter a valid amount.")
+        
+        # A different amount per user, paid in one transaction
+        st.markdown("### 📋 Custom Amounts")
+        with st.form("distribute_cash_custom"):
+            payout_df = st.data_editor(
+                users_df[['id', 'username', 'club_name', 'cash']].assign(amount=0.0),
+                disabled=['id', 'username', 'club_name', 'cash'],
+                hide_index=True,
+                key="cash_custom"
+            )
+            reason_custom = st.text_input("Reason", key="reason_custom")
+            
+            if st.form_submit_button("Distribute Custom Amounts"):
+                # Payouts are booked as grants, so removals go through Adjust Cash instead
+                payouts = payout_df[payout_df['amount'] > 0]
+                if (payout_df['amount'] < 0).any():
+                    st.error("Amounts must be positive - use Adjust Cash under Manage Individual Users to remove cash.")
+                elif payouts.empty:
+                    st.error("Please enter an amount for at least one user.")
+                else:
+                    balances = distribute_cash(payouts['id'], payouts['amount'].tolist(), memo=reason_custom or None)
+                    st.success(f"Distributed €{payouts['amount'].sum():,.0f} across {len(balances)} users!")
+                    st.dataframe(pd.DataFrame({
+                        'username': payouts['username'].values,
+                        'amount': payouts['amount'].values,
+                        'new_balance': [balances.get(int(user_id)) for user_id in payouts['id']],
+                    }), use_container_width=True)
     
     with tab2:
         st.subheader("Distribute Items")
@@ -245,14 +198,8 @@ def show_distribute_items():
                 
                 if st.form_submit_button("Distribute to Selected"):
                     if selected_users_items and item_name:
-                        cursor = conn.cursor()
-                        for username in selected_users_items:
-                            user_id = users_df[users_df['username'] == username]['id'].iloc[0]
-                            cursor.execute('''
-                                INSERT INTO user_inventory (user_id, item_name, quantity)
-                                VALUES (?, ?, ?)
-                            ''', (user_id, item_name, quantity))
-                        conn.commit()
+                        selected_ids = users_df[users_df['username'].isin(selected_users_items)]['id'].tolist()
+                        give_items(selected_ids, item_name, quantity)
                         st.success(f"Distributed {quantity} {item_name} to {len(selected_users_items)} users!")
                     else:
                         st.error("Please select users and enter item details.")
@@ -267,14 +214,8 @@ def show_distribute_items():
                 
                 if st.form_submit_button("Distribute to ALL Users"):
                     if confirm_all_items and item_name_all:
-                        cursor = conn.cursor()
-                        for _, user in users_df.iterrows():
-                            cursor.execute('''
-                                INSERT INTO user_inventory (user_id, item_name, quantity)
-                                VALUES (?, ?, ?)
-                            ''', (user['id'], item_name_all, quantity_all))
-                        conn.commit()
-                        st.success(f"Distributed {quantity_all} {item_name_all} to ALL {len(users_df)} users!")
+                        recipients = give_items_to_all(item_name_all, quantity_all)
+                        st.success(f"Distributed {quantity_all} {item_name_all} to ALL {recipients} users!")
                     elif not confirm_all_items:
                         st.error("Please confirm to distribute to all users.")
                     else:
@@ -297,6 +238,12 @@ def show_distribute_items():
         else:
             st.markdown(f"### Found {len(filtered_users)} users")
             
+            # One form per user is only practical for a handful; bulk payouts go through Custom Amounts
+            if len(filtered_users) > 25:
+                st.caption(f"Showing the first 25 of {len(filtered_users)} users - search to narrow down, "
+                           "or use Custom Amounts on the Distribute Cash tab for bulk payouts.")
+                filtered_users = filtered_users.head(25)
+            
             for _, user in filtered_users.iterrows():
                 with st.expander(f"👤 {user['username']} - {user['club_name']} - €{user['cash']:,.2f}"):
                     col1, col2 = st.columns(2)
@@ -314,13 +261,7 @@ def show_distribute_items():
                             )
                             
                             if st.form_submit_button("Set Cash Amount"):
-                                cursor = conn.cursor()
-                                cursor.execute('''
-                                    UPDATE users 
-                                    SET cash = ?
-                                    WHERE id = ?
-                                ''', (new_cash, user['id']))
-                                conn.commit()
+                                set_user_cash(user['id'], new_cash)
                                 st.success(f"Set {user['username']}'s cash to €{new_cash:,.2f}!")
                                 st.rerun()
                         
@@ -335,13 +276,7 @@ def show_distribute_items():
                             
                             if st.form_submit_button("Adjust Cash"):
                                 if cash_adjustment != 0:
-                                    cursor = conn.cursor()
-                                    cursor.execute('''
-                                        UPDATE users 
-                                        SET cash = cash + ?
-                                        WHERE id = ?
-                                    ''', (cash_adjustment, user['id']))
-                                    conn.commit()
+                                    adjust_cash(user['id'], cash_adjustment)
                                     action = "Added" if cash_adjustment > 0 else "Removed"
                                     st.success(f"{action} €{abs(cash_adjustment):,.2f} {('to' if cash_adjustment > 0 else 'from')} {user['username']}!")
                                     st.rerun()
@@ -363,12 +298,7 @@ def show_distribute_items():
                             
                             if st.form_submit_button("Give Item"):
                                 if item_name_individual:
-                                    cursor = conn.cursor()
-                                    cursor.execute('''
-                                        INSERT INTO user_inventory (user_id, item_name, quantity)
-                                        VALUES (?, ?, ?)
-                                    ''', (user['id'], item_name_individual, quantity_individual))
-                                    conn.commit()
+                                    give_items([user['id']], item_name_individual, quantity_individual)
                                     st.success(f"Gave {quantity_individual} {item_name_individual} to {user['username']}!")
                                 else:
                                     st.error("Please enter an item name.")
@@ -416,8 +346,6 @@ def show_distribute_items():
     display_df = users_df.copy()
     display_df['cash'] = display_df['cash'].apply(lambda x: f"€{x:,.2f}")
     st.dataframe(display_df, use_container_width=True)
-    
-    conn.close()
 
 def show_manage_transfers():
     # Add background image for transfers tab
@@ -425,7 +353,7 @@ def show_manage_transfers():
     
     st.markdown("**Transfer Workflow:** User bids → Seller accepts → Admin confirms → Transfer complete")
     
-    conn = sqlite3.connect('match_simulator.db')
+    conn = get_connection()
     
     # Create tabs for different transfer statuses
     tab1, tab2, tab3 = st.tabs(["⏳ Awaiting Admin Confirmation", "📋 All Transfer Activity", "📊 Transfer Statistics"])
@@ -434,6 +362,19 @@ def show_manage_transfers():
         st.subheader("Transfers Awaiting Admin Approval")
         st.info("These transfers have been accepted by sellers and need your final confirmation")
         
+        # Outcome report of the last bulk approval
+        batch_report = st.session_state.get('transfer_batch_report')
+        if batch_report:
+            summary = outcome_summary(batch_report)
+            st.success(f"⚡ Bulk approval: {summary.get(SETTLED, 0)} of {len(batch_report)} transfer(s) settled")
+            report_df = pd.DataFrame(batch_report).reindex(
+                columns=['bid_id', 'outcome', 'player_id', 'amount', 'from_club', 'to_club', 'winning_bid', 'current_club', 'error']
+            ).dropna(axis=1, how='all')
+            st.dataframe(report_df, use_container_width=True)
+            if st.button("Dismiss Report"):
+                del st.session_state.transfer_batch_report
+                st.rerun()
+        
         # Get seller-accepted transfers awaiting admin approval
         pending_transfers_df = pd.read_sql_query('''
             SELECT tb.*, u.username as bidder, u.club_name as bidder_club, u.cash as bidder_cash,
@@ -448,6 +389,26 @@ def show_manage_transfers():
         if not pending_transfers_df.empty:
             st.success(f"🎉 {len(pending_transfers_df)} transfer(s) awaiting your approval!")
             
+            # Bulk approval: one settlement transaction for the whole selection
+            with st.expander("⚡ Bulk Approval", expanded=False):
+                st.caption("Bids settle in order of seller acceptance: the first bid for a player wins and the rest "
+                           "for that player are rejected, and a bidder's bids draw down their cash in that order.")
+                labels = {
+                    transfer['id']: f"#{transfer['id']} {transfer['player_name']} → {transfer['bidder_club']} (€{transfer['bid_amount']:,.0f})"
+                    for _, transfer in pending_transfers_df.iterrows()
+                }
+                selected_bids = st.multiselect("Select Transfers", options=list(labels), format_func=labels.get)
+                
+                col_selected, col_all = st.columns(2)
+                with col_selected:
+                    if st.button("✅ Approve Selected", disabled=not selected_bids):
+                        st.session_state.transfer_batch_report = approve_transfers(selected_bids)
+                        st.rerun()
+                with col_all:
+                    if st.button("✅ Approve All That Pass Checks"):
+                        st.session_state.transfer_batch_report = approve_transfers()
+                        st.rerun()
+            
             for _, transfer in pending_transfers_df.iterrows():
                 # Enhanced transfer card for admin approval
                 st.markdown(f"""
@@ -495,58 +456,27 @@ def show_manage_transfers():
                 
                 with col_confirm:
                     if st.button(f"✅ Approve Transfer", key=f"approve_{transfer['id']}", type="primary"):
-                        if transfer['bidder_cash'] >= transfer['bid_amount']:
-                            cursor = conn.cursor()
-                            
-                            # Transfer player to new club
-                            cursor.execute('''
-                                UPDATE players 
-                                SET club_name = ?
-                                WHERE player_id = ?
-                            ''', (transfer['bidder_club'], transfer['player_id']))
-                            
-                            # Deduct money from bidder
-                            cursor.execute('''
-                                UPDATE users 
-                                SET cash = cash - ?
-                                WHERE id = ?
-                            ''', (transfer['bid_amount'], transfer['user_id']))
-                            
-                            # Add money to seller
-                            cursor.execute('''
-                                SELECT id FROM users WHERE club_name = ?
-                            ''', (transfer['current_club'],))
-                            seller_result = cursor.fetchone()
-                            if seller_result:
-                                cursor.execute('''
-                                    UPDATE users 
-                                    SET cash = cash + ?
-                                    WHERE id = ?
-                                ''', (transfer['bid_amount'], seller_result[0]))
-                            
-                            # Update transfer status
-                            cursor.execute('''
-                                UPDATE transfer_bids 
-                                SET status = 'approved', approved_at = CURRENT_TIMESTAMP
-                                WHERE id = ?
-                            ''', (transfer['id'],))
-                            
-                            conn.commit()
-                            st.success(f"✅ Transfer approved! {transfer['player_name']} is now at {transfer['bidder_club']}")
+                        # Balance and status are re-checked inside the settlement transaction
+                        result = settle_transfer(transfer['id'])
+                        if result['outcome'] in (SETTLED, ALREADY_SETTLED):
+                            st.success(f"✅ Transfer approved! {transfer['player_name']} is now at {result['to_club']}")
                             st.rerun()
-                        else:
+                        elif result['outcome'] == INSUFFICIENT_FUNDS:
                             st.error("❌ Bidder doesn't have enough cash!")
+                        elif result['outcome'] == NO_BUYER_CLUB:
+                            st.error("❌ Bidder has no club to receive the player!")
+                        elif result['outcome'] == PLAYER_NOT_FOUND:
+                            st.error("❌ This player no longer exists!")
+                        elif result['outcome'] == PLAYER_CONFLICT:
+                            st.error(f"❌ {transfer['player_name']} has moved to {result['current_club']} since the seller accepted, so the bid was rejected!")
+                        else:
+                            st.warning("⚠️ This transfer is no longer awaiting approval.")
+                            st.rerun()
                 
                 with col_reject:
                     if st.button(f"❌ Reject Transfer", key=f"reject_{transfer['id']}"):
-                        cursor = conn.cursor()
-                        cursor.execute('''
-                            UPDATE transfer_bids 
-                            SET status = 'rejected', approved_at = CURRENT_TIMESTAMP
-                            WHERE id = ?
-                        ''', (transfer['id'],))
-                        conn.commit()
-                        st.success(f"❌ Transfer rejected!")
+                        if reject_transfer(transfer['id']):
+                            st.success(f"❌ Transfer rejected!")
                         st.rerun()
                 
                 with col_info:
@@ -596,13 +526,11 @@ def show_manage_transfers():
         
         with col4:
             st.metric("Rejected", rejected_transfers)
-    
-    conn.close()
 
 def show_transfer_logs():
     st.title("📊 Transfer Logs")
     
-    conn = sqlite3.connect('match_simulator.db')
+    conn = get_connection()
     
     # Get all transfer bids with status
     logs_df = pd.read_sql_query('''
@@ -616,7 +544,6 @@ def show_transfer_logs():
     
     if logs_df.empty:
         st.info("No transfer logs found.")
-        conn.close()
         return
     
     # Filter options
@@ -667,21 +594,15 @@ def show_transfer_logs():
     with col4:
         rejected_bids = len(logs_df[logs_df['status'] == 'rejected'])
         st.metric("Rejected", rejected_bids)
-    
-    conn.close()
 
 def show_add_players():
     st.title("➕ Add Custom Players")
     
-    conn = sqlite3.connect('match_simulator.db')
+    conn = get_connection()
     
-    # Load unique club names from CSV
-    try:
-        clubs_df = pd.read_csv('player-data-full.csv', usecols=['club_name'])
-        unique_clubs = [''] + sorted(clubs_df['club_name'].dropna().unique().tolist())
-    except Exception as e:
-        st.error(f"Error loading club data: {e}")
-        unique_clubs = []
+    # Club names from the cached club directory
+    club_names = get_club_names(conn)
+    unique_clubs = [''] + club_names if club_names else []
     
     col1, col2 = st.columns([1, 1])
     
@@ -708,16 +629,18 @@ def show_add_players():
             
             if st.form_submit_button("Add Player"):
                 if player_id and player_name and positions and club_name and club_name != 'Select a club...':
-                    cursor = conn.cursor()
                     try:
-                        cursor.execute('''
-                            INSERT INTO players 
-                            (player_id, player_name, positions, club_name, age, nationality,
-                             overall_rating, potential, value_eur, wage_eur, is_custom)
-                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, TRUE)
-                        ''', (player_id, player_name, positions, club_name, age, nationality,
-                              overall_rating, potential, value_eur, wage_eur))
-                        conn.commit()
+                        def add_custom_player(conn):
+                            new_id = conn.execute('''
+                                INSERT INTO players 
+                                (player_id, player_name, positions, club_name, age, nationality,
+                                 overall_rating, potential, value_eur, wage_eur, is_custom)
+                                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, TRUE)
+                            ''', (player_id, player_name, positions, club_name, age, nationality,
+                                  overall_rating, potential, value_eur, wage_eur)).lastrowid
+                            sync_player_positions(conn, [new_id])
+                        
+                        run_write(add_custom_player)
                         st.success(f"Player {player_name} added successfully to {club_name}!")
                     except sqlite3.IntegrityError:
                         st.error("Player ID already exists!")
@@ -739,18 +662,16 @@ def show_add_players():
             st.dataframe(custom_players_df, use_container_width=True)
         else:
             st.info("No custom players added yet.")
-    
-    conn.close()
 
 def show_user_squads():
     st.title("📋 User Squads")
     
-    conn = sqlite3.connect('match_simulator.db')
+    conn = get_connection()
     
     # Get all squad uploads
     uploads_df = pd.read_sql_query('''
         SELECT su.id, u.username, u.club_name, su.description, su.status, 
-               su.uploaded_at, su.approved_at
+               su.uploaded_at, su.approved_at, su.image_hash
         FROM squad_uploads su
         JOIN users u ON su.user_id = u.id
         ORDER BY su.uploaded_at DESC
@@ -758,7 +679,6 @@ def show_user_squads():
     
     if uploads_df.empty:
         st.info("No squad uploads found.")
-        conn.close()
         return
     
     # Filter by status
@@ -782,17 +702,8 @@ def show_user_squads():
                 if upload['approved_at']:
                     st.write(f"**Approved:** {upload['approved_at']}")
                 
-                # Display image
-                cursor = conn.cursor()
-                cursor.execute('SELECT image_data FROM squad_uploads WHERE id = ?', (upload['id'],))
-                image_data = cursor.fetchone()[0]
-                
-                if image_data:
-                    try:
-                        image = Image.open(io.BytesIO(image_data))
-                        st.image(image, caption="Squad Image", width=400)
-                    except:
-                        st.error("Could not display image")
+                # Display thumbnail (full image on demand)
+                display_squad_image(upload['image_hash'], 'thumb', 200, key=f"full_squad_{upload['id']}")
             
             with col2:
                 if upload['status'] == 'pending':
@@ -800,33 +711,25 @@ def show_user_squads():
                     
                     with col_a:
                         if st.button("✅ Approve", key=f"approve_squad_{upload['id']}"):
-                            cursor = conn.cursor()
-                            cursor.execute('''
+                            execute_write('''
                                 UPDATE squad_uploads 
                                 SET status = 'approved', approved_at = CURRENT_TIMESTAMP
                                 WHERE id = ?
                             ''', (upload['id'],))
-                            conn.commit()
                             st.success("Squad approved!")
                             st.rerun()
                     
                     with col_b:
                         if st.button("❌ Reject", key=f"reject_squad_{upload['id']}"):
-                            cursor = conn.cursor()
-                            cursor.execute('''
+                            execute_write('''
                                 UPDATE squad_uploads 
                                 SET status = 'rejected'
                                 WHERE id = ?
                             ''', (upload['id'],))
-                            conn.commit()
                             st.success("Squad rejected!")
                             st.rerun()
-    
-    conn.close()
 
 def show_admin_home():
-    from ui_components import display_dashboard_metrics, display_player_card
-    
     # Enhanced title with styling
     st.markdown("""
     <div class="main-header">
@@ -835,15 +738,10 @@ def show_admin_home():
     </div>
     """, unsafe_allow_html=True)
     
-    # Load unique club names from CSV for dropdown
-    try:
-        clubs_df = pd.read_csv('player-data-full.csv', usecols=['club_name'])
-        unique_clubs = sorted(clubs_df['club_name'].dropna().unique().tolist())
-    except Exception as e:
-        st.error(f"Error loading club data: {e}")
-        unique_clubs = []
+    conn = get_connection()
     
-    conn = sqlite3.connect('match_simulator.db')
+    # Club names from the cached club directory
+    unique_clubs = get_club_names(conn)
     
     # Dashboard statistics
     col1, col2, col3, col4 = st.columns(4)
@@ -853,7 +751,7 @@ def show_admin_home():
         st.metric("Total Players", total_players)
     
     with col2:
-        total_clubs = pd.read_sql_query('SELECT COUNT(DISTINCT club_name) as count FROM players WHERE club_name IS NOT NULL AND club_name != ""', conn).iloc[0]['count']
+        total_clubs = pd.read_sql_query('SELECT COUNT(*) as count FROM club_stats', conn).iloc[0]['count']
         st.metric("Total Clubs", total_clubs)
     
     with col3:
@@ -876,42 +774,32 @@ def show_admin_home():
         search_name = st.text_input("Search by Player Name")
     
     with col2:
-        clubs_df = pd.read_sql_query('''
-            SELECT DISTINCT club_name 
-            FROM players 
-            WHERE club_name IS NOT NULL AND club_name != ''
-            ORDER BY club_name
-        ''', conn)
-        club_filter = st.selectbox("Filter by Club", ["All"] + clubs_df['club_name'].tolist())
+        club_filter = st.selectbox("Filter by Club", ["All"] + get_club_names(conn))
     
     with col3:
         position_filter = st.text_input("Filter by Position")
     
-    # Build query
-    query = "SELECT * FROM players WHERE 1=1"
-    params = []
-    
-    if search_name:
-        query += " AND player_name LIKE ?"
-        params.append(f"%{search_name}%")
+    # Build query (name search goes through the full-text index)
+    search_sql, params = search_join(search_name)
+    rank_sql = f", {SEARCH_RANK}" if search_sql else ""
+    query = f"SELECT players.*{rank_sql} FROM players {search_sql} WHERE 1=1"
     
     if club_filter != "All":
         query += " AND club_name = ?"
         params.append(club_filter)
     
     if position_filter:
-        query += " AND positions LIKE ?"
-        params.append(f"%{position_filter}%")
-    
-    query += " ORDER BY overall_rating DESC LIMIT 50"
+        position_sql, position_params = position_clause(position_filter)
+        query += position_sql
+        params += position_params
     
-    # Execute search
-    players_df = pd.read_sql_query(query, conn, params=params)
+    # Execute search, one keyset page at a time
+    players_df = player_page(conn, query, params, 'admin_players_page', page_size=50, ranked=bool(search_sql))
     
     if players_df.empty:
         st.info("No players found matching your criteria.")
     else:
-        st.subheader(f"Players ({len(players_df)} found)")
+        st.subheader(f"Players (page {page_number('admin_players_page')}, {len(players_df)} shown)")
         
         # Display players with edit functionality
         for _, player in players_df.iterrows():
@@ -949,15 +837,15 @@ def show_admin_home():
                         )
                         
                         if st.form_submit_button("Update Stats"):
-                            cursor = conn.cursor()
-                            cursor.execute('''
+                            execute_write('''
                                 UPDATE players 
                                 SET overall_rating = ?, potential = ?
                                 WHERE id = ?
                             ''', (new_overall, new_potential, player['id']))
-                            conn.commit()
                             st.success(f"Updated {player['player_name']}'s ratings!")
                             st.rerun()
+        
+        show_page_controls('admin_players_page')
     
     st.markdown("---")
     st.subheader("🔀 Change Player Club")
@@ -967,13 +855,7 @@ def show_admin_home():
         
         if search_query:
             # Search for players matching the query
-            search_results = pd.read_sql_query('''
-                SELECT id, player_id, player_name, club_name, overall_rating, positions
-                FROM players
-                WHERE player_name LIKE ? OR player_id = ?
-                ORDER BY overall_rating DESC
-                LIMIT 10
-            ''', conn, params=(f'%{search_query}%', search_query))
+            search_results = quick_search(conn, search_query, limit=10)
             
             if not search_results.empty:
                 st.write("Matching Players:")
@@ -988,147 +870,12 @@ def show_admin_home():
                             )
                             
                             if st.form_submit_button(f"Update {player['player_name']}'s Club"):
-                                cursor = conn.cursor()
-                                cursor.execute('''
+                                execute_write('''
                                     UPDATE players 
                                     SET club_name = ?
                                     WHERE id = ?
                                 ''', (new_club, player['id']))
-                                conn.commit()
                                 st.success(f"Successfully moved {player['player_name']} to {new_club}!")
                                 st.rerun()
             else:
                 st.info("No players found matching your search.")
-    
-    conn.close()
-
-def show_user_home():
-    st.title("🏠 User Dashboard Home")
-    
-    user = st.session_state.user
-    conn = sqlite3.connect('match_simulator.db')
-    
-    # User statistics
-    col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        st.metric("Your Cash", f"€{user['cash']:,.2f}")
-    
-    with col2:
-        if user['club_name']:
-            squad_count = pd.read_sql_query('SELECT COUNT(*) as count FROM players WHERE club_name = ?', conn, params=(user['club_name'],)).iloc[0]['count']
-            st.metric("Squad Size", squad_count)
-        else:
-            st.metric("Squad Size", "N/A")
-    
-    with col3:
-        pending_bids = pd.read_sql_query('SELECT COUNT(*) as count FROM transfer_bids WHERE user_id = ? AND status = "pending"', conn, params=(user['id'],)).iloc[0]['count']
-        st.metric("Pending Bids", pending_bids)
-    
-    with col4:
-        if user['club_name']:
-            squad_value = pd.read_sql_query('SELECT SUM(value_eur) as total FROM players WHERE club_name = ?', conn, params=(user['club_name'],)).iloc[0]['total']
-            st.metric("Squad Value", f"€{squad_value:,.0f}" if squad_value else "€0")
-        else:
-            st.metric("Squad Value", "N/A")
-    
-    st.markdown("---")
-    
-    # Player search
-    st.subheader("🔍 Player Database")
-    
-    # Search filters
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        search_name = st.text_input("Search by Player Name")
-    
-    with col2:
-        clubs_df = pd.read_sql_query('''
-            SELECT DISTINCT club_name 
-            FROM players 
-            WHERE club_name IS NOT NULL AND club_name != ''
-            ORDER BY club_name
-        ''', conn)
-        club_filter = st.selectbox("Filter by Club", ["All"] + clubs_df['club_name'].tolist())
-    
-    with col3:
-        position_filter = st.text_input("Filter by Position")
-    
-    # Build query
-    query = "SELECT * FROM players WHERE 1=1"
-    params = []
-    
-    if search_name:
-        query += " AND player_name LIKE ?"
-        params.append(f"%{search_name}%")
-    
-    if club_filter != "All":
-        query += " AND club_name = ?"
-        params.append(club_filter)
-    
-    if position_filter:
-        query += " AND positions LIKE ?"
-        params.append(f"%{position_filter}%")
-    
-    query += " ORDER BY overall_rating DESC LIMIT 50"
-    
-    # Execute search
-    players_df = pd.read_sql_query(query, conn, params=params)
-    
-    if players_df.empty:
-        st.info("No players found matching your criteria.")
-    else:
-        st.subheader(f"Players ({len(players_df)} found)")
-        
-        # Display players
-        for _, player in players_df.iterrows():
-            with st.expander(f"{player['player_name']} ({player['club_name']}) - Rating: {player['overall_rating']}"):
-                col1, col2 = st.columns([2, 1])
-                
-                with col1:
-                    st.write(f"**Position:** {player['positions']}")
-                    st.write(f"**Age:** {player['age']}")
-                    st.write(f"**Nationality:** {player['nationality']}")
-                    st.write(f"**Club:** {player['club_name']}")
-                    st.write(f"**Overall Rating:** {player['overall_rating']}")
-                    st.write(f"**Potential:** {player['potential']}")
-                    if player['value_eur']:
-                        st.write(f"**Value:** €{player['value_eur']:,.0f}")
-                    if player['wage_eur']:
-                        st.write(f"**Wage:** €{player['wage_eur']:,.0f}")
-                
-                with col2:
-                    if player['club_name'] != user['club_name']:
-                        st.subheader("Make Transfer Bid")
-                        
-                        with st.form(f"bid_form_{player['id']}"):
-                            bid_amount = st.number_input(
-                                "Bid Amount (€)", 
-                                value=int(player['value_eur']) if player['value_eur'] else 1000000, 
-                                step=100000,
-                                key=f"bid_{player['id']}"
-                            )
-                            description = st.text_area(
-                                "Bid Description", 
-                                key=f"desc_{player['id']}"
-                            )
-                            
-                            if st.form_submit_button("Submit Bid"):
-                                if bid_amount > 0 and bid_amount <= user['cash']:
-                                    cursor = conn.cursor()
-                                    cursor.execute('''
-                                        INSERT INTO transfer_bids 
-                                        (user_id, player_id, bid_amount, description)
-                                        VALUES (?, ?, ?, ?)
-                                    ''', (user['id'], player['player_id'], bid_amount, description))
-                                    conn.commit()
-                                    st.success(f"Bid submitted for {player['player_name']}!")
-                                elif bid_amount > user['cash']:
-                                    st.error("Insufficient funds!")
-                                else:
-                                    st.error("Please enter a valid bid amount!")
-                    else:
-                        st.info("This player is already in your squad!")
-    
-    conn.close()
@@ -0,0 +1,100 @@
+"""
+Keyset pagination for player listings in Match Simulator App
+Pages are ordered by (overall_rating, id) and each page starts after the last
+row of the previous one, so page 100 costs the same as page 1 instead of
+OFFSET re-reading every row before it. Text searches keep their relevance
+order and seek on (search rank, id) instead
+"""
+
+import streamlit as st
+import pandas as pd
+
+# Sort key shared with the idx_players_seek expression index
+SEEK_ORDER = "IFNULL(players.overall_rating, 0) DESC, players.id DESC"
+# The redundant <= bound lets SQLite seek the index instead of scanning it
+SEEK_AFTER = '''
+    AND IFNULL(players.overall_rating, 0) <= ?
+    AND (IFNULL(players.overall_rating, 0), players.id) < (?, ?)
+'''
+
+# Best matches first for queries joined to player_search.search_join
+RANK_ORDER = "fts.rank, players.id"
+RANK_AFTER = '''
+    AND fts.rank >= ?
+    AND (fts.rank, players.id) > (?, ?)
+'''
+
+def create_seek_index(conn):
+    """Index players in listing order for keyset pagination"""
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_players_seek
+        ON players (IFNULL(overall_rating, 0) DESC, id DESC)
+    ''')
+
+def fetch_page(conn, query, params, after=None, page_size=50, ranked=False):
+    """Fetch one page of a player query
+
+    query must select from players with a WHERE clause and include the id
+    and overall_rating columns. With ranked=True it must join search_join's
+    fts subquery and also select player_search.SEARCH_RANK; pages then follow the search
+    rank. Returns (page_df, next_key) where next_key is None on the last page.
+    """
+    params = list(params)
+    if after is not None:
+        query += RANK_AFTER if ranked else SEEK_AFTER
+        key, last_id = after
+        params += [key, key, last_id]
+    query += f" ORDER BY {RANK_ORDER if ranked else SEEK_ORDER} LIMIT ?"
+    params.append(page_size + 1)
+
+    page_df = pd.read_sql_query(query, conn, params=params)
+    next_key = None
+    if len(page_df) > page_size:
+        page_df = page_df.iloc[:page_size]
+        last = page_df.iloc[-1]
+        if ranked:
+            next_key = (float(last['search_rank']), int(last['id']))
+        else:
+            rating = last['overall_rating']
+            next_key = (0 if pd.isna(rating) else int(rating), int(last['id']))
+
+    if ranked:
+        page_df = page_df.drop(columns=['search_rank'])
+    return page_df, next_key
+
+def player_page(conn, query, params, state_key, page_size=50, ranked=False):
+    """Fetch the page the user is on for a listing; changing filters resets to page 1"""
+    filters = (query, tuple(params), page_size, ranked)
+    state = st.session_state.get(state_key)
+    if state is None or state['filters'] != filters:
+        state = {'filters': filters, 'starts': [None], 'next': None}
+        st.session_state[state_key] = state
+
+    page_df, state['next'] = fetch_page(conn, query, params, state['starts'][-1], page_size, ranked)
+    return page_df
+
+def page_number(state_key):
+    """1-based number of the page currently shown for a listing"""
+    state = st.session_state.get(state_key)
+    return len(state['starts']) if state else 1
+
+def show_page_controls(state_key):
+    """Draw Previous/Next buttons for a listing fetched with player_page"""
+    state = st.session_state.get(state_key)
+    if state is None:
+        return
+
+    col1, col2, col3 = st.columns([1, 2, 1])
+
+    with col1:
+        if st.button("⬅️ Previous", key=f"{state_key}_prev", disabled=len(state['starts']) == 1):
+            state['starts'].pop()
+            st.rerun()
+
+    with col2:
+        st.markdown(f"<p style='text-align: center;'>Page {len(state['starts'])}</p>", unsafe_allow_html=True)
+
+    with col3:
+        if st.button("Next ➡️", key=f"{state_key}_next", disabled=state['next'] is None):
+            state['starts'].append(state['next'])
+            st.rerun()
@@ -0,0 +1,114 @@
+"""
+Full-text player search for Match Simulator App
+An FTS5 index over player name, nationality and club, kept in sync with the
+players table by triggers, so name searches use the index instead of a
+leading-wildcard LIKE scan over every player
+"""
+
+import re
+import pandas as pd
+
+# Name hits outrank nationality/club hits in the bm25 ranking
+RANK_WEIGHTS = "bm25(10.0, 2.0, 2.0)"
+
+# Select-list entry for the match rank of a search_join query
+SEARCH_RANK = "fts.rank AS search_rank"
+
+def create_search_index(conn):
+    """Create the players_fts index, its sync triggers and fill it from players"""
+    conn.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS players_fts USING fts5(
+            player_name,
+            nationality,
+            club_name,
+            content='players',
+            content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+    ''')
+
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS players_fts_insert AFTER INSERT ON players BEGIN
+            INSERT INTO players_fts (rowid, player_name, nationality, club_name)
+            VALUES (new.id, new.player_name, new.nationality, new.club_name);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS players_fts_delete AFTER DELETE ON players BEGIN
+            INSERT INTO players_fts (players_fts, rowid, player_name, nationality, club_name)
+            VALUES ('delete', old.id, old.player_name, old.nationality, old.club_name);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS players_fts_update
+        AFTER UPDATE OF player_name, nationality, club_name ON players BEGIN
+            INSERT INTO players_fts (players_fts, rowid, player_name, nationality, club_name)
+            VALUES ('delete', old.id, old.player_name, old.nationality, old.club_name);
+            INSERT INTO players_fts (rowid, player_name, nationality, club_name)
+            VALUES (new.id, new.player_name, new.nationality, new.club_name);
+        END
+    ''')
+
+    conn.execute("INSERT INTO players_fts (players_fts, rank) VALUES ('rank', ?)", (RANK_WEIGHTS,))
+    rebuild_search_index(conn)
+
+def rebuild_search_index(conn):
+    """Re-index every player (e.g. after editing the database outside the app)"""
+    conn.execute("INSERT INTO players_fts (players_fts) VALUES ('rebuild')")
+
+def match_expression(search_text):
+    """Turn free text into an FTS5 query where every word is a quoted prefix
+
+    Returns None when the text has no searchable words.
+    """
+    words = re.findall(r"\w+", str(search_text or ""))
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+def search_join(search_text):
+    """Return the JOIN clause and params restricting players to search hits
+
+    The joined `fts` subquery exposes only rowid and rank, so existing column
+    names stay unambiguous; order by `fts.rank` (selected as SEARCH_RANK for
+    ranked pagination) for best matches first.
+    """
+    expression = match_expression(search_text)
+    if expression is None:
+        return "", []
+    join_sql = '''
+        JOIN (SELECT rowid, rank FROM players_fts WHERE players_fts MATCH ?) AS fts
+        ON fts.rowid = players.id
+    '''
+    return join_sql, [expression]
+
+def quick_search(conn, search_text, limit=10):
+    """Find players by exact player ID or ranked name search"""
+    search_text = str(search_text or "").strip()
+    expression = match_expression(search_text)
+
+    query = '''
+        SELECT players.id, player_id, player_name, club_name, overall_rating, positions
+        FROM players
+        JOIN (
+            SELECT id AS rowid, NULL AS rank FROM players WHERE player_id = ?
+    '''
+    params = [search_text]
+
+    if expression is not None:
+        query += '''
+            UNION ALL
+            SELECT rowid, rank FROM players_fts
+            WHERE players_fts MATCH ?
+            AND rowid NOT IN (SELECT id FROM players WHERE player_id = ?)
+        '''
+        params += [expression, search_text]
+
+    query += '''
+        ) AS fts ON fts.rowid = players.id
+        ORDER BY fts.rank IS NOT NULL, fts.rank, overall_rating DESC
+        LIMIT ?
+    '''
+    params.append(limit)
+
+    return pd.read_sql_query(query, conn, params=params)
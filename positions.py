@@ -0,0 +1,74 @@
+"""
+Normalized player positions for Match Simulator App
+players.positions stays the display text ("ST,LW"); player_positions holds
+one indexed row per (position, player) so position filters are exact lookups
+instead of substring scans that let 'CB' match 'LCB'
+"""
+
+def create_position_index(conn):
+    """Create the player_positions table and fill it from players"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS player_positions (
+            position TEXT NOT NULL,
+            player_id INTEGER NOT NULL,
+            PRIMARY KEY (position, player_id),
+            FOREIGN KEY (player_id) REFERENCES players (id)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_player_positions_player
+        ON player_positions (player_id)
+    ''')
+
+    # Splitting the text can't be done in a trigger, but cleanup can
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS player_positions_delete AFTER DELETE ON players BEGIN
+            DELETE FROM player_positions WHERE player_id = old.id;
+        END
+    ''')
+
+    sync_player_positions(conn)
+
+def split_positions(positions):
+    """Split position text like 'st, LW' into unique codes ['ST', 'LW']"""
+    codes = []
+    for code in str(positions or "").replace("/", ",").split(","):
+        code = code.strip().upper()
+        if code and code != "NAN" and code not in codes:
+            codes.append(code)
+    return codes
+
+def sync_player_positions(conn, player_ids=None):
+    """Rebuild position rows from players.positions (writer thread)
+
+    Pass the players.id values that changed, or None to rebuild every player.
+    Anything that inserts players or edits positions must call this.
+    """
+    if player_ids is None:
+        conn.execute("DELETE FROM player_positions")
+        # Stream rows from the cursor; the table may be larger than memory
+        rows = conn.execute("SELECT id, positions FROM players")
+    else:
+        player_ids = [(int(player_id),) for player_id in player_ids]
+        conn.executemany("DELETE FROM player_positions WHERE player_id = ?", player_ids)
+        rows = []
+        for player_id in player_ids:
+            rows += conn.execute("SELECT id, positions FROM players WHERE id = ?", player_id).fetchall()
+
+    conn.executemany(
+        "INSERT OR IGNORE INTO player_positions (position, player_id) VALUES (?, ?)",
+        ((code, player_id) for player_id, positions in rows for code in split_positions(positions))
+    )
+
+def position_clause(positions_text):
+    """Return an AND clause and params matching players in any of the given positions"""
+    codes = split_positions(positions_text)
+    if not codes:
+        return "", []
+    placeholders = ", ".join("?" for _ in codes)
+    clause = f'''
+        AND players.id IN (
+            SELECT player_id FROM player_positions WHERE position IN ({placeholders})
+        )
+    '''
+    return clause, codes
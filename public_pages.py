@@ -0,0 +1,167 @@
+import streamlit as st
+from auth import create_user, authenticate_user
+from ui_components import display_welcome_hero, get_image_data_uri, register_background, AVATAR_SIZE
+
+def show_welcome_page():
+    # Use enhanced welcome hero
+    display_welcome_hero()
+    
+    # Get some available images for background integration
+    city_bg = register_background('city.jpg')
+    henderson_bg = register_background('henderson-lifts-ucl-trophy.png')
+    
+    st.markdown(f"""
+    <div class="{city_bg}" style="
+        background: linear-gradient(135deg, rgba(255,255,255,0.85) 0%, rgba(248,249,250,0.85) 100%), 
+                   var(--bg-image, none) center/cover;
+        background-blend-mode: lighten;
+        padding: 3rem 2rem;
+        border-radius: 20px;
+        margin: 2rem 0;
+        box-shadow: 0 8px 25px rgba(0,0,0,0.1);
+    ">
+        <div style="display: flex; justify-content: space-between; gap: 2rem; flex-wrap: wrap;">
+            <div style="flex: 1; min-width: 300px;">
+                <h3 style="color: #2c3e50; margin-bottom: 1.5rem; font-size: 1.8rem; display: flex; align-items: center;">
+                    <img src="{get_image_data_uri('messi.jpeg', AVATAR_SIZE)}" 
+                         style="width: 80px; height: 80px; border-radius: 50%; margin-right: 0.5rem; border: 4px solid #667eea; box-shadow: 0 6px 20px rgba(0,0,0,0.3); object-fit: cover;" />
+                    👤 For Users
+                </h3>
+                <ul style="color: #34495e; line-height: 1.8; font-size: 1.1rem;">
+                    <li style="margin-bottom: 0.5rem;">🔍 <strong>Search & Scout</strong> thousands of players</li>
+                    <li style="margin-bottom: 0.5rem;">👥 <strong>Build Your Squad</strong> with your assigned club</li>
+                    <li style="margin-bottom: 0.5rem;">📤 <strong>Upload Squad Images</strong> for approval</li>
+                    <li style="margin-bottom: 0.5rem;">💸 <strong>Make Transfer Bids</strong> for dream players</li>
+                    <li style="margin-bottom: 0.5rem;">💰 <strong>Manage Your Budget</strong> and inventory</li>
+                </ul>
+            </div>
+            <div style="flex: 1; min-width: 300px;">
+                <h3 style="color: #2c3e50; margin-bottom: 1.5rem; font-size: 1.8rem; display: flex; align-items: center;">
+                    <img src="{get_image_data_uri('ronaldo.jpg', AVATAR_SIZE)}" 
+                         style="width: 80px; height: 80px; border-radius: 50%; margin-right: 0.5rem; border: 4px solid #667eea; box-shadow: 0 6px 20px rgba(0,0,0,0.3); object-fit: cover;" />
+                    👑 For Admins
+                </h3>
+                <ul style="color: #34495e; line-height: 1.8; font-size: 1.1rem;">
+                    <li style="margin-bottom: 0.5rem;">👥 <strong>Manage Users</strong> and approve registrations</li>
+                    <li style="margin-bottom: 0.5rem;">💰 <strong>Distribute Cash & Items</strong> to users</li>
+                    <li style="margin-bottom: 0.5rem;">🔄 <strong>Approve Transfers</strong> and manage windows</li>
+                    <li style="margin-bottom: 0.5rem;">📊 <strong>Track All Activities</strong> with detailed logs</li>
+                    <li style="margin-bottom: 0.5rem;">➕ <strong>Add Custom Players</strong> to the database</li>
+                </ul>
+            </div>
+        </div>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # Add getting started section with another background
+    st.markdown(f"""
+    <div class="{henderson_bg}" style="
+        background: linear-gradient(135deg, rgba(255,255,255,0.85) 0%, rgba(248,249,250,0.85) 100%), 
+                   var(--bg-image, none) center/cover;
+        background-blend-mode: lighten;
+        padding: 3rem 2rem;
+        border-radius: 20px;
+        margin: 2rem 0;
+        box-shadow: 0 8px 25px rgba(0,0,0,0.1);
+        text-align: center;
+    ">
+        <h3 style="color: #2c3e50; margin-bottom: 2rem; font-size: 2rem; display: flex; align-items: center; justify-content: center;">
+            <img src="{get_image_data_uri('henderson-lifts-ucl-trophy.png', AVATAR_SIZE)}" 
+                 style="width: 100px; height: 100px; margin-right: 1rem; border-radius: 50%; border: 4px solid #667eea; box-shadow: 0 6px 20px rgba(0,0,0,0.3); object-fit: cover;" />
+            🚀 Getting Started
+        </h3>
+        <div style="display: flex; justify-content: center; gap: 3rem; flex-wrap: wrap; margin-bottom: 2rem;">
+            <div style="text-align: center; background: linear-gradient(135deg, #667eea, #764ba2); color: white; padding: 1.5rem; border-radius: 15px; min-width: 150px;">
+                <div style="font-size: 2.5rem; margin-bottom: 1rem;">1️⃣</div>
+                <div style="font-weight: 600; margin-bottom: 0.5rem;">Sign Up</div>
+                <div style="font-size: 0.9rem; opacity: 0.9;">as either a User or Admin</div>
+            </div>
+            <div style="text-align: center; background: linear-gradient(135deg, #ff6b6b, #ee5a24); color: white; padding: 1.5rem; border-radius: 15px; min-width: 150px;">
+                <div style="font-size: 2.5rem; margin-bottom: 1rem;">2️⃣</div>
+                <div style="font-weight: 600; margin-bottom: 0.5rem;">Login</div>
+                <div style="font-size: 0.9rem; opacity: 0.9;">with your credentials</div>
+            </div>
+            <div style="text-align: center; background: linear-gradient(135deg, #a8edea, #fed6e3); color: #2c3e50; padding: 1.5rem; border-radius: 15px; min-width: 150px;">
+                <div style="font-size: 2.5rem; margin-bottom: 1rem;">3️⃣</div>
+                <div style="font-weight: 600; margin-bottom: 0.5rem;">Explore</div>
+                <div style="font-size: 0.9rem; opacity: 0.9;">the dashboard features</div>
+            </div>
+            <div style="text-align: center; background: linear-gradient(135deg, #ffecd2, #fcb69f); color: #2c3e50; padding: 1.5rem; border-radius: 15px; min-width: 150px;">
+                <div style="font-size: 2.5rem; margin-bottom: 1rem;">4️⃣</div>
+                <div style="font-weight: 600; margin-bottom: 0.5rem;">Start Building</div>
+                <div style="font-size: 0.9rem; opacity: 0.9;">your ultimate team!</div>
+            </div>
+        </div>
+        <div style="
+            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+            color: white;
+            padding: 1rem 2rem;
+            border-radius: 10px;
+            display: inline-block;
+            margin-top: 1rem;
+        ">
+            💡 <strong>New users</strong>: Your registration will need admin approval before you can access all features.
+        </div>
+    </div>
+    """, unsafe_allow_html=True)
+
+def show_signup_page():
+    st.title("📝 Sign Up")
+    
+    col1, col2, col3 = st.columns([1, 2, 1])
+    
+    with col2:
+        with st.form("signup_form"):
+            st.subheader("Create New Account")
+            
+            username = st.text_input("Username")
+            email = st.text_input("Email")
+            password = st.text_input("Password", type="password")
+            confirm_password = st.text_input("Confirm Password", type="password")
+            role = st.selectbox("Role", ["user", "admin"])
+            
+            # Show admin code input only if admin role is selected
+            admin_code = ""
+            if role == "admin":
+                admin_code = st.text_input("Admin Code", type="password", help="Contact system administrator for the admin code")
+            
+            submitted = st.form_submit_button("Sign Up")
+            
+            if submitted:
+                if not username or not password:
+                    st.error("Username and password are required!")
+                elif password != confirm_password:
+                    st.error("Passwords don't match!")
+                elif role == "admin" and admin_code != "2110":
+                    st.error("Invalid admin code. Please enter the correct admin code.")
+                else:
+                    if create_user(username, password, role, email):
+                        st.success("Account created successfully! Please login.")
+                        st.session_state.page = 'login'
+                        st.rerun()
+                    else:
+                        st.error("Username already exists!")
+
+def show_login_page():
+    st.title("🔐 Login")
+    
+    col1, col2, col3 = st.columns([1, 2, 1])
+    
+    with col2:
+        with st.form("login_form"):
+            st.subheader("Login to Your Account")
+            
+            username = st.text_input("Username")
+            password = st.text_input("Password", type="password")
+            
+            submitted = st.form_submit_button("Login")
+            
+            if submitted:
+                user = authenticate_user(username, password)
+                if user:
+                    st.session_state.authenticated = True
+                    st.session_state.user = user
+                    st.success(f"Welcome back, {user['username']}!")
+                    st.rerun()
+                else:
+                    st.error("Invalid username or password!")
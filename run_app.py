@@ -33,9 +33,8 @@ def initialize_database():
     print("🗄️ Initializing database...")
     
     try:
-        from app import init_database, initialize_players_from_csv
-        init_database()
-        initialize_players_from_csv()
+        from bootstrap import bootstrap
+        bootstrap()
         print("✅ Database initialized successfully!")
     except Exception as e:
         print(f"⚠️ Database initialization warning: {e}")
@@ -1,5 +1,5 @@
 import streamlit as st
-from pages import show_signup_page
+from public_pages import show_signup_page
 
 # Mock the Streamlit session state
 if 'page' not in st.session_state:
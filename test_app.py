@@ -3,16 +3,28 @@ Test script for Match Simulator App
 This script tests the core functionality of the application
 """
 
+from database import get_connection, execute_write, executemany_write, insert_and_get_id, run_write, WriteQueue
 import sqlite3
 import pandas as pd
 from app import create_user, authenticate_user, hash_password
+from user_profiles import get_user_profile
+from transfers import settle_transfer, approve_transfers, approve_bids
+import ledger
+from ledger import distribute_cash, adjust_cash, set_user_cash, reconcile_ledger, unbalanced_transactions
+from inventory import give_items, add_items
+from migrate_database import run_migrations
+from player_search import match_expression, quick_search, search_join, SEARCH_RANK
+from pagination import fetch_page
+from positions import split_positions, position_clause
+from clubs import get_club_stats
+from csv_ingest import parse_money, sync_players
 import os
 
 def test_database_setup():
     """Test if database is properly initialized"""
     print("Testing database setup...")
     
-    conn = sqlite3.connect('match_simulator.db')
+    conn = get_connection()
     cursor = conn.cursor()
     
     # Check if all tables exist
@@ -26,12 +38,17 @@ def test_database_setup():
         else:
             print(f"❌ Table '{table}' missing")
     
+    # A database that cannot be opened fails fast instead of hanging every writer
+    try:
+        WriteQueue('/nonexistent_dir/match_simulator.db')
+        print("❌ Writer thread started on an unopenable database")
+    except sqlite3.OperationalError:
+        print("✅ Writer thread reports an unopenable database")
+    
     # Check if player data is loaded
     cursor.execute("SELECT COUNT(*) FROM players")
     player_count = cursor.fetchone()[0]
     print(f"✅ Player database contains {player_count} players")
-    
-    conn.close()
 
 def test_user_creation():
     """Test user creation and authentication"""
@@ -64,12 +81,20 @@ def test_user_creation():
         print("✅ User authentication successful")
     else:
         print("❌ User authentication failed")
+    
+    # Profiles must reflect writes made after login
+    run_migrations()
+    if user_auth:
+        adjust_cash(user_auth['id'], 5)
+        profile = get_user_profile(user_auth['id'])
+        assert profile and profile['cash'] == (user_auth['cash'] or 0) + 5, f"User profile is stale: {profile}"
+        print("✅ User profile refreshes after cash changes")
 
 def test_player_data():
     """Test player data functionality"""
     print("\nTesting player data...")
     
-    conn = sqlite3.connect('match_simulator.db')
+    conn = get_connection()
     
     # Check for unique clubs
     clubs_df = pd.read_sql_query('''
@@ -87,66 +112,308 @@ def test_player_data():
         print(f"   - {club['club_name']}: {club['player_count']} players")
     
     # Test custom player addition
-    cursor = conn.cursor()
     try:
-        cursor.execute('''
+        execute_write('''
             INSERT OR IGNORE INTO players 
             (player_id, player_name, positions, club_name, age, nationality,
              overall_rating, potential, value_eur, wage_eur, is_custom)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, TRUE)
         ''', ("TEST001", "Test Player", "ST", "Test FC", 25, "Test Country", 80, 85, 5000000, 100000))
-        conn.commit()
         print("✅ Custom player addition works")
     except Exception as e:
         print(f"❌ Custom player addition failed: {e}")
     
-    conn.close()
+    # Club stats are kept in step with players by triggers
+    run_migrations()
+    squad = pd.read_sql_query("SELECT COUNT(*) as count, SUM(value_eur) as total FROM players WHERE club_name = 'Test FC'", conn).iloc[0]
+    stats = get_club_stats(conn, "Test FC")
+    assert stats is not None, "No club stats for Test FC"
+    assert stats['player_count'] == squad['count'], f"Club player count {stats['player_count']} != {squad['count']}"
+    assert stats['total_value'] == squad['total'], f"Club total value {stats['total_value']} != {squad['total']}"
+    print("✅ Club stats match the squad")
+
+def delete_test_user(conn, user_id):
+    """Remove a test user with their bids, settlements and cash transactions (writer thread)"""
+    conn.execute("DELETE FROM cash_ledger WHERE txn_id IN (SELECT txn_id FROM cash_ledger WHERE user_id = ?)", (user_id,))
+    conn.execute("DELETE FROM ledger_checkpoints WHERE user_id = ?", (user_id,))
+    conn.execute("DELETE FROM transfer_settlements WHERE buyer_id = ?", (user_id,))
+    conn.execute("DELETE FROM transfer_bids WHERE user_id = ?", (user_id,))
+    conn.execute("DELETE FROM users WHERE id = ?", (user_id,))
 
 def test_transfer_system():
     """Test transfer bid system"""
     print("\nTesting transfer system...")
     
-    conn = sqlite3.connect('match_simulator.db')
+    run_migrations()
+    conn = get_connection()
     cursor = conn.cursor()
     
-    # Get a test user and player
-    cursor.execute("SELECT id FROM users WHERE role = 'user' LIMIT 1")
-    user_result = cursor.fetchone()
-    
-    cursor.execute("SELECT player_id FROM players LIMIT 1")
-    player_result = cursor.fetchone()
+    # A dedicated buyer and players, removed again at the end
+    create_user("test_buyer", "buyer123", "user")
+    cursor.execute("SELECT id FROM users WHERE username = 'test_buyer'")
+    user_id = cursor.fetchone()[0]
+    execute_write("UPDATE users SET club_name = 'Test Buyer FC', status = 'approved' WHERE id = ?", (user_id,))
+    set_user_cash(user_id, 20000000)
+    execute_write("DELETE FROM players WHERE player_id IN ('TESTXFER', 'TESTSOLD')")
+    executemany_write('''
+        INSERT INTO players (player_id, player_name, club_name, is_custom)
+        VALUES (?, ?, 'Test Seller FC', TRUE)
+    ''', [('TESTXFER', 'Transfer Player'), ('TESTSOLD', 'Sold Player')])
+    player_id = 'TESTXFER'
     
-    if user_result and player_result:
-        user_id = user_result[0]
-        player_id = player_result[0]
+    try:
+        # Create a test transfer bid
+        execute_write('''
+            INSERT INTO transfer_bids (user_id, player_id, bid_amount, description)
+            VALUES (?, ?, ?, ?)
+        ''', (user_id, player_id, 10000000, "Test transfer bid"))
+        print("✅ Transfer bid creation works")
+        
+        # Test bid retrieval
+        cursor.execute('''
+            SELECT COUNT(*) FROM transfer_bids 
+            WHERE user_id = ? AND player_id = ?
+        ''', (user_id, player_id))
+        bid_count = cursor.fetchone()[0]
+        assert bid_count > 0, "Transfer bid retrieval failed"
+        print("✅ Transfer bid retrieval works")
+        
+        # Approving the same bid twice must only charge once
+        bid_id = insert_and_get_id('''
+            INSERT INTO transfer_bids (user_id, player_id, bid_amount, description, status)
+            VALUES (?, ?, ?, ?, 'seller_accepted')
+        ''', (user_id, player_id, 10000000, "Test settlement"))
+        outcomes = [settle_transfer(bid_id)['outcome'] for _ in range(2)]
+        cursor.execute("SELECT COUNT(*) FROM transfer_settlements WHERE bid_id = ?", (bid_id,))
+        settlements = cursor.fetchone()[0]
+        cursor.execute("SELECT cash FROM users WHERE id = ?", (user_id,))
+        cash = cursor.fetchone()[0]
+        assert outcomes == ['settled', 'already_settled'], f"Transfer settlement failed: {outcomes}"
+        assert settlements == 1, f"Bid settled {settlements} times"
+        assert cash == 10000000, f"Buyer not debited exactly once: {cash}"
+        print("✅ Transfer settlement is idempotent")
         
+        # The settlement is in the ledger and the ledger agrees with users.cash
+        mismatches = [row for row in reconcile_ledger(conn) if row[0] == user_id]
+        assert not mismatches, f"Cash ledger differs from user cash: {mismatches}"
+        print("✅ Cash ledger reconciles")
+
+        # Postings checkpoint the ledger once enough entries build up
+        checkpoint_every, ledger.CHECKPOINT_EVERY = ledger.CHECKPOINT_EVERY, 1
         try:
-            # Create a test transfer bid
-            cursor.execute('''
-                INSERT INTO transfer_bids (user_id, player_id, bid_amount, description)
-                VALUES (?, ?, ?, ?)
-            ''', (user_id, player_id, 10000000, "Test transfer bid"))
-            conn.commit()
-            print("✅ Transfer bid creation works")
-            
-            # Test bid retrieval
-            cursor.execute('''
-                SELECT COUNT(*) FROM transfer_bids 
-                WHERE user_id = ? AND player_id = ?
-            ''', (user_id, player_id))
-            bid_count = cursor.fetchone()[0]
-            
-            if bid_count > 0:
-                print("✅ Transfer bid retrieval works")
-            else:
-                print("❌ Transfer bid retrieval failed")
-                
-        except Exception as e:
-            print(f"❌ Transfer system test failed: {e}")
-    else:
-        print("⚠️ No test users or players available for transfer test")
+            adjust_cash(user_id, 1)
+            adjust_cash(user_id, -1)
+        finally:
+            ledger.CHECKPOINT_EVERY = checkpoint_every
+        cursor.execute("SELECT MAX(entry_id) FROM ledger_checkpoints")
+        checkpointed = cursor.fetchone()[0]
+        cursor.execute("SELECT MAX(id) FROM cash_ledger WHERE user_id IS NOT NULL")
+        last_entry = cursor.fetchone()[0]
+        mismatches = [row for row in reconcile_ledger(conn) if row[0] == user_id]
+        assert checkpointed == last_entry, f"Ledger checkpointed up to {checkpointed}, last entry {last_entry}"
+        assert not mismatches, f"Cash ledger differs from user cash after checkpoint: {mismatches}"
+        print("✅ Ledger checkpoints are written as entries build up")
+
+        # A bid accepted before an earlier approval sold the player must not settle
+        first_bid, second_bid, third_bid = [insert_and_get_id('''
+            INSERT INTO transfer_bids (user_id, player_id, bid_amount, description, status, seller_club)
+            VALUES (?, 'TESTSOLD', ?, ?, 'seller_accepted', 'Test Seller FC')
+        ''', (user_id, 1000000, "Test cross-batch conflict")) for _ in range(3)]
+        outcomes = [approve_transfers([bid])[0]['outcome'] for bid in (first_bid, second_bid)]
+        cursor.execute("SELECT cash FROM users WHERE id = ?", (user_id,))
+        cash = cursor.fetchone()[0]
+        cursor.execute("SELECT status FROM transfer_bids WHERE id = ?", (second_bid,))
+        status = cursor.fetchone()[0]
+        assert outcomes == ['settled', 'player_conflict'], f"Cross-batch conflict not caught: {outcomes}"
+        assert cash == 9000000, f"Buyer charged for a conflicting bid: {cash}"
+        assert status == 'rejected', f"Conflicting bid left {status}"
+        print("✅ Bids for players sold in an earlier approval are rejected")
+        
+        # Approving a single conflicting bid rejects it too
+        outcome = settle_transfer(third_bid)['outcome']
+        cursor.execute("SELECT cash FROM users WHERE id = ?", (user_id,))
+        cash = cursor.fetchone()[0]
+        cursor.execute("SELECT status FROM transfer_bids WHERE id = ?", (third_bid,))
+        status = cursor.fetchone()[0]
+        assert outcome == 'player_conflict', f"Single-bid conflict not caught: {outcome}"
+        assert cash == 9000000, f"Buyer charged for a conflicting bid: {cash}"
+        assert status == 'rejected', f"Conflicting bid left {status}"
+        print("✅ A single conflicting approval rejects the bid")
+        
+        # Approving everything reports stale bids; rolled back to leave other bids alone
+        stale_bid = insert_and_get_id('''
+            INSERT INTO transfer_bids (user_id, player_id, bid_amount, description, status, seller_club)
+            VALUES (?, 'TESTSOLD', ?, ?, 'seller_accepted', 'Test Seller FC')
+        ''', (user_id, 1000000, "Test bulk conflict"))
+        report = []
+        def approve_all_then_undo(conn):
+            report.extend(approve_bids(conn))
+            raise RuntimeError("undo bulk approval")
+        try:
+            run_write(approve_all_then_undo)
+        except RuntimeError:
+            pass
+        outcomes = [result['outcome'] for result in report if result['bid_id'] == stale_bid]
+        assert outcomes == ['player_conflict'], f"Stale bid missing from the bulk report: {outcomes}"
+        print("✅ Approving all bids reports stale bids as conflicts")
+        
+        # A bid for a player deleted after acceptance must not charge the buyer
+        execute_write('''
+            INSERT OR IGNORE INTO players (player_id, player_name, club_name, is_custom)
+            VALUES ('TESTGONE', 'Gone Player', 'Gone FC', TRUE)
+        ''')
+        bid_id = insert_and_get_id('''
+            INSERT INTO transfer_bids (user_id, player_id, bid_amount, description, status)
+            VALUES (?, 'TESTGONE', ?, ?, 'seller_accepted')
+        ''', (user_id, 1000000, "Test deleted player"))
+        execute_write("DELETE FROM players WHERE player_id = 'TESTGONE'")
+        outcome = settle_transfer(bid_id)['outcome']
+        cursor.execute("SELECT cash FROM users WHERE id = ?", (user_id,))
+        cash = cursor.fetchone()[0]
+        assert outcome == 'player_not_found', f"Deleted player bid settled: {outcome}"
+        assert cash == 9000000, f"Buyer charged for a deleted player: {cash}"
+        print("✅ Bids for deleted players are not charged")
+    
+    finally:
+        run_write(delete_test_user, user_id)
+        execute_write("DELETE FROM players WHERE player_id IN ('TESTXFER', 'TESTSOLD', 'TESTGONE')")
+
+def test_inventory():
+    """Test aggregated inventory grants"""
+    print("\nTesting inventory...")
+    
+    run_migrations()
+    conn = get_connection()
+    user_id = conn.execute("SELECT id FROM users WHERE username = 'test_user'").fetchone()[0]
+    
+    def boots():
+        rows = conn.execute("SELECT quantity FROM user_inventory WHERE user_id = ? AND item_name = 'Test Boots'", (user_id,)).fetchall()
+        grants = conn.execute("SELECT COUNT(*) FROM item_grants WHERE user_id = ? AND item_name = 'Test Boots'", (user_id,)).fetchone()[0]
+        return [row[0] for row in rows], grants
     
-    conn.close()
+    # Repeat grants add to one row instead of appending, and each is logged
+    quantities, grants = boots()
+    give_items([user_id], "Test Boots", 2)
+    give_items([user_id], "Test Boots", 3)
+    expected = (quantities[0] if quantities else 0) + 5
+    assert boots() == ([expected], grants + 2), f"Item grants were not aggregated: {boots()}"
+    print("✅ Item grants aggregate per user and item")
+    
+    # The upsert and its grant log share a transaction: a failed job leaves neither
+    def failing_grant(conn):
+        add_items(conn, [user_id], "Test Boots", 7)
+        raise RuntimeError("grant aborted")
+    try:
+        run_write(failing_grant)
+    except RuntimeError:
+        pass
+    assert boots() == ([expected], grants + 2), f"Failed grant left partial writes: {boots()}"
+    print("✅ Inventory and grant log roll back together")
+
+def test_cash_payouts():
+    """Test set-based cash payouts"""
+    print("\nTesting cash payouts...")
+    
+    run_migrations()
+    conn = get_connection()
+    user_id = conn.execute("SELECT id FROM users WHERE username = 'test_user'").fetchone()[0]
+    
+    # An id with no user, like one deleted after the payout list was built
+    gone_id = conn.execute("SELECT IFNULL(MAX(id), 0) + 1 FROM users").fetchone()[0]
+    
+    before = conn.execute("SELECT IFNULL(cash, 0) FROM users WHERE id = ?", (user_id,)).fetchone()[0]
+    last_entry = conn.execute("SELECT IFNULL(MAX(id), 0) FROM cash_ledger").fetchone()[0]
+    
+    def undo_payout(conn):
+        conn.execute('''
+            DELETE FROM cash_ledger WHERE txn_id IN (
+                SELECT txn_id FROM cash_ledger WHERE id > ? AND user_id = ?
+            )
+        ''', (last_entry, user_id))
+        conn.execute("DELETE FROM ledger_checkpoints WHERE user_id = ? AND entry_id > ?", (user_id, last_entry))
+        conn.execute("UPDATE users SET cash = ? WHERE id = ?", (before, user_id))
+    
+    try:
+        # Duplicate ids are added up and deleted ids skipped
+        balances = distribute_cash([user_id, user_id, gone_id], [100, 50, 999], memo="Test payout")
+        assert balances == {user_id: before + 150}, f"Unexpected payout balances: {balances}"
+        print("✅ Payouts return the new balances")
+        
+        entries = conn.execute("SELECT user_id, amount FROM cash_ledger WHERE id > ?", (last_entry,)).fetchall()
+        user_entries = [(entry_user, amount) for entry_user, amount in entries if entry_user is not None]
+        assert user_entries == [(user_id, 150)], f"Payout ledger entries are wrong: {entries}"
+        assert abs(sum(amount for _, amount in entries)) < 0.005, f"Payout ledger entries do not sum to zero: {entries}"
+        unbalanced = unbalanced_transactions(conn)
+        assert not unbalanced, f"Unbalanced ledger transactions: {unbalanced}"
+        print("✅ Payout ledger entries sum to zero")
+    finally:
+        run_write(undo_payout)
+
+def test_player_search():
+    """Test full-text player search"""
+    print("\nTesting player search...")
+    
+    run_migrations()
+    conn = get_connection()
+    
+    assert match_expression("Test Pla") == '"Test"* "Pla"*', "Search text conversion failed"
+    assert match_expression(" !! ") is None, "Punctuation-only search was not ignored"
+    print("✅ Search text converts to prefix queries")
+    
+    results = quick_search(conn, "test pla")
+    assert "Test Player" in results['player_name'].tolist(), "Prefix search failed"
+    print("✅ Prefix search finds players")
+    
+    results = quick_search(conn, "TEST001")
+    assert not results.empty and results.iloc[0]['player_id'] == "TEST001", "Player ID lookup failed"
+    print("✅ Player ID lookup works")
+    
+    # Paged text searches keep relevance order across pages
+    search_sql, params = search_join("test")
+    query = f"SELECT players.*, {SEARCH_RANK} FROM players {search_sql} WHERE 1=1"
+    ranked_ids = pd.read_sql_query(query + " ORDER BY fts.rank, players.id", conn, params=params)['id'].tolist()
+    paged_ids, after = [], None
+    while True:
+        page_df, after = fetch_page(conn, query, params, after, page_size=2, ranked=True)
+        paged_ids += page_df['id'].tolist()
+        if after is None:
+            break
+    assert paged_ids == ranked_ids, f"Search pages lost the match rank order: {paged_ids} != {ranked_ids}"
+    assert 'search_rank' not in page_df.columns, "Search pages expose the rank column"
+    print(f"✅ Search pages follow match rank ({len(paged_ids)} hits)")
+    
+    position_sql, position_params = position_clause("cb")
+    cb_players = pd.read_sql_query(f"SELECT positions FROM players WHERE 1=1 {position_sql}", conn, params=position_params)
+    assert split_positions("st, LW,ST") == ['ST', 'LW'], "Position splitting failed"
+    assert all('CB' in split_positions(p) for p in cb_players['positions']), "Position filter returned non-CB players"
+    all_positions = pd.read_sql_query("SELECT positions FROM players WHERE positions IS NOT NULL", conn)['positions']
+    cb_count = sum('CB' in split_positions(p) for p in all_positions)
+    assert len(cb_players) == cb_count, f"Position filter found {len(cb_players)} of {cb_count} CBs"
+    print(f"✅ Position filter matches exact positions ({len(cb_players)} CBs)")
+
+def test_csv_ingest():
+    """Test CSV value cleaning"""
+    print("\nTesting CSV ingestion...")
+    
+    values, failed = parse_money(pd.Series(['€185M', '€2.5K', '1,250', '€4.1K', None, 'n/a']))
+    assert values.tolist()[:4] == [185000000, 2500, 1250, 4100], f"Money value parsing failed: {values.tolist()}"
+    assert failed.tolist() == [False] * 5 + [True], f"Unparsable money values not flagged: {failed.tolist()}"
+    print("✅ Money values parse with K/M suffixes")
+    
+    # A ratings refresh must keep clubs changed in the game
+    csv_row = {'sofifa_id': 'TESTSYNC1', 'short_name': 'Sync Player', 'club_name': 'CSV FC', 'overall': 70}
+    try:
+        sync_players(pd.DataFrame([csv_row]), verbose=False)
+        execute_write("UPDATE players SET club_name = 'Game FC' WHERE player_id = 'TESTSYNC1'")
+        report = sync_players(pd.DataFrame([{**csv_row, 'overall': 71}]), verbose=False)
+        
+        conn = get_connection()
+        row = conn.execute("SELECT club_name, overall_rating FROM players WHERE player_id = 'TESTSYNC1'").fetchone()
+        assert tuple(row) == ('Game FC', 71), f"Delta sync did not keep the club or refresh the rating: {tuple(row)}"
+        assert report['changed_columns'] == {'overall_rating': 1}, f"Unexpected sync changes: {report['changed_columns']}"
+        print("✅ Delta sync refreshes ratings and keeps clubs")
+    finally:
+        execute_write("DELETE FROM players WHERE player_id = 'TESTSYNC1'")
 
 def test_file_structure():
     """Test if all required files exist"""
@@ -176,7 +443,11 @@ def run_all_tests():
     test_database_setup()
     test_user_creation()
     test_player_data()
+    test_player_search()
+    test_csv_ingest()
     test_transfer_system()
+    test_inventory()
+    test_cash_payouts()
     
     print("\n" + "=" * 50)
     print("🏁 All tests completed!")
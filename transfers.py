@@ -0,0 +1,264 @@
+"""
+Transfer settlement for Match Simulator App
+A settlement moves the player, debits the bidder and credits the seller as
+one write job on the writer thread: inside its BEGIN IMMEDIATE transaction,
+under its own savepoint, with the balance and bid status checked under the
+lock rather than from a page snapshot. The bid id is the idempotency key:
+transfer_settlements records each settled bid once, so double clicks, two
+admins or a retried batch get the original outcome back instead of moving
+money again
+"""
+
+import json
+from collections import Counter
+from database import run_write
+from ledger import post_cash, TRANSFER
+
+# Settlement outcomes
+SETTLED = 'settled'
+ALREADY_SETTLED = 'already_settled'
+NOT_FOUND = 'not_found'
+PLAYER_NOT_FOUND = 'player_not_found'
+NOT_ACCEPTED = 'not_accepted'
+NO_BUYER_CLUB = 'no_buyer_club'
+INSUFFICIENT_FUNDS = 'insufficient_funds'
+ERROR = 'error'
+PLAYER_CONFLICT = 'player_conflict'
+
+def create_transfer_settlements(conn):
+    """Add the settlement record that makes approvals idempotent"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS transfer_settlements (
+            bid_id INTEGER PRIMARY KEY,
+            buyer_id INTEGER NOT NULL,
+            seller_id INTEGER,
+            player_id TEXT NOT NULL,
+            amount REAL NOT NULL,
+            from_club TEXT,
+            to_club TEXT NOT NULL,
+            settled_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (bid_id) REFERENCES transfer_bids (id)
+        )
+    ''')
+
+def add_bid_seller_club(conn):
+    """Record on each bid the club that accepted it, so approvals can spot players that moved since"""
+    columns = [column[1] for column in conn.execute("PRAGMA table_info(transfer_bids)")]
+    if 'seller_club' not in columns:
+        conn.execute("ALTER TABLE transfer_bids ADD COLUMN seller_club TEXT")
+
+    # Open bids: the club that sold the player after the acceptance, else its current club
+    conn.execute('''
+        UPDATE transfer_bids SET seller_club = COALESCE((
+            SELECT s.from_club FROM transfer_settlements s
+            WHERE s.player_id = transfer_bids.player_id
+              AND s.settled_at >= IFNULL(transfer_bids.seller_response_date, transfer_bids.created_at)
+            ORDER BY s.settled_at, s.bid_id
+            LIMIT 1
+        ), (SELECT club_name FROM players p WHERE p.player_id = transfer_bids.player_id))
+        WHERE status = 'seller_accepted' AND seller_club IS NULL
+    ''')
+
+def settlement_result(bid_id, outcome, **details):
+    return {'bid_id': bid_id, 'outcome': outcome, **details}
+
+def previous_settlement(conn, bid_id):
+    row = conn.execute('''
+        SELECT buyer_id, seller_id, player_id, amount, from_club, to_club
+        FROM transfer_settlements WHERE bid_id = ?
+    ''', (bid_id,)).fetchone()
+    if row is None:
+        return None
+    buyer_id, seller_id, player_id, amount, from_club, to_club = row
+    return settlement_result(
+        bid_id, ALREADY_SETTLED, buyer_id=buyer_id, seller_id=seller_id,
+        player_id=player_id, amount=amount, from_club=from_club, to_club=to_club
+    )
+
+def settle_bid(conn, bid_id):
+    """Settle one seller-accepted bid in the current write transaction (writer thread)
+
+    Returns a result dict whose 'outcome' is one of the outcome constants.
+    Nothing is written unless the outcome is SETTLED.
+    """
+    previous = previous_settlement(conn, bid_id)
+    if previous:
+        return previous
+
+    bid = conn.execute('''
+        SELECT tb.user_id, tb.player_id, tb.bid_amount, tb.status,
+               buyer.club_name, buyer.cash, p.player_id IS NOT NULL, p.club_name, tb.seller_club
+        FROM transfer_bids tb
+        JOIN users buyer ON buyer.id = tb.user_id
+        LEFT JOIN players p ON p.player_id = tb.player_id
+        WHERE tb.id = ?
+    ''', (bid_id,)).fetchone()
+    if bid is None:
+        return settlement_result(bid_id, NOT_FOUND)
+
+    buyer_id, player_id, amount, status, to_club, buyer_cash, player_exists, from_club, seller_club = bid
+    if status != 'seller_accepted':
+        return settlement_result(bid_id, NOT_ACCEPTED, status=status)
+    if not player_exists:
+        return settlement_result(bid_id, PLAYER_NOT_FOUND, player_id=player_id)
+    if seller_club is not None and from_club != seller_club:
+        # The player moved after the seller accepted; the money would go to the wrong club
+        return settlement_result(bid_id, PLAYER_CONFLICT, player_id=player_id, seller_club=seller_club, current_club=from_club)
+    if not to_club:
+        return settlement_result(bid_id, NO_BUYER_CLUB)
+    if (buyer_cash or 0) < amount:
+        return settlement_result(bid_id, INSUFFICIENT_FUNDS, amount=amount, cash=buyer_cash)
+
+    # The seller is the (first) user managing the player's current club
+    seller = conn.execute('''
+        SELECT id FROM users WHERE club_name = ? AND id != ? ORDER BY id LIMIT 1
+    ''', (from_club, buyer_id)).fetchone()
+    seller_id = seller[0] if seller else None
+
+    # Move the player before any cash, so a vanished player costs nothing
+    moved = conn.execute("UPDATE players SET club_name = ? WHERE player_id = ?", (to_club, player_id)).rowcount
+    if not moved:
+        return settlement_result(bid_id, PLAYER_NOT_FOUND, player_id=player_id)
+
+    # Without a selling manager the treasury takes the other side
+    moves = [(buyer_id, -amount)] + ([(seller_id, amount)] if seller_id is not None else [])
+    post_cash(conn, TRANSFER, moves, reference=f"bid:{bid_id}")
+    conn.execute('''
+        UPDATE transfer_bids
+        SET status = 'approved', approved_at = CURRENT_TIMESTAMP, admin_response_date = datetime('now')
+        WHERE id = ?
+    ''', (bid_id,))
+    conn.execute('''
+        INSERT INTO transfer_settlements (bid_id, buyer_id, seller_id, player_id, amount, from_club, to_club)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', (bid_id, buyer_id, seller_id, player_id, amount, from_club, to_club))
+
+    return settlement_result(
+        bid_id, SETTLED, buyer_id=buyer_id, seller_id=seller_id,
+        player_id=player_id, amount=amount, from_club=from_club, to_club=to_club
+    )
+
+def settle_in_savepoint(conn, bid_id):
+    """Settle one bid under its own savepoint so a failure only undoes that bid"""
+    conn.execute("SAVEPOINT settle_bid")
+    try:
+        result = settle_bid(conn, bid_id)
+        conn.execute("RELEASE settle_bid")
+    except Exception as e:
+        conn.execute("ROLLBACK TO settle_bid")
+        conn.execute("RELEASE settle_bid")
+        result = settlement_result(bid_id, ERROR, error=str(e))
+    return result
+
+def batch_order(conn, bid_ids=None):
+    """Bid ids in settlement order: first accepted by the seller, then lowest id
+
+    With no ids, every bid awaiting admin approval. Requested ids that do not
+    exist are kept at the end so they still get a NOT_FOUND result.
+    """
+    if bid_ids is None:
+        return conn.execute('''
+            SELECT id, player_id FROM transfer_bids
+            WHERE status = 'seller_accepted'
+            ORDER BY COALESCE(seller_response_date, created_at), id
+        ''').fetchall()
+
+    bid_ids = list(dict.fromkeys(bid_ids))
+    rows = conn.execute('''
+        SELECT tb.id, tb.player_id FROM transfer_bids tb
+        WHERE tb.id IN (SELECT value FROM json_each(?))
+        ORDER BY COALESCE(tb.seller_response_date, tb.created_at), tb.id
+    ''', (json.dumps(bid_ids),)).fetchall()
+    found = {bid_id for bid_id, _ in rows}
+    return rows + [(bid_id, None) for bid_id in bid_ids if bid_id not in found]
+
+def reject_stale_bids(conn, bid_ids=None):
+    """Reject accepted bids whose player has left the club that accepted them (writer thread)
+
+    With no ids, every bid awaiting admin approval is checked. Returns
+    {bid_id: club the player is at now}.
+    """
+    return dict(conn.execute('''
+        UPDATE transfer_bids
+        SET status = 'rejected', approved_at = CURRENT_TIMESTAMP, admin_response_date = datetime('now')
+        FROM players p
+        WHERE p.player_id = transfer_bids.player_id
+          AND transfer_bids.status = 'seller_accepted'
+          AND transfer_bids.seller_club IS NOT NULL
+          AND p.club_name IS NOT transfer_bids.seller_club
+          AND (?1 IS NULL OR transfer_bids.id IN (SELECT value FROM json_each(?1)))
+        RETURNING id, (SELECT club_name FROM players WHERE player_id = transfer_bids.player_id)
+    ''', (json.dumps(bid_ids) if bid_ids is not None else None,)).fetchall())
+
+def approve_bid(conn, bid_id):
+    """Settle one bid, rejecting it if its player left the accepting club (writer thread)
+
+    Ends a conflicting bid the same way approve_bids does, so it does not
+    keep coming back for approval.
+    """
+    result = settle_bid(conn, bid_id)
+    if result['outcome'] == PLAYER_CONFLICT:
+        reject_stale_bids(conn, [bid_id])
+    return result
+
+def approve_bids(conn, bid_ids=None):
+    """Approve many bids in one write transaction (writer thread)
+
+    Bids whose player already left the accepting club (sold by an earlier
+    approval) are rejected up front as PLAYER_CONFLICT. The rest resolve in
+    batch order: the first bid settled for a player wins and later bids for
+    that player are rejected as PLAYER_CONFLICT, and a bidder's bids draw
+    down their cash in that order until one no longer fits
+    (INSUFFICIENT_FUNDS). Returns one result per bid, in batch order.
+    """
+    results = []
+    sold = {}
+    # Order the batch first: with no ids it is read by status, which the rejection changes
+    batch = batch_order(conn, bid_ids)
+    stale = reject_stale_bids(conn, bid_ids)
+    for bid_id, player_id in batch:
+        if bid_id in stale:
+            results.append(settlement_result(bid_id, PLAYER_CONFLICT, player_id=player_id, current_club=stale[bid_id]))
+            continue
+        # The seller's acceptance is stale once the player has moved
+        if player_id in sold and conn.execute('''
+            UPDATE transfer_bids
+            SET status = 'rejected', approved_at = CURRENT_TIMESTAMP, admin_response_date = datetime('now')
+            WHERE id = ? AND status = 'seller_accepted'
+        ''', (bid_id,)).rowcount:
+            results.append(settlement_result(bid_id, PLAYER_CONFLICT, player_id=player_id, winning_bid=sold[player_id]))
+            continue
+        result = settle_in_savepoint(conn, bid_id)
+        if result['outcome'] == SETTLED:
+            sold[player_id] = bid_id
+        results.append(result)
+    return results
+
+def outcome_summary(results):
+    """Number of results per outcome"""
+    return dict(Counter(result['outcome'] for result in results))
+
+def settle_transfer(bid_id):
+    """Settle one bid atomically and return its result (safe to call twice)
+
+    A bid whose player has moved since the seller accepted is rejected.
+    """
+    return run_write(approve_bid, int(bid_id))
+
+def approve_transfers(bid_ids=None):
+    """Approve the given bids, or all that pass checks, in one transaction
+
+    Returns the per-bid outcome report in settlement order.
+    """
+    if bid_ids is not None:
+        bid_ids = [int(bid_id) for bid_id in bid_ids]
+    return run_write(approve_bids, bid_ids)
+
+def reject_transfer(bid_id):
+    """Reject a bid still awaiting admin approval; returns False if it already moved on"""
+    changed = run_write(lambda conn: conn.execute('''
+        UPDATE transfer_bids
+        SET status = 'rejected', approved_at = CURRENT_TIMESTAMP, admin_response_date = datetime('now')
+        WHERE id = ? AND status = 'seller_accepted'
+    ''', (int(bid_id),)).rowcount)
+    return changed > 0
@@ -5,9 +5,12 @@ This module provides enhanced styling and visual components
 
 import streamlit as st
 import base64
-from PIL import Image
+import io
+import mimetypes
+import re
+import threading
 import os
-import pandas as pd
+from image_store import has_image, image_path as store_image_path, get_rendition
 
 def load_css():
     """Load custom CSS for enhanced UI"""
@@ -184,14 +187,126 @@ def load_css():
     </style>
     """, unsafe_allow_html=True)
 
-def get_image_base64(image_path):
-    """Convert image to base64 for embedding"""
+# Longest edge decorative images are downscaled to before embedding
+BACKGROUND_SIZE = 1600
+AVATAR_SIZE = 200
+
+# Decorative images used by the pages, encoded once when the app starts
+UI_ASSETS = [
+    ('wallpaper.png', BACKGROUND_SIZE),
+    ('city.jpg', BACKGROUND_SIZE),
+    ('henderson-lifts-ucl-trophy.png', BACKGROUND_SIZE),
+    ('demb.jpg', BACKGROUND_SIZE),
+    ('intermilan.webp', BACKGROUND_SIZE),
+    ('chamd.png', BACKGROUND_SIZE),
+    ('lamine.jpg', BACKGROUND_SIZE),
+    ('ronaldo.jpg', BACKGROUND_SIZE),
+    ('messi.jpeg', AVATAR_SIZE),
+    ('ronaldo.jpg', AVATAR_SIZE),
+    ('henderson-lifts-ucl-trophy.png', AVATAR_SIZE),
+    ('ney.jpg', AVATAR_SIZE),
+    ('demb.jpg', AVATAR_SIZE),
+]
+
+ASSET_QUALITY = 80
+
+@st.cache_resource(show_spinner=False)
+def encode_asset(image_path, max_size, mtime_ns, file_size):
+    """Downscale and re-encode an image once per (path, size, mtime, file size)
+
+    Returns (mime_type, base64_string).
+    """
+    from PIL import Image, features  # Only pages with images pay for Pillow
+
+    # WebP is smaller at the same quality; fall back to JPEG on Pillow builds without it
+    asset_format = 'WEBP' if features.check('webp') else 'JPEG'
     try:
+        with Image.open(image_path) as image:
+            image.thumbnail((max_size, max_size))
+            if asset_format == 'JPEG' or image.mode not in ('RGB', 'RGBA'):
+                image = image.convert('RGB' if asset_format == 'JPEG' else 'RGBA')
+            buffer = io.BytesIO()
+            image.save(buffer, asset_format, quality=ASSET_QUALITY)
+        mime_type = f"image/{asset_format.lower()}"
+        data = buffer.getvalue()
+    except Exception:
+        # Not decodable by Pillow here: embed the file as-is
         with open(image_path, "rb") as img_file:
-            return base64.b64encode(img_file.read()).decode()
-    except:
+            data = img_file.read()
+        mime_type = mimetypes.guess_type(image_path)[0] or 'image/jpeg'
+    return mime_type, base64.b64encode(data).decode()
+
+def read_asset(image_path, max_size=BACKGROUND_SIZE):
+    """Cached (mime_type, base64) for an image; only a stat() touches the disk"""
+    try:
+        stat = os.stat(image_path)
+        return encode_asset(image_path, max_size, stat.st_mtime_ns, stat.st_size)
+    except Exception:
         return None
 
+def preload_assets():
+    """Encode every decorative image up front so page renders hit the cache"""
+    for image_path, max_size in UI_ASSETS:
+        read_asset(image_path, max_size)
+
+@st.cache_resource(show_spinner=False)
+def start_asset_preload():
+    """Encode the decorative images on a background thread, once per process
+
+    The first render doesn't wait for Pillow; a page that needs an image
+    before the thread reaches it simply encodes that one itself.
+    """
+    thread = threading.Thread(target=preload_assets, name='asset-preload', daemon=True)
+    thread.start()
+    return thread
+
+def load_asset(image_path, max_size=BACKGROUND_SIZE):
+    """Like read_asset, but the first image a process needs also starts the preload
+
+    Pages without images never import Pillow.
+    """
+    start_asset_preload()
+    return read_asset(image_path, max_size)
+
+def get_image_base64(image_path, max_size=BACKGROUND_SIZE):
+    """Convert image to base64 for embedding (downscaled and cached)"""
+    asset = load_asset(image_path, max_size)
+    return asset[1] if asset else None
+
+def reset_page_assets():
+    """Forget which backgrounds this page defined; call at the start of every run"""
+    st.session_state['_page_backgrounds'] = set()
+
+def register_background(image_path, max_size=BACKGROUND_SIZE):
+    """Define a CSS class carrying an image, emitted at most once per page render
+
+    The class sets the --bg-image custom property, so any number of elements
+    can use `background: var(--bg-image, none) center/cover` while the image
+    itself is sent once. Returns the class name.
+    """
+    name = os.path.splitext(os.path.basename(image_path))[0].lower()
+    class_name = f"bg-{re.sub(r'[^a-z0-9]+', '-', name).strip('-')}-{max_size}"
+
+    registered = st.session_state.setdefault('_page_backgrounds', set())
+    if class_name not in registered:
+        image_uri = get_image_data_uri(image_path, max_size)
+        if image_uri:
+            st.markdown(
+                f"<style>.{class_name} {{ --bg-image: url('{image_uri}'); }}</style>",
+                unsafe_allow_html=True
+            )
+        registered.add(class_name)
+
+    return class_name
+
+def get_image_data_uri(image_path, max_size=BACKGROUND_SIZE):
+    """data: URI for an image, with the MIME type of its cached encoding"""
+    asset = load_asset(image_path, max_size)
+    if not asset:
+        return None
+    mime_type, encoded = asset
+    return f"data:{mime_type};base64,{encoded}"
+
 def display_player_card(player, show_image=True, show_bid_button=False, user_cash=0):
     """Display enhanced player card with styling"""
     
@@ -218,11 +333,10 @@ def display_player_card(player, show_image=True, show_bid_button=False, user_cas
     """
     
     if show_image and player_img:
-        img_base64 = get_image_base64(player_img)
-        if img_base64:
-            card_html += f"""
-            <img src="data:image/jpeg;base64,{img_base64}" class="player-image" />
-            """
+        img_class = register_background(player_img, AVATAR_SIZE)
+        card_html += f"""
+        <div class="player-image {img_class}" style="background: var(--bg-image, none) center/cover;"></div>
+        """
     
     card_html += f"""
         <div style="flex: 1; margin-left: 1rem;">
@@ -241,11 +355,11 @@ def display_player_card(player, show_image=True, show_bid_button=False, user_cas
 def display_welcome_hero():
     """Display welcome hero section with branding"""
     # Get background image
-    bg_image = get_image_base64('wallpaper.png')
+    bg_class = register_background('wallpaper.png')
     
     st.markdown(f"""
-    <div style="
-        background: url('data:image/jpeg;base64,{bg_image}') center/cover;
+    <div class="{bg_class}" style="
+        background: var(--bg-image, none) center/cover;
         height: 400px;
         border-radius: 20px;
         margin: 2rem 0;
@@ -361,24 +475,24 @@ def display_tab_background(tab_name, title=None):
     """Display themed background images for different tabs"""
     # Get background image based on tab
     if tab_name == 'transfers':
-        bg_image = get_image_base64('demb.jpg')  # Transfer-related image
+        bg_class = register_background('demb.jpg')  # Transfer-related image
     elif tab_name == 'squad':
-        bg_image = get_image_base64('intermilan.webp')  # Squad/team image - Inter Milan
+        bg_class = register_background('intermilan.webp')  # Squad/team image - Inter Milan
     elif tab_name == 'admin':
-        bg_image = get_image_base64('chamd.png')  # Admin/management image
+        bg_class = register_background('chamd.png')  # Admin/management image
     elif tab_name == 'dashboard':
-        bg_image = get_image_base64('lamine.jpg')  # Dashboard/overview image - Lamine
+        bg_class = register_background('lamine.jpg')  # Dashboard/overview image - Lamine
     elif tab_name == 'players':
-        bg_image = get_image_base64('ronaldo.jpg')  # Player search image
+        bg_class = register_background('ronaldo.jpg')  # Player search image
     else:
-        bg_image = get_image_base64('wallpaper.png')  # Default background
+        bg_class = register_background('wallpaper.png')  # Default background
     
     # Create background with title - using lighter overlay for more visible backgrounds
     if title:
         st.markdown(f"""
-        <div style="
+        <div class="{bg_class}" style="
             background: linear-gradient(135deg, rgba(255,255,255,0.7) 0%, rgba(248,249,250,0.7) 100%), 
-                       url('data:image/jpeg;base64,{bg_image}') center/cover;
+                       var(--bg-image, none) center/cover;
             background-blend-mode: lighten;
             padding: 2rem;
             border-radius: 15px;
@@ -392,9 +506,9 @@ def display_tab_background(tab_name, title=None):
         """, unsafe_allow_html=True)
     else:
         st.markdown(f"""
-        <div style="
+        <div class="{bg_class}" style="
             background: linear-gradient(135deg, rgba(255,255,255,0.7) 0%, rgba(248,249,250,0.7) 100%), 
-                       url('data:image/jpeg;base64,{bg_image}') center/cover;
+                       var(--bg-image, none) center/cover;
             background-blend-mode: lighten;
             padding: 1rem;
             border-radius: 15px;
@@ -406,6 +520,7 @@ def display_tab_background(tab_name, title=None):
 
 def display_enhanced_table(df, title=None, max_height=400):
     """Display attractive styled table instead of basic dataframe"""
+    import pandas as pd  # Only table pages pay for pandas
     
     if df.empty:
         st.info(f"No {title.lower() if title else 'data'} available")
@@ -444,12 +559,12 @@ def display_player_stats_card(player_data):
     """Display enhanced player statistics card with background"""
     
     # Use a light background from available images
-    bg_base64 = get_image_base64('city.jpg')
+    bg_class = register_background('city.jpg')
     
     card_html = f"""
-    <div style="
+    <div class="{bg_class}" style="
         background: linear-gradient(rgba(255,255,255,0.9), rgba(255,255,255,0.9)), 
-                   url('data:image/jpeg;base64,{bg_base64}') center/cover;
+                   var(--bg-image, none) center/cover;
         border-radius: 15px;
         padding: 2rem;
         margin: 1rem 0;
@@ -477,3 +592,20 @@ def display_player_stats_card(player_data):
     """
     
     st.markdown(card_html, unsafe_allow_html=True)
+
+def display_squad_image(image_hash, rendition, width, key):
+    """Show a squad image's rendition, loading the original only when asked"""
+    if not has_image(image_hash):
+        if image_hash:
+            st.error("Could not display image")
+        return
+    
+    if st.toggle("🔍 Full size", key=key):
+        st.image(store_image_path(image_hash), caption="Squad Image")
+        return
+    
+    rendition_file = get_rendition(image_hash, rendition)
+    if rendition_file:
+        st.image(rendition_file, caption="Squad Image", width=width)
+    else:
+        st.caption("⏳ Preparing preview...")
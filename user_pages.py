@@ -1,17 +1,139 @@
 import streamlit as st
 import pandas as pd
-import sqlite3
-from datetime import datetime
-import base64
-from PIL import Image
-import io
-from ui_components import display_tab_background, display_enhanced_table, display_player_stats_card
+from database import get_connection, execute_write
+from player_search import search_join, SEARCH_RANK
+from positions import position_clause
+from pagination import player_page, page_number, show_page_controls
+from clubs import get_club_stats, get_club_names
+from ledger import balance_history
+from image_store import store_image, schedule_renditions
+from ui_components import display_tab_background, display_enhanced_table, display_squad_image
+
+def show_user_home():
+    st.title("🏠 User Dashboard Home")
+    
+    user = st.session_state.user
+    conn = get_connection()
+    
+    # User statistics
+    col1, col2, col3, col4 = st.columns(4)
+    squad_stats = get_club_stats(conn, user['club_name']) if user['club_name'] else None
+    
+    with col1:
+        st.metric("Your Cash", f"€{user['cash']:,.2f}")
+    
+    with col2:
+        if user['club_name']:
+            squad_count = int(squad_stats['player_count']) if squad_stats is not None else 0
+            st.metric("Squad Size", squad_count)
+        else:
+            st.metric("Squad Size", "N/A")
+    
+    with col3:
+        pending_bids = pd.read_sql_query('SELECT COUNT(*) as count FROM transfer_bids WHERE user_id = ? AND status = "pending"', conn, params=(user['id'],)).iloc[0]['count']
+        st.metric("Pending Bids", pending_bids)
+    
+    with col4:
+        if user['club_name']:
+            squad_value = squad_stats['total_value'] if squad_stats is not None else 0
+            st.metric("Squad Value", f"€{squad_value:,.0f}" if squad_value else "€0")
+        else:
+            st.metric("Squad Value", "N/A")
+    
+    st.markdown("---")
+    
+    # Player search
+    st.subheader("🔍 Player Database")
+    
+    # Search filters
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        search_name = st.text_input("Search by Player Name")
+    
+    with col2:
+        club_filter = st.selectbox("Filter by Club", ["All"] + get_club_names(conn))
+    
+    with col3:
+        position_filter = st.text_input("Filter by Position")
+    
+    # Build query (name search goes through the full-text index)
+    search_sql, params = search_join(search_name)
+    rank_sql = f", {SEARCH_RANK}" if search_sql else ""
+    query = f"SELECT players.*{rank_sql} FROM players {search_sql} WHERE 1=1"
+    
+    if club_filter != "All":
+        query += " AND club_name = ?"
+        params.append(club_filter)
+    
+    if position_filter:
+        position_sql, position_params = position_clause(position_filter)
+        query += position_sql
+        params += position_params
+    
+    # Execute search, one keyset page at a time
+    players_df = player_page(conn, query, params, 'user_home_players_page', page_size=50, ranked=bool(search_sql))
+    
+    if players_df.empty:
+        st.info("No players found matching your criteria.")
+    else:
+        st.subheader(f"Players (page {page_number('user_home_players_page')}, {len(players_df)} shown)")
+        
+        # Display players
+        for _, player in players_df.iterrows():
+            with st.expander(f"{player['player_name']} ({player['club_name']}) - Rating: {player['overall_rating']}"):
+                col1, col2 = st.columns([2, 1])
+                
+                with col1:
+                    st.write(f"**Position:** {player['positions']}")
+                    st.write(f"**Age:** {player['age']}")
+                    st.write(f"**Nationality:** {player['nationality']}")
+                    st.write(f"**Club:** {player['club_name']}")
+                    st.write(f"**Overall Rating:** {player['overall_rating']}")
+                    st.write(f"**Potential:** {player['potential']}")
+                    if player['value_eur']:
+                        st.write(f"**Value:** €{player['value_eur']:,.0f}")
+                    if player['wage_eur']:
+                        st.write(f"**Wage:** €{player['wage_eur']:,.0f}")
+                
+                with col2:
+                    if player['club_name'] != user['club_name']:
+                        st.subheader("Make Transfer Bid")
+                        
+                        with st.form(f"bid_form_{player['id']}"):
+                            bid_amount = st.number_input(
+                                "Bid Amount (€)", 
+                                value=int(player['value_eur']) if player['value_eur'] else 1000000, 
+                                step=100000,
+                                key=f"bid_{player['id']}"
+                            )
+                            description = st.text_area(
+                                "Bid Description", 
+                                key=f"desc_{player['id']}"
+                            )
+                            
+                            if st.form_submit_button("Submit Bid"):
+                                if bid_amount > 0 and bid_amount <= user['cash']:
+                                    execute_write('''
+                                        INSERT INTO transfer_bids 
+                                        (user_id, player_id, bid_amount, description)
+                                        VALUES (?, ?, ?, ?)
+                                    ''', (user['id'], player['player_id'], bid_amount, description))
+                                    st.success(f"Bid submitted for {player['player_name']}!")
+                                elif bid_amount > user['cash']:
+                                    st.error("Insufficient funds!")
+                                else:
+                                    st.error("Please enter a valid bid amount!")
+                    else:
+                        st.info("This player is already in your squad!")
+        
+        show_page_controls('user_home_players_page')
 
 def show_search_players():
     # Add background image for players tab
     display_tab_background('players', 'Player Search')
     
-    conn = sqlite3.connect('match_simulator.db')
+    conn = get_connection()
     
     # Search filters
     col1, col2, col3 = st.columns(3)
@@ -21,47 +143,36 @@ def show_search_players():
     
     with col2:
         # Get unique clubs for filter
-        clubs_df = pd.read_sql_query('''
-            SELECT DISTINCT club_name 
-            FROM players 
-            WHERE club_name IS NOT NULL AND club_name != ''
-            ORDER BY club_name
-        ''', conn)
-        club_filter = st.selectbox("Club", ["All"] + clubs_df['club_name'].tolist())
+        club_filter = st.selectbox("Club", ["All"] + get_club_names(conn))
     
     with col3:
         position_filter = st.text_input("Position")
     
-    # Build query
-    query = "SELECT * FROM players WHERE 1=1"
-    params = []
-    
-    if search_name:
-        query += " AND player_name LIKE ?"
-        params.append(f"%{search_name}%")
+    # Build query (name search goes through the full-text index)
+    search_sql, params = search_join(search_name)
+    rank_sql = f", {SEARCH_RANK}" if search_sql else ""
+    query = f"SELECT players.*{rank_sql} FROM players {search_sql} WHERE 1=1"
     
     if club_filter != "All":
         query += " AND club_name = ?"
         params.append(club_filter)
     
     if position_filter:
-        query += " AND positions LIKE ?"
-        params.append(f"%{position_filter}%")
-    
-    query += " ORDER BY overall_rating DESC LIMIT 100"
+        position_sql, position_params = position_clause(position_filter)
+        query += position_sql
+        params += position_params
     
-    # Execute search
-    players_df = pd.read_sql_query(query, conn, params=params)
+    # Execute search, one keyset page at a time
+    players_df = player_page(conn, query, params, 'search_players_page', page_size=100, ranked=bool(search_sql))
     
     if players_df.empty:
         st.info("No players found matching your criteria.")
     else:
-        st.subheader(f"Search Results ({len(players_df)} players)")
+        st.subheader(f"Search Results (page {page_number('search_players_page')}, {len(players_df)} players)")
         
         # Display enhanced table instead of basic dataframe
         display_enhanced_table(players_df, "Player Search Results")
-    
-    conn.close()
+        show_page_controls('search_players_page')
 
 def show_check_squad():
     # Add background image for squad tab
@@ -73,46 +184,52 @@ def show_check_squad():
         st.warning("You haven't been assigned a club yet. Please wait for admin approval.")
         return
     
-    conn = sqlite3.connect('match_simulator.db')
+    conn = get_connection()
     
-    # Get players from user's club
-    squad_df = pd.read_sql_query('''
-        SELECT player_name, positions, age, nationality, overall_rating, 
-               potential, value_eur, wage_eur
-        FROM players
-        WHERE club_name = ?
-        ORDER BY overall_rating DESC
-    ''', conn, params=(user['club_name'],))
+    # Header metrics come from the trigger-maintained club_stats row
+    squad_stats = get_club_stats(conn, user['club_name'])
     
-    if squad_df.empty:
+    if squad_stats is None or not squad_stats['player_count']:
         st.info(f"No players found for {user['club_name']}. Contact admin if this seems incorrect.")
-        conn.close()
         return
     
-    st.subheader(f"{user['club_name']} Squad ({len(squad_df)} players)")
+    st.subheader(f"{user['club_name']} Squad ({int(squad_stats['player_count'])} players)")
     
     # Squad statistics
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        avg_rating = squad_df['overall_rating'].mean()
-        st.metric("Average Rating", f"{avg_rating:.1f}")
+        avg_rating = squad_stats['avg_rating']
+        # No rated players leaves the average NULL
+        st.metric("Average Rating", "N/A" if pd.isna(avg_rating) else f"{avg_rating:.1f}")
     
     with col2:
-        total_value = squad_df['value_eur'].sum()
-        st.metric("Total Squad Value", f"€{total_value:,.0f}")
+        total_value = squad_stats['total_value']
+        st.metric("Total Squad Value", f"€{total_value or 0:,.0f}")
     
     with col3:
-        top_player = squad_df.loc[squad_df['overall_rating'].idxmax()]
-        st.metric("Best Player", f"{top_player['player_name']} ({top_player['overall_rating']})")
+        top_player = conn.execute('''
+            SELECT player_name, overall_rating FROM players
+            WHERE club_name = ?
+            ORDER BY overall_rating DESC
+            LIMIT 1
+        ''', (user['club_name'],)).fetchone()
+        st.metric("Best Player", f"{top_player[0]} ({top_player[1]})")
     
     with col4:
-        st.metric("Squad Size", len(squad_df))
+        st.metric("Squad Size", int(squad_stats['player_count']))
     
-    # Display enhanced squad table
-    display_enhanced_table(squad_df, f"{user['club_name']} Squad")
+    # Only the page being shown is read, one keyset page at a time
+    squad_df = player_page(conn, '''
+        SELECT players.id, player_name, positions, age, nationality, overall_rating,
+               potential, value_eur, wage_eur
+        FROM players
+        WHERE club_name = ?
+    ''', [user['club_name']], 'check_squad_page')
     
-    conn.close()
+    # Display enhanced squad table
+    display_enhanced_table(squad_df.drop(columns=['id']), f"{user['club_name']} Squad")
+    show_page_controls('check_squad_page')
 
 def show_upload_squad():
     st.title("📤 Upload Squad")
@@ -123,7 +240,7 @@ def show_upload_squad():
         st.warning("You haven't been assigned a club yet. Please wait for admin approval.")
         return
     
-    conn = sqlite3.connect('match_simulator.db')
+    conn = get_connection()
     
     # Upload form
     st.subheader("Upload Your Squad Image")
@@ -134,15 +251,15 @@ def show_upload_squad():
         
         if st.form_submit_button("Upload Squad"):
             if uploaded_file and description:
-                # Convert image to bytes
+                # Save the image to the store; the database only keeps its hash
                 image_bytes = uploaded_file.read()
+                image_hash = store_image(image_bytes)
+                schedule_renditions(image_hash)
                 
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT INTO squad_uploads (user_id, image_data, description)
-                    VALUES (?, ?, ?)
-                ''', (user['id'], image_bytes, description))
-                conn.commit()
+                execute_write('''
+                    INSERT INTO squad_uploads (user_id, image_hash, image_size, description)
+                    VALUES (?, ?, ?, ?)
+                ''', (user['id'], image_hash, len(image_bytes), description))
                 
                 st.success("Squad uploaded successfully! Waiting for admin approval.")
             else:
@@ -152,7 +269,7 @@ def show_upload_squad():
     st.subheader("Your Previous Uploads")
     
     uploads_df = pd.read_sql_query('''
-        SELECT id, description, status, uploaded_at, approved_at
+        SELECT id, description, status, uploaded_at, approved_at, image_hash
         FROM squad_uploads
         WHERE user_id = ?
         ORDER BY uploaded_at DESC
@@ -171,19 +288,8 @@ def show_upload_squad():
                 if upload['approved_at']:
                     st.write(f"**Approved:** {upload['approved_at']}")
                 
-                # Display image
-                cursor = conn.cursor()
-                cursor.execute('SELECT image_data FROM squad_uploads WHERE id = ?', (upload['id'],))
-                image_data = cursor.fetchone()[0]
-                
-                if image_data:
-                    try:
-                        image = Image.open(io.BytesIO(image_data))
-                        st.image(image, caption="Squad Image", width=300)
-                    except:
-                        st.error("Could not display image")
-    
-    conn.close()
+                # Display preview (full image on demand)
+                display_squad_image(upload['image_hash'], 'preview', 300, key=f"full_image_{upload['id']}")
 
 def show_transfer_bid():
     st.markdown("""
@@ -199,7 +305,7 @@ def show_transfer_bid():
         st.warning("You haven't been assigned a club yet. Please wait for admin approval.")
         return
     
-    conn = sqlite3.connect('match_simulator.db')
+    conn = get_connection()
     
     # Enhanced layout with tabs
     tab1, tab2, tab3 = st.tabs(["🔍 Browse All Players", "📊 Your Transfer Activity", "📨 Incoming Bids"])
@@ -215,13 +321,8 @@ def show_transfer_bid():
         
         with col2:
             # Get all clubs except user's club
-            clubs_df = pd.read_sql_query('''
-                SELECT DISTINCT club_name 
-                FROM players 
-                WHERE club_name IS NOT NULL AND club_name != '' AND club_name != ?
-                ORDER BY club_name
-            ''', conn, params=(user['club_name'],))
-            club_filter = st.selectbox("🏟️ Filter by Club", ["All Clubs"] + clubs_df['club_name'].tolist())
+            other_clubs = [club for club in get_club_names(conn) if club != user['club_name']]
+            club_filter = st.selectbox("🏟️ Filter by Club", ["All Clubs"] + other_clubs)
         
         with col3:
             position_filter = st.selectbox("⚽ Position", ["All Positions", "GK", "CB", "LB", "RB", "CDM", "CM", "CAM", "LW", "RW", "ST"])
@@ -229,39 +330,36 @@ def show_transfer_bid():
         with col4:
             rating_filter = st.selectbox("⭐ Min Rating", ["Any Rating", "80+", "85+", "90+", "95+"])
         
-        # Build comprehensive query
-        query = '''
-            SELECT player_id, player_name, positions, club_name, age, nationality,
-                   overall_rating, potential, value_eur, wage_eur
-            FROM players
+        # Build comprehensive query (name search goes through the full-text index)
+        search_sql, params = search_join(search_name)
+        rank_sql = f", {SEARCH_RANK}" if search_sql else ""
+        query = f'''
+            SELECT players.id, player_id, player_name, positions, club_name, age, nationality,
+                   overall_rating, potential, value_eur, wage_eur{rank_sql}
+            FROM players {search_sql}
             WHERE club_name != ? AND club_name IS NOT NULL AND club_name != ''
         '''
-        params = [user['club_name']]
-        
-        if search_name:
-            query += " AND player_name LIKE ?"
-            params.append(f"%{search_name}%")
+        params.append(user['club_name'])
         
         if club_filter != "All Clubs":
             query += " AND club_name = ?"
             params.append(club_filter)
         
         if position_filter != "All Positions":
-            query += " AND positions LIKE ?"
-            params.append(f"%{position_filter}%")
+            position_sql, position_params = position_clause(position_filter)
+            query += position_sql
+            params += position_params
         
         if rating_filter != "Any Rating":
             min_rating = int(rating_filter.replace("+", ""))
             query += " AND overall_rating >= ?"
             params.append(min_rating)
         
-        query += " ORDER BY overall_rating DESC LIMIT 50"
-        
-        # Execute search
-        players_df = pd.read_sql_query(query, conn, params=params)
+        # Execute search, one keyset page at a time
+        players_df = player_page(conn, query, params, 'transfer_players_page', page_size=50, ranked=bool(search_sql))
         
         if not players_df.empty:
-            st.subheader(f"Available Players ({len(players_df)} found)")
+            st.subheader(f"Available Players (page {page_number('transfer_players_page')}, {len(players_df)} shown)")
             
             # Display summary stats
             col1, col2, col3 = st.columns(3)
@@ -344,18 +442,18 @@ def show_transfer_bid():
                                 elif bid_amount <= 0:
                                     st.error("Bid amount must be greater than 0!")
                                 else:
-                                    cursor = conn.cursor()
-                                    cursor.execute('''
+                                    execute_write('''
                                         INSERT INTO transfer_bids 
                                         (user_id, player_id, bid_amount, description, status)
                                         VALUES (?, ?, ?, ?, 'pending')
                                     ''', (user['id'], player['player_id'], bid_amount, description))
-                                    conn.commit()
                                     
                                     st.success(f"✅ Bid submitted for {player['player_name']}!")
                                     st.info(f"💰 Bid Amount: €{bid_amount:,}")
                                     st.info("💡 Money will only be deducted when approved by admin.")
                                     st.balloons()
+            
+            show_page_controls('transfer_players_page')
     
     with tab2:
         st.subheader("📊 Your Transfer Activity")
@@ -518,13 +616,13 @@ def show_transfer_bid():
                         
                         if bidder_info and bidder_info[1] >= bid['bid_amount']:
                             # Update transfer status to seller_accepted (waiting for admin)
-                            cursor.execute('''
+                            execute_write('''
                                 UPDATE transfer_bids 
-                                SET status = 'seller_accepted', seller_response_date = datetime('now')
+                                SET status = 'seller_accepted', seller_response_date = datetime('now'),
+                                    seller_club = (SELECT club_name FROM players WHERE player_id = transfer_bids.player_id)
                                 WHERE id = ?
                             ''', (bid['id'],))
                             
-                            conn.commit()
                             st.success(f"✅ You accepted the bid for {bid['player_name']}!")
                             st.info(f"⏳ Status: Accepted and waiting for admin approval")
                             st.info(f"💰 You will receive €{bid['bid_amount']:,} once admin confirms the transfer")
@@ -533,23 +631,20 @@ def show_transfer_bid():
                         else:
                             st.error(f"❌ Transfer failed! Bidder has insufficient funds.")
                             # Update bid status to failed
-                            cursor.execute('''
+                            execute_write('''
                                 UPDATE transfer_bids 
                                 SET status = 'failed_insufficient_funds', seller_response_date = datetime('now')
                                 WHERE id = ?
                             ''', (bid['id'],))
-                            conn.commit()
                             st.rerun()
                 
                 with col_reject:
                     if st.button(f"❌ Reject Bid", key=f"reject_{bid['id']}"):
-                        cursor = conn.cursor()
-                        cursor.execute('''
+                        execute_write('''
                             UPDATE transfer_bids 
                             SET status = 'seller_rejected', seller_response_date = datetime('now')
                             WHERE id = ?
                         ''', (bid['id'],))
-                        conn.commit()
                         st.error(f"❌ You rejected the bid for {bid['player_name']}.")
                         st.rerun()
                 
@@ -577,19 +672,37 @@ def show_transfer_bid():
                 <p style="color: #6c757d;">Your players must be performing well to attract interest!</p>
             </div>
             """, unsafe_allow_html=True)
-    
-    conn.close()
 
 def show_balance_inventory():
     st.title("💰 Balance & Inventory")
     
     user = st.session_state.user
-    conn = sqlite3.connect('match_simulator.db')
+    conn = get_connection()
     
     # Current balance
     st.subheader("Current Balance")
     st.metric("Cash", f"€{user['cash']:,.2f}")
     
+    # Cash ledger entries with the balance each one left behind
+    st.subheader("Transaction History")
+    
+    history = balance_history(conn, user['id'], limit=20)
+    if history:
+        history_df = pd.DataFrame(
+            history, columns=['id', 'txn_id', 'amount', 'balance_after', 'kind', 'reference', 'memo', 'created_at']
+        )
+        history_df['amount'] = history_df['amount'].apply(lambda x: f"{'+' if x > 0 else '-'}€{abs(x):,.2f}")
+        history_df['balance_after'] = history_df['balance_after'].apply(lambda x: f"€{x:,.2f}")
+        history_df['kind'] = history_df['kind'].str.replace('_', ' ').str.title()
+        st.dataframe(
+            history_df[['created_at', 'kind', 'amount', 'balance_after', 'memo']].rename(columns={
+                'created_at': 'Date', 'kind': 'Type', 'amount': 'Amount', 'balance_after': 'Balance', 'memo': 'Note'
+            }),
+            use_container_width=True
+        )
+    else:
+        st.info("No cash transactions yet.")
+    
     # Recent transactions (simplified - could be expanded)
     st.subheader("Recent Activity")
     
@@ -628,25 +741,17 @@ def show_balance_inventory():
     if user['club_name']:
         st.subheader("Squad Value")
         
-        squad_value_df = pd.read_sql_query('''
-            SELECT COUNT(*) as player_count, 
-                   AVG(overall_rating) as avg_rating,
-                   SUM(value_eur) as total_value,
-                   SUM(wage_eur) as total_wages
-            FROM players
-            WHERE club_name = ?
-        ''', conn, params=(user['club_name'],))
+        squad_data = get_club_stats(conn, user['club_name'])
         
-        if not squad_value_df.empty and squad_value_df.iloc[0]['player_count'] > 0:
-            squad_data = squad_value_df.iloc[0]
-            
+        if squad_data is not None:
             col1, col2, col3, col4 = st.columns(4)
             
             with col1:
                 st.metric("Players", int(squad_data['player_count']))
             
             with col2:
-                st.metric("Avg Rating", f"{squad_data['avg_rating']:.1f}")
+                avg_rating = squad_data['avg_rating']
+                st.metric("Avg Rating", "N/A" if pd.isna(avg_rating) else f"{avg_rating:.1f}")
             
             with col3:
                 st.metric("Squad Value", f"€{squad_data['total_value']:,.0f}")
@@ -654,4 +759,3 @@ def show_balance_inventory():
             with col4:
                 st.metric("Annual Wages", f"€{squad_data['total_wages']:,.0f}")
     
-    conn.close()
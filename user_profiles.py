@@ -0,0 +1,65 @@
+"""
+Live user profiles for Match Simulator App
+A trigger bumps users.row_version whenever a profile field changes (cash
+distribution, transfer settlement, club assignment, approval), so each
+rerun refreshes the logged-in user with one primary-key version lookup
+and re-reads the row only after it actually changed
+"""
+
+import streamlit as st
+from database import get_connection
+
+PROFILE_COLUMNS = ['id', 'username', 'role', 'status', 'club_name', 'cash']
+
+def create_user_row_versions(conn):
+    """Add users.row_version and the trigger that bumps it on profile writes"""
+    columns = [column[1] for column in conn.execute("PRAGMA table_info(users)")]
+    if 'row_version' not in columns:
+        conn.execute("ALTER TABLE users ADD COLUMN row_version INTEGER NOT NULL DEFAULT 0")
+
+    # row_version itself is not in the column list, so the trigger never re-fires
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS users_row_version
+        AFTER UPDATE OF username, role, status, club_name, cash, email ON users BEGIN
+            UPDATE users SET row_version = row_version + 1 WHERE id = new.id;
+        END
+    ''')
+
+def get_user_version(conn, user_id):
+    """Current row version of a user, or None if the account no longer exists"""
+    row = conn.execute("SELECT row_version FROM users WHERE id = ?", (user_id,)).fetchone()
+    return row[0] if row else None
+
+@st.cache_data(max_entries=1000, show_spinner=False)
+def load_user_profile(user_id, row_version):
+    """A user's profile as of a row version (cached per version)"""
+    row = get_connection().execute(f'''
+        SELECT {', '.join(PROFILE_COLUMNS)} FROM users WHERE id = ?
+    ''', (user_id,)).fetchone()
+    return dict(zip(PROFILE_COLUMNS, row)) if row else None
+
+def get_user_profile(user_id, conn=None):
+    """Fresh profile for a user, re-read only when its row version moved"""
+    conn = conn or get_connection()
+    row_version = get_user_version(conn, user_id)
+    if row_version is None:
+        return None
+    return load_user_profile(user_id, row_version)
+
+def refresh_session_user():
+    """Replace the logged-in user's snapshot with the live profile
+
+    Logs the session out if the account was deleted.
+    """
+    user = st.session_state.get('user')
+    if not user:
+        return None
+
+    profile = get_user_profile(user['id'])
+    if profile is None:
+        st.session_state.authenticated = False
+        st.session_state.user = None
+        st.session_state.page = 'welcome'
+    else:
+        st.session_state.user = profile
+    return profile
@@ -1,7 +1,7 @@
-import sqlite3
+from database import get_connection
 
 def verify_users():
-    conn = sqlite3.connect('match_simulator.db')
+    conn = get_connection()
     cursor = conn.cursor()
     
     try:
@@ -37,8 +37,6 @@ def verify_users():
         
     except Exception as e:
         print(f"Error verifying users: {e}")
-    finally:
-        conn.close()
 
 if __name__ == "__main__":
     verify_users()